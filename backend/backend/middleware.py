@@ -0,0 +1,152 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, JsonResponse
+
+INICIO_PROCESO = time.time()
+
+
+class _Verificaciones:
+    """
+    Resultado de las sondas de BD, reutilizado SALUD_CACHE_SEGUNDOS por proceso:
+    los balanceadores consultan /readyz cada pocos segundos y no deben abrir una
+    consulta por cada petición.
+    """
+
+    def __init__(self):
+        self._resultado = None
+        self._medido_en = 0
+        self._lock = threading.Lock()
+
+    def _medir(self):
+        from investigaciones.services.pemex import pemex_gateway
+
+        resultado = {}
+        try:
+            with connections['default'].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            resultado['default'] = True
+        except Exception:
+            connections['default'].close()
+            resultado['default'] = False
+        resultado['pemex'] = pemex_gateway.verificar(timeout=settings.SALUD_TIMEOUT_SEGUNDOS)
+        return resultado
+
+    def resultado(self):
+        if time.monotonic() - self._medido_en > settings.SALUD_CACHE_SEGUNDOS:
+            with self._lock:
+                if time.monotonic() - self._medido_en > settings.SALUD_CACHE_SEGUNDOS:
+                    self._resultado = self._medir()
+                    self._medido_en = time.monotonic()
+        return self._resultado
+
+
+class _Contadores:
+    """Peticiones atendidas por el proceso, por clase de código (2xx, 4xx...)."""
+
+    def __init__(self):
+        self.peticiones = {}
+        self.segundos = 0.0
+        self._lock = threading.Lock()
+
+    def registrar(self, codigo, segundos):
+        clase = f"{codigo // 100}xx"
+        with self._lock:
+            self.peticiones[clase] = self.peticiones.get(clase, 0) + 1
+            self.segundos += segundos
+
+    def copia(self):
+        with self._lock:
+            return dict(self.peticiones), self.segundos
+
+
+verificaciones = _Verificaciones()
+contadores = _Contadores()
+
+
+def _healthz(request):
+    return HttpResponse("ok", content_type="text/plain")
+
+
+def _readyz(request):
+    """
+    Lista solo si responde la BD principal. Sin pemex la aplicación sigue
+    (respaldos del gateway), así que se reporta como degradada pero lista.
+    """
+    resultado = verificaciones.resultado()
+    listo = resultado['default']
+    return JsonResponse(
+        {
+            'estado': 'ok' if listo and resultado['pemex'] else ('degradado' if listo else 'no_disponible'),
+            'bases_datos': resultado,
+        },
+        status=200 if listo else 503,
+    )
+
+
+def _metrics(request):
+    """Formato de texto de Prometheus, con los contadores de este proceso."""
+    if settings.METRICAS_TOKEN and request.headers.get('Authorization') != f"Bearer {settings.METRICAS_TOKEN}":
+        return HttpResponse(status=401)
+
+    from investigaciones.services.pemex import pemex_gateway
+
+    resultado = verificaciones.resultado()
+    peticiones, segundos = contadores.copia()
+    pemex = pemex_gateway.metricas()
+
+    lineas = [
+        "# TYPE gai_proceso_inicio_segundos gauge",
+        f"gai_proceso_inicio_segundos {INICIO_PROCESO:.0f}",
+        "# TYPE gai_bd_disponible gauge",
+    ]
+    lineas += [f'gai_bd_disponible{{alias="{alias}"}} {int(ok)}' for alias, ok in resultado.items()]
+    lineas.append("# TYPE gai_peticiones_total counter")
+    lineas += [f'gai_peticiones_total{{codigo="{clase}"}} {n}' for clase, n in sorted(peticiones.items())]
+    lineas += [
+        "# TYPE gai_peticiones_segundos_total counter",
+        f"gai_peticiones_segundos_total {segundos:.3f}",
+        "# TYPE gai_pemex_consultas_total counter",
+    ]
+    for resultado_consulta in ('exitos', 'fallos', 'rechazadas_circuito', 'rechazadas_saturacion',
+                               'desde_cache', 'desde_respaldo', 'sin_respaldo'):
+        lineas.append(f'gai_pemex_consultas_total{{resultado="{resultado_consulta}"}} {pemex[resultado_consulta]}')
+    lineas += [
+        "# TYPE gai_pemex_consulta_maxima_ms gauge",
+        f"gai_pemex_consulta_maxima_ms {pemex['tiempo_maximo_ms']:.1f}",
+        "# TYPE gai_pemex_circuito gauge",
+    ]
+    lineas += [
+        f'gai_pemex_circuito{{estado="{estado}"}} {int(pemex["circuito"] == estado)}'
+        for estado in ('cerrado', 'abierto', 'semiabierto')
+    ]
+    return HttpResponse("\n".join(lineas) + "\n", content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class SaludMiddleware:
+    """
+    Primero de MIDDLEWARE: /healthz, /readyz y /metrics se responden aquí, sin
+    pasar por CORS, sesiones, autenticación, DRF ni la auditoría. Para las demás
+    peticiones solo cuenta respuestas y tiempo (para /metrics).
+    """
+
+    RUTAS = {
+        '/healthz': _healthz,
+        '/readyz': _readyz,
+        '/metrics': _metrics,
+    }
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        vista = self.RUTAS.get(request.path_info.rstrip('/'))
+        if vista is not None and request.method in ('GET', 'HEAD'):
+            return vista(request)
+
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        contadores.registrar(response.status_code, time.perf_counter() - inicio)
+        return response
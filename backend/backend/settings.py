@@ -14,6 +14,7 @@ from pathlib import Path
 from decouple import config
 from datetime import timedelta
 import os
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -41,6 +42,55 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  
 
+# Servido de archivos protegidos (constancias, responsivas, documentos).
+# Vacío: Django transmite el archivo. 'x-accel-redirect' (nginx) o 'x-sendfile' (Apache):
+# Django solo autoriza y registra, el servidor web envía el archivo.
+PROTECTED_FILES_OFFLOAD = config('PROTECTED_FILES_OFFLOAD', default='') or None
+# Location "internal" de nginx que apunta a MEDIA_ROOT
+PROTECTED_FILES_ACCEL_PREFIX = config('PROTECTED_FILES_ACCEL_PREFIX', default='/protected-media/')
+
+# Almacén por contenido (MEDIA_ROOT/blobs): run_workers borra archivos sin ArchivoBlob de altas revertidas
+ALMACEN_HUERFANOS_HORAS = 24
+
+# Cargas por fragmentos (evidencias grandes). Los temporales quedan fuera de MEDIA_ROOT.
+CARGAS_PARCIALES_DIR = os.path.join(BASE_DIR, 'tmp', 'cargas')
+CARGAS_PARCIALES_TAMANO_MAXIMO = 2 * 1024 * 1024 * 1024  # 2 GB por archivo
+CARGAS_PARCIALES_FRAGMENTO_MAXIMO = 8 * 1024 * 1024  # 8 MB por petición
+CARGAS_PARCIALES_EXPIRACION_HORAS = 48
+
+# Miniaturas / vista previa de primera página (PDF e imágenes)
+MINIATURAS_DIR = os.path.join(BASE_DIR, 'tmp', 'miniaturas')
+MINIATURAS_MAX_BYTES = 256 * 1024 * 1024  # al superarse se borran las menos usadas
+MINIATURAS_ESPERA_SEGUNDOS = 5  # si no se generan a tiempo el endpoint responde 202
+
+# Generación de oficios por lote (ZIP)
+OFICIOS_LOTE_MAXIMO = 1000
+OFICIOS_LOTE_HILOS = 4
+
+# Trabajos en segundo plano (exportaciones, lotes de oficios) que procesa `manage.py run_workers`
+EXPORTACIONES_DIR = os.path.join(BASE_DIR, 'tmp', 'exportaciones')
+EXPORTACIONES_CONCURRENTES = config('EXPORTACIONES_CONCURRENTES', default=2, cast=int)  # tope global
+EXPORTACIONES_PENDIENTES_POR_USUARIO = 5
+EXPORTACIONES_EXPIRACION_HORAS = 24  # el archivo resultante se borra pasado este tiempo
+EXPORTACIONES_SIN_LATIDO_MINUTOS = 10  # un trabajo en proceso sin avances se reencola
+EXPORTACIONES_INTENTOS = 3
+EXPORTACIONES_OFICIOS_MAXIMO = 20000  # lote de oficios en segundo plano (vs. OFICIOS_LOTE_MAXIMO)
+
+# Listado de bajas: total de registros en caché (se invalida al modificar bajas)
+BAJAS_CONTEO_CACHE_SEGUNDOS = 300
+BAJAS_ESTADISTICAS_CACHE_SEGUNDOS = 600
+BAJAS_IMPORTACION_LOTE = 500  # filas por consulta al directorio y por bulk_create
+
+# Catálogo costo_plaza_anual en memoria (se recarga al expirar)
+COSTO_PLAZA_CACHE_SEGUNDOS = 3600
+
+# Conversión de oficios a PDF con LibreOffice headless (?format=pdf)
+OFICIOS_PDF_CONVERTIDOR = config('OFICIOS_PDF_CONVERTIDOR', default='soffice')
+OFICIOS_PDF_INSTANCIAS = config('OFICIOS_PDF_INSTANCIAS', default=2, cast=int)
+OFICIOS_PDF_TIMEOUT_SEGUNDOS = 60
+OFICIOS_PDF_DIR = os.path.join(BASE_DIR, 'tmp', 'oficios_pdf')
+OFICIOS_PDF_MAX_BYTES = 256 * 1024 * 1024
+
 INSTALLED_APPS = [
     
     'django.contrib.admin',
@@ -61,16 +111,21 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'login_register.tokens.JWTAuthenticationConRoles',  # roles desde los claims del token
     )
 }
 
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(hours=8),
-    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),  # puedes ajustarlo también
+    # Access corto: los claims de roles (login_register/tokens.py) se renuevan con cada refresh.
+    # El refresh dura lo que antes duraba la sesión (8 h).
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=config('JWT_ACCESS_MINUTOS', default=15, cast=int)),
+    'REFRESH_TOKEN_LIFETIME': timedelta(hours=8),  # puedes ajustarlo también
 }
+# Endpoints de lectura con JWTAuthenticationSinConsulta: autorizan con los claims sin cargar el User
+JWT_AUTORIZACION_SIN_CONSULTA = config('JWT_AUTORIZACION_SIN_CONSULTA', default=True, cast=bool)
 
 MIDDLEWARE = [
+    'backend.middleware.SaludMiddleware',  # /healthz, /readyz, /metrics: antes que todo lo demás
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -84,12 +139,21 @@ MIDDLEWARE = [
 
 X_FRAME_OPTIONS = 'SAMEORIGIN'
 
+# Sondas del balanceador (backend/middleware.py)
+SALUD_CACHE_SEGUNDOS = 5  # cada proceso reutiliza el resultado de /readyz este tiempo
+SALUD_TIMEOUT_SEGUNDOS = 2  # timeout del SELECT 1 contra pemex
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')  # si se define, /metrics exige "Authorization: Bearer <token>"
+
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:5173', 
     'http://127.0.0.1:5173',
     'http://192.168.1.64:5173',
     'http://10.15.97.118:5173'
 ]
+# Catálogos con caché en el navegador: el cliente revalida con If-None-Match y lee el ETag.
+# Cargas reanudables (investigaciones/services/cargas.py): Upload-Offset de ida y de vuelta.
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match', 'upload-offset')
+CORS_EXPOSE_HEADERS = ['ETag', 'Upload-Offset']
 
 ROOT_URLCONF = 'backend.urls'
 
@@ -114,12 +178,82 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Conexiones persistentes: abrir una conexión ODBC con trusted_connection (SSPI/Kerberos)
+# cuesta más que la mayoría de las consultas, así que se reutiliza entre peticiones del
+# mismo hilo hasta CONN_MAX_AGE segundos; CONN_HEALTH_CHECKS verifica antes de reutilizarla
+# que el servidor no la haya cerrado. DB_CONN_MAX_AGE=0 vuelve a una conexión por petición.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=300, cast=int)
+PEMEX_CONN_MAX_AGE = config('PEMEX_CONN_MAX_AGE', default=300, cast=int)
+# Modo pool para 'pemex' (solo lectura, cursores crudos): en lugar de una conexión fija por
+# hilo, cada petición toma y devuelve la conexión al pool del administrador ODBC (pyodbc.pooling,
+# activo por defecto; en unixODBC requiere Pooling=Yes y CPTimeout en odbcinst.ini).
+# Conviene cuando hay muchos hilos y pocas consultas a 'pemex' por hilo.
+PEMEX_DB_POOL = config('PEMEX_DB_POOL', default=False, cast=bool)
+
+# Directorio de RH ('pemex') a través de investigaciones.services.pemex.PemexGateway
+PEMEX_TIMEOUT_CONEXION_SEGUNDOS = config('PEMEX_TIMEOUT_CONEXION_SEGUNDOS', default=5, cast=int)
+PEMEX_TIMEOUT_CONSULTA_SEGUNDOS = config('PEMEX_TIMEOUT_CONSULTA_SEGUNDOS', default=10, cast=int)
+PEMEX_CONSULTAS_SIMULTANEAS = 4  # por proceso; el resto espera o usa el respaldo
+PEMEX_ESPERA_TURNO_SEGUNDOS = 2
+PEMEX_CIRCUITO_FALLOS = 5  # fallos seguidos que abren el circuito
+PEMEX_CIRCUITO_ESPERA_SEGUNDOS = 30  # abierto este tiempo antes de dejar pasar una prueba
+PEMEX_CATALOGOS_CACHE_SEGUNDOS = 3600
+PEMEX_RESPALDO_SEGUNDOS = 7 * 24 * 3600  # última respuesta buena, para cuando RH no responde
+
+# Cachés compartidas entre procesos: las invalidaciones por señal (padrón, sellos de
+# bajas/investigaciones/roles) deben verse en todos los workers, no solo en el que
+# atendió la escritura. Por omisión en disco (todos los procesos de este servidor);
+# con varios servidores se define REDIS_URL (requiere el paquete `redis`).
+# 'respaldos': última respuesta buena de las consultas de catálogo del gateway. Va aparte
+# de la caché general para no competir por espacio con sellos y conteos.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'gai',
+        },
+        'respaldos': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'gai-respaldos',
+            'TIMEOUT': PEMEX_RESPALDO_SEGUNDOS,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(BASE_DIR, 'tmp', 'cache', 'default'),
+            'OPTIONS': {'MAX_ENTRIES': 50000},
+        },
+        'respaldos': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(BASE_DIR, 'tmp', 'cache', 'respaldos'),
+            'TIMEOUT': PEMEX_RESPALDO_SEGUNDOS,
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        },
+    }
+# Catálogos de RH (centros, áreas) materializados en la tabla CatalogoRH
+CATALOGOS_RH_ACTUALIZAR_HORAS = 24  # run_workers los vuelve a copiar de RH pasado este tiempo
+CATALOGOS_RH_CACHE_SEGUNDOS = 300  # cada proceso relee la tabla local con esta frecuencia
+
+# Padrón de investigadores por región (selector de investigadores); se invalida con señales
+INVESTIGADORES_PADRON_CACHE_SEGUNDOS = 600
+
+# Dashboard de usuario (UserInfoPage): por usuario, se invalida al cambiar casos, grupos o perfil
+DASHBOARD_USUARIO_CACHE_SEGUNDOS = 600
+DIRECTORIO_EMPLEADO_CACHE_SEGUNDOS = 3600  # datos laborales de una ficha en el tablero de RH
+
 DATABASES = {
     'default': {
         'ENGINE': config('DB_ENGINE'),
         'NAME': config('DB_NAME'),
         'HOST': config('DB_HOST'),
         'PORT': '',
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'driver': 'ODBC Driver 17 for SQL Server',
             'trusted_connection': config('DB_TRUSTED_CONNECTION'),
@@ -130,9 +264,18 @@ DATABASES = {
         'NAME': 'pemex',
         'HOST': config('DB_HOST'),
         'PORT': '',
+        'CONN_MAX_AGE': 0 if PEMEX_DB_POOL else PEMEX_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'driver': 'ODBC Driver 17 for SQL Server',
             'trusted_connection': config('DB_TRUSTED_CONNECTION'),
+            # Solo se lee del directorio de RH
+            'extra_params': 'ApplicationIntent=ReadOnly',
+            # Si el servidor de RH no responde se falla rápido (ver PemexGateway) en vez de
+            # reintentar y dejar el hilo bloqueado
+            'connection_timeout': PEMEX_TIMEOUT_CONEXION_SEGUNDOS,
+            'connection_retries': 0,
+            'query_timeout': PEMEX_TIMEOUT_CONSULTA_SEGUNDOS,
         },
     }
 }
@@ -10,7 +10,7 @@ from django.conf.urls.static import static
 
 from django.views.static import serve
 from django.views.decorators.clickjacking import xframe_options_exempt
-from login_register.views import CustomTokenObtainPairView
+from login_register.views import CustomTokenObtainPairView, CustomTokenRefreshView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -18,7 +18,7 @@ urlpatterns = [
     path('api/register/', RegisterView.as_view(), name='register'),
 
     path("api/token/", CustomTokenObtainPairView.as_view(), name="token"),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     path('api/users/', UserListView.as_view(), name='user_list'),
     path('api/groups/', GroupListView.as_view(), name='group-list'),
     path('api/user/<int:user_id>/', user_detail, name='user_detail'),
@@ -0,0 +1,21 @@
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend
+
+from .models import normalizar_nombre
+
+
+class BusquedaBajaFilter(BaseFilterBackend):
+    """
+    ?search= por prefijo de ficha o de nombre normalizado ('PATERNO MATERNO NOMBRE(S)').
+    Ambas columnas tienen índice; un prefijo (LIKE 'x%') lo aprovecha, un icontains no.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        termino = request.query_params.get(self.search_param, '').strip()
+        if not termino:
+            return queryset
+        return queryset.filter(
+            Q(ficha__startswith=termino.upper())
+            | Q(nombre_normalizado__startswith=normalizar_nombre(termino))
+        )
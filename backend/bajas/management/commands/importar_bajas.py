@@ -0,0 +1,46 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from bajas.services.importacion import ImportacionError, importar_bajas, leer_filas
+
+
+class Command(BaseCommand):
+    help = 'Alta masiva de bajas desde un archivo CSV o XLSX (encabezados = campos de Baja).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .xlsx')
+        parser.add_argument('--usuario', help='Username que quedará como created_by')
+        parser.add_argument('--lote', type=int, help='Filas por consulta al directorio y por bulk_create')
+        parser.add_argument('--validar', action='store_true', help='Solo valida, no guarda nada')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['usuario']:
+            user = User.objects.filter(username=options['usuario']).first()
+            if user is None:
+                raise CommandError(f"No existe el usuario {options['usuario']}")
+
+        inicio = time.monotonic()
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importar_bajas(
+                    leer_filas(archivo, options['archivo']),
+                    user=user, lote=options['lote'], validar_solo=options['validar'],
+                )
+        except FileNotFoundError:
+            raise CommandError(f"No se encontró {options['archivo']}")
+        except ImportacionError as e:
+            raise CommandError(str(e))
+
+        for error in resultado['errores']:
+            detalle = '; '.join(
+                f"{campo}: {' '.join(str(m) for m in mensajes)}" for campo, mensajes in error['errores'].items()
+            )
+            self.stderr.write(f"Fila {error['fila']} (ficha {error['ficha'] or '-'}): {detalle}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['total']} filas, {resultado['validas']} válidas, {resultado['creadas']} creadas, "
+            f"{len(resultado['errores'])} con error ({time.monotonic() - inicio:.1f} s)"
+        ))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bajas', '0009_baja_fecha_oficio_baja_fecha_ultimo_dia_laboral_and_more'),
+        ('investigaciones', '0052_archivoblob_documentoinvestigacion_nombre_archivo_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentobaja',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='documentos_baja', to='investigaciones.archivoblob'),
+        ),
+        migrations.AddField(
+            model_name='documentobaja',
+            name='nombre_archivo',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:50
+
+from django.conf import settings
+from django.db import migrations, models
+import unicodedata
+
+
+def llenar_nombre_normalizado(apps, schema_editor):
+    Baja = apps.get_model('bajas', 'Baja')
+    pendientes = []
+    for baja in Baja.objects.only('id', 'nombre').iterator(chunk_size=500):
+        sin_acentos = ''.join(
+            c for c in unicodedata.normalize('NFKD', baja.nombre or '') if not unicodedata.combining(c)
+        )
+        baja.nombre_normalizado = ' '.join(sin_acentos.upper().split())
+        pendientes.append(baja)
+        if len(pendientes) >= 500:
+            Baja.objects.bulk_update(pendientes, ['nombre_normalizado'])
+            pendientes = []
+    if pendientes:
+        Baja.objects.bulk_update(pendientes, ['nombre_normalizado'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bajas', '0010_documentobaja_blob_documentobaja_nombre_archivo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='baja',
+            name='nombre_normalizado',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+        migrations.RunPython(llenar_nombre_normalizado, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='baja',
+            index=models.Index(fields=['ficha'], name='baja_ficha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='baja',
+            index=models.Index(fields=['nombre_normalizado'], name='baja_nombre_norm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='baja',
+            index=models.Index(fields=['region', 'status', 'tramite', 'created_at'], name='baja_reg_status_tram_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='baja',
+            index=models.Index(fields=['estatus_baja', 'created_at'], name='baja_estatus_created_idx'),
+        ),
+    ]
@@ -1,22 +1,43 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_delete, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
+from investigaciones.models import ArchivoBlob
+from investigaciones.services.almacenamiento import descartar_huerfano, guardar_contenido, liberar_contenido
+from investigaciones.services.miniaturas import programar_miniatura_al_subir
+from .services.cache import invalidar_bajas
 import os
+import unicodedata
+
+def normalizar_nombre(valor):
+    """Mayúsculas, sin acentos y con espacios simples; se usa igual al guardar y al buscar."""
+    if not valor:
+        return ''
+    sin_acentos = ''.join(
+        c for c in unicodedata.normalize('NFKD', valor) if not unicodedata.combining(c)
+    )
+    return ' '.join(sin_acentos.upper().split())
 
 class UppercaseMixin:
-    def save(self, *args, **kwargs):
+    def preparar_para_guardar(self):
+        """Lo que hace save() antes de escribir; bulk_create no llama a save() y lo usa directo."""
         for field in self._meta.fields:
             if isinstance(field, (models.CharField, models.EmailField)):
                 value = getattr(self, field.name)
                 if isinstance(value, str):
                     setattr(self, field.name, value.upper())
+
+    def save(self, *args, **kwargs):
+        self.preparar_para_guardar()
         super().save(*args, **kwargs)
 
 class Baja(UppercaseMixin, models.Model):
     # Campos solicitados
     ficha = models.CharField(max_length=15)
     nombre = models.CharField(max_length=40)
+    # Copia de `nombre` para búsqueda por prefijo con índice (ver normalizar_nombre)
+    nombre_normalizado = models.CharField(max_length=40, blank=True, default='', editable=False)
     nivel = models.CharField(max_length=2)  # "NUM(2)" -> CharField or IntegerField. Using Char for broader compatibility if needed, or Int. User said NUM(2). Let's use CharField(2) to be safe with "01", "02".
     nuevo_nivel = models.CharField(max_length=2,null=True, blank=True)
     grado = models.CharField(max_length=5, null=True, blank=True)
@@ -104,29 +125,47 @@ class Baja(UppercaseMixin, models.Model):
     ]
     estatus_baja = models.CharField(max_length=20, choices=ESTATUS_BAJA_CHOICES, default='REGISTRO')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['ficha'], name='baja_ficha_idx'),
+            models.Index(fields=['nombre_normalizado'], name='baja_nombre_norm_idx'),
+            models.Index(fields=['region', 'status', 'tramite', 'created_at'], name='baja_reg_status_tram_idx'),
+            models.Index(fields=['estatus_baja', 'created_at'], name='baja_estatus_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.ficha} - {self.nombre}"
 
-def generar_ruta_archivo(instance, filename):
-    ext = filename.split('.')[-1]
+    def preparar_para_guardar(self):
+        super().preparar_para_guardar()
+        self.nombre_normalizado = normalizar_nombre(self.nombre)
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'nombre' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'nombre_normalizado'}
+        super().save(*args, **kwargs)
+
+def _ficha_safe(instance):
     if instance.baja and instance.baja.ficha:
-        reporte_safe = instance.baja.ficha.replace('/', '-')
-    else:
-        reporte_safe = "SIN_REPORTE"
+        return instance.baja.ficha.replace('/', '-')
+    return "SIN_REPORTE"
+
+def generar_nombre_legible(instance, filename):
+    """Nombre que ve el usuario; el archivo físico se guarda por contenido (ArchivoBlob)."""
+    ext = filename.split('.')[-1]
+    reporte_safe = _ficha_safe(instance)
 
     if instance.tipo == 'Solicitud':
-        nuevo_nombre = f"{reporte_safe}_Solicitud.{ext}"
-    else:
-        cantidad = DocumentoBaja.objects.filter(
-            baja=instance.baja,
-            tipo=instance.tipo
-        ).count() + 1
-        
-        tipo_safe = instance.tipo.replace(' ', '_')
-        nuevo_nombre = f"{reporte_safe}_{tipo_safe}_{cantidad}.{ext}"
-    
-    return f"bajas/documentos/{reporte_safe}/{nuevo_nombre}"
+        return f"{reporte_safe}_Solicitud.{ext}"
+
+    tipo_safe = instance.tipo.replace(' ', '_')
+    sello = timezone.now().strftime('%Y%m%d%H%M%S')
+    return f"{reporte_safe}_{tipo_safe}_{sello}.{ext}"
+
+def generar_ruta_archivo(instance, filename):
+    # Referenciada por migraciones anteriores; los archivos nuevos van a blobs/
+    return f"bajas/documentos/{_ficha_safe(instance)}/{generar_nombre_legible(instance, filename)}"
 
 class DocumentoBaja(models.Model):
     baja = models.ForeignKey(Baja, on_delete=models.CASCADE, related_name='documentos')
@@ -142,6 +181,8 @@ class DocumentoBaja(models.Model):
     tipo = models.CharField(max_length=50, choices=TIPO_DOC_CHOICES)
     
     archivo = models.FileField(upload_to=generar_ruta_archivo, max_length=255)
+    blob = models.ForeignKey(ArchivoBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='documentos_baja')
+    nombre_archivo = models.CharField(max_length=255, blank=True)
     
     descripcion = models.CharField(max_length=255, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -149,8 +190,55 @@ class DocumentoBaja(models.Model):
     def __str__(self):
         return f"{self.tipo} - {self.baja.ficha}"
 
+    def get_nombre_archivo(self):
+        return self.nombre_archivo or (self.archivo.name.split('/')[-1] if self.archivo else '')
+
+    def save(self, *args, **kwargs):
+        # Archivo nuevo: se guarda por contenido (sin consultas de conteo y sin duplicados)
+        if self.archivo and not self.archivo._committed:
+            # Al reemplazar el archivo, el blob anterior pierde esta referencia
+            anterior = type(self).objects.filter(pk=self.pk).values_list('blob_id', flat=True).first() if self.pk else None
+            nuevo = None
+            try:
+                with transaction.atomic():
+                    self.nombre_archivo = generar_nombre_legible(self, self.archivo.name)
+                    nuevo = guardar_contenido(self.archivo, self.archivo.name)
+                    self.blob = nuevo
+                    self.archivo = nuevo.ruta
+                    super().save(*args, **kwargs)
+            except Exception:
+                if nuevo is not None:
+                    # Alta revertida: que el archivo recién movido a blobs/ no quede suelto
+                    descartar_huerfano(nuevo.ruta)
+                raise
+            # Aunque sea el mismo contenido, guardar_contenido sumó una referencia nueva
+            if anterior:
+                transaction.on_commit(lambda: liberar_contenido(anterior))
+            return
+        super().save(*args, **kwargs)
+
     def delete(self, *args, **kwargs):
-        if self.archivo:
+        # Los archivos en blobs/ se liberan por conteo de referencias (ver receiver abajo)
+        if self.archivo and not self.blob_id:
             if os.path.isfile(self.archivo.path):
                 os.remove(self.archivo.path)
-        super().delete(*args, **kwargs)
\ No newline at end of file
+        super().delete(*args, **kwargs)
+
+
+@receiver(post_delete, sender=DocumentoBaja)
+def liberar_blob_documento(sender, instance, **kwargs):
+    if instance.blob_id:
+        transaction.on_commit(lambda: liberar_contenido(instance.blob_id))
+
+
+@receiver(post_save, sender=DocumentoBaja)
+def miniatura_documento(sender, instance, created, **kwargs):
+    if created and instance.archivo:
+        path = instance.archivo.path
+        transaction.on_commit(lambda: programar_miniatura_al_subir(path))
+
+
+@receiver(post_save, sender=Baja)
+@receiver(post_delete, sender=Baja)
+def invalidar_cache_bajas(sender, **kwargs):
+    transaction.on_commit(invalidar_bajas)
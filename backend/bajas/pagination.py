@@ -0,0 +1,44 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+from .services.cache import version_bajas
+
+
+class ConteoCacheadoPaginator(Paginator):
+    """
+    Paginator cuyo total (COUNT(*)) se guarda en caché por consulta. La clave incluye
+    el sello de versión de bajas, así que se recalcula tras cualquier cambio; con una
+    caché por proceso los demás workers lo ven al expirar (BAJAS_CONTEO_CACHE_SEGUNDOS).
+    """
+
+    @cached_property
+    def count(self):
+        sql, params = self.object_list.query.sql_with_params()
+        huella = hashlib.sha1(repr((sql, params)).encode('utf-8')).hexdigest()
+        clave = f'bajas:conteo:{version_bajas()}:{huella}'
+        total = cache.get(clave)
+        if total is None:
+            total = self.object_list.count()
+            cache.set(clave, total, settings.BAJAS_CONTEO_CACHE_SEGUNDOS)
+        return total
+
+
+class BajaPagination(PageNumberPagination):
+    """
+    Paginación opcional: solo aplica si la petición trae ?page=, de modo que quien
+    espera la lista completa (exportaciones, otros módulos) sigue funcionando igual.
+    """
+    django_paginator_class = ConteoCacheadoPaginator
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,17 @@
+from rest_framework import permissions
+
+from login_register.tokens import es_admin, roles_usuario
+
+
+class EsSupervisorOAdmin(permissions.BasePermission):
+    """
+    Operaciones masivas de bajas (lotes de oficios): solo Admin/AdminCentral,
+    superusuarios y supervisores regionales.
+    """
+    message = 'Solo administradores y supervisores pueden generar oficios por lote.'
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not (user and user.is_authenticated):
+            return False
+        return es_admin(user) or any(rol.startswith('Supervisor') for rol in roles_usuario(user))
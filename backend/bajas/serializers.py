@@ -19,3 +19,4 @@ class DocumentoBajaSerializer(serializers.ModelSerializer):
     class Meta:
         model = DocumentoBaja
         fields = '__all__'
+        read_only_fields = ['blob', 'nombre_archivo']
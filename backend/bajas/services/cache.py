@@ -0,0 +1,25 @@
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'bajas:version'
+
+
+def version_bajas():
+    """
+    Sello que cambia con cada alta, edición o borrado de una Baja. Las claves de
+    caché derivadas de la tabla (conteos, estadísticas) lo incluyen, así que no hay
+    que borrarlas una por una: al cambiar el sello dejan de usarse y expiran solas.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidar_bajas():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
@@ -0,0 +1,85 @@
+import hashlib
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Sum
+from django.db.models.functions import TruncMonth
+
+from .cache import version_bajas
+
+# Dimensiones por las que se puede agrupar (?agrupar=region,mes)
+DIMENSIONES = ('region', 'tramite', 'status', 'estatus_baja', 'mes')
+FILTROS = ('region', 'tramite', 'status', 'estatus_baja')
+
+
+def _redondear(valor):
+    return None if valor is None else round(float(valor), 2)
+
+
+def _consultar(agrupar, filtros, desde, hasta):
+    from bajas.models import Baja
+
+    queryset = Baja.objects.filter(**filtros)
+    if desde:
+        queryset = queryset.filter(created_at__date__gte=desde)
+    if hasta:
+        queryset = queryset.filter(created_at__date__lte=hasta)
+    if 'mes' in agrupar:
+        queryset = queryset.annotate(mes=TruncMonth('created_at'))
+
+    # Un solo GROUP BY; Count('ahorro') cuenta solo los no nulos (sirve para los promedios globales)
+    filas = queryset.values(*agrupar).annotate(
+        total=Count('id'),
+        con_ahorro=Count('ahorro'),
+        ahorro_total=Sum('ahorro'),
+        ahorro_promedio=Avg('ahorro'),
+        con_liquidacion=Count('liquidacion_neta'),
+        liquidacion_total=Sum('liquidacion_neta'),
+        liquidacion_promedio=Avg('liquidacion_neta'),
+    ).order_by(*agrupar)
+
+    grupos = []
+    total = con_ahorro = con_liquidacion = 0
+    ahorro_total = liquidacion_total = Decimal('0')
+    for fila in filas:
+        total += fila['total']
+        con_ahorro += fila['con_ahorro']
+        con_liquidacion += fila['con_liquidacion']
+        ahorro_total += fila['ahorro_total'] or 0
+        liquidacion_total += fila['liquidacion_total'] or 0
+
+        if fila.get('mes') is not None:
+            fila['mes'] = fila['mes'].strftime('%Y-%m')
+        for campo in ('ahorro_total', 'ahorro_promedio', 'liquidacion_total', 'liquidacion_promedio'):
+            fila[campo] = _redondear(fila[campo])
+        grupos.append(fila)
+
+    resumen = {
+        'total': total,
+        'con_ahorro': con_ahorro,
+        'ahorro_total': _redondear(ahorro_total),
+        'ahorro_promedio': _redondear(ahorro_total / con_ahorro) if con_ahorro else None,
+        'con_liquidacion': con_liquidacion,
+        'liquidacion_total': _redondear(liquidacion_total),
+        'liquidacion_promedio': _redondear(liquidacion_total / con_liquidacion) if con_liquidacion else None,
+    }
+    return {'agrupado_por': agrupar, 'resumen': resumen, 'grupos': grupos}
+
+
+def estadisticas_bajas(agrupar, filtros, desde=None, hasta=None):
+    """
+    Sumas, conteos y promedios de ahorro y liquidación neta agrupados por
+    `agrupar` (subconjunto de DIMENSIONES). El resultado se guarda en caché bajo
+    el sello de versión de bajas, así que cualquier alta/edición/baja lo invalida.
+    """
+    parametros = json.dumps([agrupar, filtros, str(desde or ''), str(hasta or '')], sort_keys=True)
+    huella = hashlib.sha1(parametros.encode('utf-8')).hexdigest()
+    clave = f'bajas:estadisticas:{version_bajas()}:{huella}'
+
+    resultado = cache.get(clave)
+    if resultado is None:
+        resultado = _consultar(agrupar, filtros, desde, hasta)
+        cache.set(clave, resultado, settings.BAJAS_ESTADISTICAS_CACHE_SEGUNDOS)
+    return resultado
@@ -0,0 +1,218 @@
+import csv
+import datetime
+import io
+import os
+import unicodedata
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from investigaciones.services.costo_plaza import catalogo_costo_plaza
+from investigaciones.services.directorio import buscar_empleados
+from investigaciones.services.pemex import PemexNoDisponible
+
+from .cache import invalidar_bajas
+
+try:
+    import openpyxl
+except ImportError:  # Sin openpyxl solo se importan archivos CSV
+    openpyxl = None
+
+REGIONES = ('NORTE', 'SUR', 'SURESTE', 'ALTIPLANO', 'GAI')
+
+
+class ImportacionError(Exception):
+    pass
+
+
+def _normalizar_encabezado(texto):
+    """'Fecha Ejecución' -> 'fecha_ejecucion', para aceptar los encabezados del Excel exportado."""
+    sin_acentos = ''.join(
+        c for c in unicodedata.normalize('NFKD', str(texto or '')) if not unicodedata.combining(c)
+    )
+    return '_'.join(sin_acentos.lower().split())
+
+
+def _valor(celda):
+    if celda is None:
+        return None
+    if isinstance(celda, datetime.datetime):
+        return celda.date().isoformat()
+    if isinstance(celda, datetime.date):
+        return celda.isoformat()
+    if isinstance(celda, float) and celda.is_integer():
+        return int(celda)
+    if isinstance(celda, str):
+        celda = celda.strip()
+        return celda or None
+    return celda
+
+
+def _codificacion(archivo):
+    """UTF-8 o, si no lo es, cp1252 (lo que guarda Excel como 'CSV' en Windows)."""
+    muestra = archivo.read(64 * 1024)
+    archivo.seek(0)
+    try:
+        muestra.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # Un carácter multibyte cortado al final de la muestra no cuenta como error
+        if e.start < len(muestra) - 3:
+            return 'cp1252'
+    return 'utf-8-sig'
+
+
+def _filas_csv(archivo):
+    texto = io.TextIOWrapper(archivo, encoding=_codificacion(archivo), newline='')
+    muestra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t|')
+    except csv.Error:
+        dialecto = csv.excel
+    lector = csv.reader(texto, dialecto)
+    encabezados = next(lector, None)
+    if not encabezados:
+        raise ImportacionError('El archivo está vacío')
+    yield [_normalizar_encabezado(e) for e in encabezados]
+    for fila in lector:
+        yield fila
+    texto.detach()
+
+
+def _filas_xlsx(archivo):
+    if openpyxl is None:
+        raise ImportacionError('openpyxl no está instalado: use un archivo CSV')
+    # read_only: las filas se leen conforme se piden, no se carga la hoja completa
+    libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = next(filas, None)
+        if not encabezados:
+            raise ImportacionError('El archivo está vacío')
+        yield [_normalizar_encabezado(e) for e in encabezados]
+        yield from filas
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo, nombre):
+    """
+    Genera (numero_de_fila, {campo: valor}) de un CSV o XLSX sin cargarlo completo.
+    Las filas vacías se omiten; el número de fila es el que ve el usuario en el archivo.
+    """
+    ext = os.path.splitext(nombre or '')[1].lower()
+    if ext == '.csv':
+        filas = _filas_csv(archivo)
+    elif ext in ('.xlsx', '.xlsm'):
+        filas = _filas_xlsx(archivo)
+    else:
+        raise ImportacionError('Formato no soportado (use .csv o .xlsx)')
+
+    encabezados = next(filas)
+    for numero, fila in enumerate(filas, start=2):
+        datos = {}
+        for campo, celda in zip(encabezados, fila):
+            valor = _valor(celda)
+            if campo and valor is not None:
+                datos[campo] = valor
+        if datos:
+            yield numero, datos
+
+
+def _region_de(regional):
+    """Misma regla que el formulario de bajas (BajaFormPage)."""
+    regional = (regional or '').upper()
+    if regional in REGIONES:
+        return regional
+    if 'SUR' in regional and 'SURESTE' not in regional:
+        return 'SUR'
+    for region in ('NORTE', 'SURESTE', 'ALTIPLANO', 'GAI'):
+        if region in regional:
+            return region
+    return 'NORTE'
+
+
+def _enriquecer(datos, empleado):
+    """Completa con el directorio de RH solo los campos que el archivo no trae."""
+    if not empleado:
+        return datos
+    sugeridos = {
+        'nombre': empleado['nombre'],
+        'nivel': empleado['nivel'],
+        'antiguedad': empleado['antiguedad'],
+        'posicion': empleado['puesto'],
+        'direccion': empleado['direccion'],
+        'subdireccion': empleado['subdireccion'],
+        'fuente': empleado['fuente'],
+        'regional': empleado['regional'],
+        'region': _region_de(empleado['regional']),
+    }
+    if 'costo_plaza' not in datos and empleado['nivel'] and empleado['jornada']:
+        costo = catalogo_costo_plaza.obtener(empleado['nivel'], empleado['jornada'], empleado['grupo'] or '')
+        if costo is not None:
+            sugeridos['costo_plaza'] = f"{costo:,.2f}"
+    for campo, valor in sugeridos.items():
+        if campo not in datos and valor not in (None, ''):
+            datos[campo] = valor.strip() if isinstance(valor, str) else valor
+    return datos
+
+
+def importar_bajas(filas, user=None, lote=None, validar_solo=False):
+    """
+    Importa bajas desde `filas` (ver leer_filas) en lotes de `lote` registros:
+    una consulta `ficha IN (...)` al directorio por lote, validación fila por fila
+    con BajaSerializer y un bulk_create por lote. Las filas con error no se guardan
+    y se reportan con su número de fila.
+    """
+    from bajas.models import Baja
+    from bajas.serializers import BajaSerializer
+
+    lote = lote or settings.BAJAS_IMPORTACION_LOTE
+    # Una sola instancia: construir los campos del serializer es lo más caro por fila
+    validador = BajaSerializer()
+    resultado = {'total': 0, 'validas': 0, 'creadas': 0, 'errores': []}
+
+    filas = iter(filas)
+    while True:
+        bloque = list(islice(filas, lote))
+        if not bloque:
+            break
+        resultado['total'] += len(bloque)
+
+        try:
+            directorio = buscar_empleados(datos.get('ficha') for _, datos in bloque)
+        except PemexNoDisponible as e:
+            if resultado['creadas']:
+                invalidar_bajas()
+            raise ImportacionError(f"{e}; se guardaron {resultado['creadas']} filas antes del corte")
+
+        nuevas = []
+        for numero, datos in bloque:
+            ficha = str(datos.get('ficha', '')).strip()
+            if ficha:
+                datos['ficha'] = ficha
+            datos = _enriquecer(datos, directorio.get(ficha))
+            # El autor siempre es quien importa, aunque el archivo traiga una columna created_by
+            datos.pop('created_by', None)
+            try:
+                validos = validador.run_validation(datos)
+            except ValidationError as e:
+                resultado['errores'].append({'fila': numero, 'ficha': ficha, 'errores': e.detail})
+                continue
+            baja = Baja(**validos)
+            baja.created_by = user
+            baja.preparar_para_guardar()
+            nuevas.append(baja)
+
+        resultado['validas'] += len(nuevas)
+        if nuevas and not validar_solo:
+            with transaction.atomic():
+                Baja.objects.bulk_create(nuevas)
+            resultado['creadas'] += len(nuevas)
+
+    if resultado['creadas']:
+        # bulk_create no dispara señales: se invalida a mano (conteos, estadísticas)
+        invalidar_bajas()
+    return resultado
@@ -0,0 +1,162 @@
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.conf import settings
+
+from .plantillas import renderizar_plantilla
+
+
+class LoteError(Exception):
+    """Solicitud de lote inválida; `status` es el código HTTP a devolver."""
+
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.status = status
+
+# Nombres fijos en lugar de locale.setlocale: el locale es global al proceso (no es
+# seguro entre hilos) y 'Spanish_Spain' solo existe en Windows
+MESES = (
+    'enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
+    'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre',
+)
+
+
+def formatear_fecha(fecha):
+    """date/datetime -> '05 de marzo del 2025' (mismo formato que '%d de %B del %Y' en español)."""
+    if not fecha:
+        return "__________"
+    return f"{fecha.day:02d} de {MESES[fecha.month - 1]} del {fecha.year}"
+
+
+def reorder_nombre(nombre_str: str) -> str:
+    """
+    La BD PEMEX almacena el nombre como 'PATERNO MATERNO NOMBRE(S)'.
+    Esta función lo reordena a 'NOMBRE(S) PATERNO MATERNO'.
+    Se asume que los primeros 2 tokens son apellidos y el resto es el nombre.
+    """
+    if not nombre_str:
+        return "__________"
+    partes = nombre_str.strip().split()
+    if len(partes) <= 2:
+        return nombre_str.upper()  # No se puede reordenar con seguridad
+    apellido_paterno = partes[0]
+    apellido_materno = partes[1]
+    nombres_propios  = ' '.join(partes[2:])
+    return f"{nombres_propios} {apellido_paterno} {apellido_materno}".upper()
+
+
+def contexto_oficio(baja):
+    """Contexto de la plantilla de conformidad a partir de una Baja guardada."""
+    return {
+        'FECHA_OFICIO': formatear_fecha(baja.fecha_oficio),
+        'FICHA': baja.ficha,
+        'NOMBRES': reorder_nombre(baja.nombre),
+        'FECHA_ULT_DIA': formatear_fecha(baja.fecha_ultimo_dia_laboral),
+        #agrear 1 dia a la fecha efecto
+        'FECHA_EFECTO': formatear_fecha(baja.fecha_ultimo_dia_laboral + timedelta(days=1)) if baja.fecha_ultimo_dia_laboral else "__________",
+        'REPRESENTANTE_PATRONAL': baja.representante_patronal.upper() if baja.representante_patronal else "__________",
+    }
+
+
+class _FlujoZip:
+    """
+    Destino de escritura no posicionable para ZipFile: acumula lo escrito hasta que
+    el generador lo entrega. zipfile detecta que no hay tell()/seek() y escribe
+    los tamaños en descriptores de datos, así que nunca regresa sobre lo ya enviado.
+    """
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def seleccionar_bajas_lote(datos, maximo=None):
+    """
+    Bajas de un lote de oficios a partir de {"ids": [...]} o de los filtros
+    status/region/tramite. Regresa (queryset, total) o lanza LoteError.
+    """
+    from bajas.models import Baja
+
+    maximo = maximo or settings.OFICIOS_LOTE_MAXIMO
+    bajas = Baja.objects.all()
+
+    ids = datos.get('ids')
+    if ids is not None:
+        if not isinstance(ids, list):
+            raise LoteError('ids debe ser una lista')
+        try:
+            ids = [int(i) for i in ids]
+        except (TypeError, ValueError):
+            raise LoteError('ids inválidos')
+        bajas = bajas.filter(id__in=ids)
+
+    filtros = {campo: datos[campo] for campo in ('status', 'region', 'tramite') if datos.get(campo)}
+    if ids is None and not filtros:
+        raise LoteError('Se requiere una lista de ids o al menos un filtro')
+    bajas = bajas.filter(**filtros)
+
+    # Solo los campos que usa la plantilla
+    bajas = bajas.only(
+        'id', 'ficha', 'nombre', 'fecha_oficio', 'fecha_ultimo_dia_laboral', 'representante_patronal'
+    ).order_by('ficha', 'id')
+
+    total = bajas.count()
+    if total == 0:
+        raise LoteError('No hay bajas que coincidan', status=404)
+    if total > maximo:
+        raise LoteError(f'El lote excede el máximo de {maximo} oficios ({total})')
+    return bajas, total
+
+
+def nombre_zip_oficios():
+    return f"Oficios_Conformidad_{date.today():%Y%m%d}.zip"
+
+
+def _renderizar(contexto):
+    return renderizar_plantilla(contexto).getvalue()
+
+
+def zip_oficios(bajas):
+    """
+    Generador con el ZIP de oficios de conformidad de `bajas` (iterable de Baja).
+
+    Los contextos se arman en el hilo de la petición (es el único que toca la BD)
+    y el render se reparte en OFICIOS_LOTE_HILOS hilos. Solo hay unos cuantos
+    documentos en vuelo a la vez y cada uno se envía en cuanto se escribe, de modo
+    que la memoria no crece con el tamaño del lote.
+    """
+    hilos = settings.OFICIOS_LOTE_HILOS
+    flujo = _FlujoZip()
+    # Los .docx ya vienen comprimidos: se guardan sin volver a comprimir
+    with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='oficios') as executor:
+        with zipfile.ZipFile(flujo, 'w', compression=zipfile.ZIP_STORED) as archivo_zip:
+            en_vuelo = deque()
+            for baja in bajas:
+                nombre = f"Conformidad_{baja.ficha}_{baja.id}.docx"
+                en_vuelo.append((nombre, executor.submit(_renderizar, contexto_oficio(baja))))
+                if len(en_vuelo) >= hilos * 2:
+                    nombre, futuro = en_vuelo.popleft()
+                    archivo_zip.writestr(nombre, futuro.result())
+                    yield flujo.vaciar()
+
+            while en_vuelo:
+                nombre, futuro = en_vuelo.popleft()
+                archivo_zip.writestr(nombre, futuro.result())
+                yield flujo.vaciar()
+
+        # Directorio central al cerrar el ZipFile
+        yield flujo.vaciar()
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from investigaciones.services.archivos import marcar_uso, recortar_directorio
+
+from .plantillas import renderizar_plantilla, version_plantilla
+
+
+class ConversionError(Exception):
+    pass
+
+
+class PDFRenderer(BaseRenderer):
+    """
+    Habilita ?format=pdf en vistas DRF (el parámetro `format` lo reserva la negociación
+    de contenido). La vista regresa el PDF como FileResponse; este renderer solo se usa
+    para los errores, que se siguen mandando como JSON.
+    """
+    media_type = 'application/pdf'
+    format = 'pdf'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return JSONRenderer().render(data)
+
+
+_instancias = None
+_lock = threading.Lock()
+
+
+def _cola_instancias():
+    """
+    Cada instancia es un perfil de LibreOffice propio y persistente: dos soffice no
+    pueden compartir perfil, y crearlo es la parte lenta del arranque, así que tras
+    la primera conversión cada instancia queda "caliente". La cola limita cuántas
+    conversiones corren a la vez.
+    """
+    global _instancias
+    if _instancias is None:
+        with _lock:
+            if _instancias is None:
+                cola = queue.Queue()
+                for i in range(settings.OFICIOS_PDF_INSTANCIAS):
+                    cola.put(os.path.join(settings.OFICIOS_PDF_DIR, 'perfiles', str(i)))
+                _instancias = cola
+    return _instancias
+
+
+def convertir_a_pdf(contenido_docx):
+    """Convierte un .docx (bytes) a PDF (bytes) con LibreOffice headless."""
+    timeout = settings.OFICIOS_PDF_TIMEOUT_SEGUNDOS
+    cola = _cola_instancias()
+    try:
+        perfil = cola.get(timeout=timeout)
+    except queue.Empty:
+        raise ConversionError('Todas las instancias del convertidor están ocupadas')
+
+    try:
+        os.makedirs(perfil, exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix='oficio_') as tmp:
+            entrada = os.path.join(tmp, 'oficio.docx')
+            with open(entrada, 'wb') as f:
+                f.write(contenido_docx)
+            try:
+                subprocess.run(
+                    [
+                        settings.OFICIOS_PDF_CONVERTIDOR,
+                        f'-env:UserInstallation={Path(perfil).as_uri()}',
+                        '--headless', '--norestore', '--nologo',
+                        '--convert-to', 'pdf', '--outdir', tmp, entrada,
+                    ],
+                    check=True, capture_output=True, timeout=timeout,
+                )
+            except FileNotFoundError:
+                raise ConversionError('El convertidor de PDF no está instalado')
+            except subprocess.TimeoutExpired:
+                raise ConversionError('La conversión a PDF excedió el tiempo límite')
+            except subprocess.CalledProcessError as e:
+                raise ConversionError(f'Error del convertidor: {e.stderr.decode(errors="replace")[:200]}')
+
+            try:
+                with open(os.path.join(tmp, 'oficio.pdf'), 'rb') as f:
+                    return f.read()
+            except FileNotFoundError:
+                raise ConversionError('El convertidor no generó el PDF')
+    finally:
+        cola.put(perfil)
+
+
+def _clave(context, nombre):
+    """Mismo contexto + misma versión de plantilla = mismo PDF."""
+    base = json.dumps(context, sort_keys=True, default=str)
+    base += f':{nombre}:{version_plantilla(nombre)}'
+    return hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+
+def obtener_pdf(context, nombre='plantilla.docx'):
+    """
+    Ruta del PDF del oficio en caché. Si no existe se renderiza la plantilla y se
+    convierte; volver a descargar el mismo oficio no repite ninguno de los dos pasos.
+    """
+    directorio = os.path.join(settings.OFICIOS_PDF_DIR, 'cache')
+    clave = _clave(context, nombre)
+    destino = os.path.join(directorio, clave[:2], f'{clave}.pdf')
+    try:
+        marcar_uso(destino)
+        return destino
+    except FileNotFoundError:
+        pass
+
+    contenido = convertir_a_pdf(renderizar_plantilla(context, nombre).getvalue())
+
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    tmp = f"{destino}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(contenido)
+    os.replace(tmp, destino)
+    recortar_directorio(directorio, settings.OFICIOS_PDF_MAX_BYTES, conservar=destino)
+    return destino
@@ -0,0 +1,97 @@
+import hashlib
+import io
+import os
+import threading
+from pathlib import Path
+
+from docxtpl import DocxTemplate
+from jinja2 import Environment
+
+# Ruta absoluta: no depende del directorio desde el que se arranque el servidor
+PLANTILLAS_DIR = Path(__file__).resolve().parent.parent / 'Plantilla'
+
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+
+class _EntornoCacheado(Environment):
+    """Entorno Jinja que compila cada fuente XML una sola vez."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._compiladas = {}
+        self._lock_compiladas = threading.Lock()
+
+    def from_string(self, source, globals=None, template_class=None):
+        clave = hashlib.sha1(source.encode('utf-8')).digest()
+        template = self._compiladas.get(clave)
+        if template is None:
+            template = super().from_string(source, globals, template_class)
+            with self._lock_compiladas:
+                self._compiladas[clave] = template
+        return template
+
+
+class _Entrada:
+    """Plantilla cargada en memoria: bytes del .docx, XML preprocesado y Jinja compilado."""
+
+    def __init__(self, path, mtime):
+        self.path = path
+        self.mtime = mtime
+        with open(path, 'rb') as f:
+            self.contenido = f.read()
+        self.entorno = _EntornoCacheado()
+        self.xml_preprocesado = {}
+
+
+class _PlantillaCacheada(DocxTemplate):
+    """
+    DocxTemplate que se abre desde los bytes en memoria (cada render trabaja sobre su
+    propia copia del documento) y reutiliza el XML ya preprocesado por docxtpl.
+    """
+
+    def __init__(self, entrada):
+        super().__init__(io.BytesIO(entrada.contenido))
+        self._entrada = entrada
+
+    def patch_xml(self, src_xml):
+        clave = hashlib.sha1(src_xml.encode('utf-8')).digest()
+        xml = self._entrada.xml_preprocesado.get(clave)
+        if xml is None:
+            xml = super().patch_xml(src_xml)
+            self._entrada.xml_preprocesado[clave] = xml
+        return xml
+
+
+_registro = {}
+_lock = threading.Lock()
+
+
+def _obtener_entrada(nombre):
+    path = PLANTILLAS_DIR / nombre
+    mtime = os.stat(path).st_mtime_ns
+    entrada = _registro.get(nombre)
+    if entrada is None or entrada.mtime != mtime:
+        # Primera vez o la plantilla se reemplazó en disco: se vuelve a cargar
+        with _lock:
+            entrada = _registro.get(nombre)
+            if entrada is None or entrada.mtime != mtime:
+                entrada = _Entrada(path, mtime)
+                _registro[nombre] = entrada
+    return entrada
+
+
+def version_plantilla(nombre='plantilla.docx'):
+    """Cambia cuando la plantilla se reemplaza en disco (sirve para invalidar cachés derivadas)."""
+    return _obtener_entrada(nombre).mtime
+
+
+def renderizar_plantilla(context, nombre='plantilla.docx'):
+    """Renderiza la plantilla con `context` y regresa un BytesIO posicionado al inicio."""
+    entrada = _obtener_entrada(nombre)
+    doc = _PlantillaCacheada(entrada)
+    doc.render(context, jinja_env=entrada.entorno)
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer
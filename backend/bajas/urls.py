@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BajaViewSet, DocumentoBajaViewSet, generar_oficio_conformidad, previsualizar_oficio
+from .views import BajaViewSet, DocumentoBajaViewSet, estadisticas_bajas_view, generar_oficio_conformidad, generar_oficios_lote, previsualizar_oficio
 
 router = DefaultRouter()
 router.register(r'bajas', BajaViewSet)
@@ -9,5 +9,7 @@ router.register(r'documentos-bajas', DocumentoBajaViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('bajas/<int:baja_id>/generar-oficio/', generar_oficio_conformidad, name='generar-oficio'),
+    path('estadisticas/', estadisticas_bajas_view, name='estadisticas-bajas'),
+    path('generar-oficios-lote/', generar_oficios_lote, name='generar-oficios-lote'),
     path('previsualizar-oficio/', previsualizar_oficio, name='previsualizar-oficio'),
 ]
@@ -4,25 +4,36 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Baja
 from .serializers import BajaSerializer
+from .filters import BusquedaBajaFilter
+from .pagination import BajaPagination
+from .permissions import EsSupervisorOAdmin
 import datetime
-from django.http import HttpResponse
+from django.http import FileResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from rest_framework.decorators import api_view
-from docxtpl import DocxTemplate
-import io
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.settings import api_settings
+from .services.plantillas import renderizar_plantilla, DOCX_CONTENT_TYPE
+from .services.oficios import (
+    LoteError, contexto_oficio, formatear_fecha, nombre_zip_oficios, reorder_nombre,
+    seleccionar_bajas_lote, zip_oficios
+)
+from .services.pdf import ConversionError, PDFRenderer, obtener_pdf
+from .services.estadisticas import DIMENSIONES, FILTROS, estadisticas_bajas
+from .services.importacion import ImportacionError, importar_bajas, leer_filas
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from datetime import timedelta
 
-import locale
-
-locale.setlocale(locale.LC_TIME, 'Spanish_Spain')
-
 class BajaViewSet(viewsets.ModelViewSet):
-    queryset = Baja.objects.all().order_by('-created_at')
+    queryset = Baja.objects.select_related('created_by').order_by('-created_at')
     serializer_class = BajaSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['ficha', 'nombre', 'nivel', 'region', 'nombres', 'apellido_paterno', 'apellido_materno'] 
-    filterset_fields = ['status', 'region', 'tramite']
+    filter_backends = [DjangoFilterBackend, BusquedaBajaFilter, filters.OrderingFilter]
+    filterset_fields = ['status', 'region', 'tramite', 'estatus_baja']
+    ordering_fields = [
+        'ficha', 'nombre', 'nivel', 'nuevo_nivel', 'region', 'tramite',
+        'status', 'sap', 'fecha_ejecucion', 'created_at',
+    ]
+    pagination_class = BajaPagination
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -38,9 +49,29 @@ class BajaViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def importar(self, request):
+        """
+        Alta masiva desde CSV/XLSX (campo 'archivo'; encabezados = campos de Baja).
+        Cada ficha se completa con el directorio de RH. ?validar=true solo valida sin guardar.
+        """
+        archivo = request.FILES.get('archivo')
+        if not archivo:
+            return Response({'error': 'Se requiere el archivo'}, status=400)
+        validar_solo = request.query_params.get('validar') == 'true'
+        try:
+            resultado = importar_bajas(
+                leer_filas(archivo.file, archivo.name), user=request.user, validar_solo=validar_solo
+            )
+        except ImportacionError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(resultado, status=200 if validar_solo else 201)
+
 from .models import DocumentoBaja
 from .serializers import DocumentoBajaSerializer
-from rest_framework.parsers import MultiPartParser, FormParser
+from investigaciones.services.archivos import servir_archivo_protegido
+from investigaciones.services.miniaturas import responder_miniatura
+from investigaciones.services.cargas import CargaError, obtener_carga, archivo_de_carga, descartar_carga
 
 class DocumentoBajaViewSet(viewsets.ModelViewSet):
     queryset = DocumentoBaja.objects.all().order_by('-uploaded_at') # Order by most recent
@@ -59,50 +90,110 @@ class DocumentoBajaViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(baja_id=baja_id)
         return queryset
 
+    @action(detail=True, methods=['get'])
+    def miniatura(self, request, pk=None):
+        """Miniatura de la primera página (?ancho=160|320|640&formato=webp|png)."""
+        documento = self.get_object()
+        if not documento.archivo:
+            return Response(status=404)
+        return responder_miniatura(request, documento.archivo.path)
+
+    @action(detail=False, methods=['post'], url_path='desde-carga', parser_classes=[JSONParser, FormParser])
+    def desde_carga(self, request):
+        """
+        Paso final de una carga por fragmentos (/api/investigaciones/cargas/).
+        Body: carga_id, baja, tipo, descripcion (opcional)
+        """
+        try:
+            carga = obtener_carga(request.data.get('carga_id'), request.user)
+            with archivo_de_carga(carga) as archivo:
+                serializer = self.get_serializer(data={
+                    'baja': request.data.get('baja'),
+                    'tipo': request.data.get('tipo'),
+                    'descripcion': request.data.get('descripcion', ''),
+                    'archivo': archivo,
+                })
+                serializer.is_valid(raise_exception=True)
+                self.perform_create(serializer)
+        except CargaError as e:
+            return Response({'error': e.mensaje}, status=e.status)
+
+        descartar_carga(carga)
+        return Response(serializer.data, status=201)
+
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
-        from django.http import FileResponse
         documento = self.get_object()
         if documento.archivo:
-            return FileResponse(documento.archivo.open(), as_attachment=True, filename=documento.archivo.name.split('/')[-1])
+            nombre = documento.get_nombre_archivo()
+            return servir_archivo_protegido(
+                request, documento.archivo.path, filename=nombre, as_attachment=True,
+                descripcion_log=f"Descarga de documento de baja: {nombre}"
+            )
         return Response(status=404)
 
 
 @api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def estadisticas_bajas_view(request):
+    """
+    Ahorro y liquidación neta agregados en el servidor.
+    ?agrupar=region,tramite,status,estatus_baja,mes (por defecto region)
+    Filtros opcionales: region, tramite, status, estatus_baja, desde, hasta (YYYY-MM-DD, sobre created_at)
+    """
+    params = request.query_params
+    agrupar = [d.strip() for d in params.get('agrupar', 'region').split(',') if d.strip()]
+    invalidas = [d for d in agrupar if d not in DIMENSIONES]
+    if invalidas or not agrupar:
+        return Response(
+            {'error': f"agrupar admite: {', '.join(DIMENSIONES)}"}, status=400
+        )
+
+    fechas = {}
+    for campo in ('desde', 'hasta'):
+        valor = params.get(campo)
+        if valor:
+            try:
+                fechas[campo] = datetime.datetime.strptime(valor, '%Y-%m-%d').date()
+            except ValueError:
+                return Response({'error': f'{campo} debe tener formato YYYY-MM-DD'}, status=400)
+
+    filtros = {campo: params[campo] for campo in FILTROS if params.get(campo)}
+    return Response(estadisticas_bajas(list(dict.fromkeys(agrupar)), filtros, **fechas))
+
+
+# ?format=pdf devuelve el oficio convertido a PDF
+OFICIO_RENDERERS = list(api_settings.DEFAULT_RENDERER_CLASSES) + [PDFRenderer]
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated, EsSupervisorOAdmin])
+@renderer_classes(OFICIO_RENDERERS)
 def generar_oficio_conformidad(request, baja_id):
     baja = get_object_or_404(Baja, id=baja_id)
-    
-    # Construir contexto desde el objeto
-    context = {
-        'FECHA_OFICIO': baja.fecha_oficio.strftime('%d de %B del %Y') if baja.fecha_oficio else "__________",
-        'FICHA': baja.ficha,
-        'NOMBRES': reorder_nombre(baja.nombre),
-        'FECHA_ULT_DIA': baja.fecha_ultimo_dia_laboral.strftime('%d de %B del %Y') if baja.fecha_ultimo_dia_laboral else "__________",
-        #agrear 1 dia a la fecha efecto
-        'FECHA_EFECTO': (baja.fecha_ultimo_dia_laboral + timedelta(days=1)).strftime('%d de %B del %Y') if baja.fecha_ultimo_dia_laboral else "__________",
-        'REPRESENTANTE_PATRONAL': baja.representante_patronal.upper() if baja.representante_patronal else "__________",
-    }
-    
-    return generar_doc_response(context, f"Conformidad_{baja.ficha}.docx")
+    return generar_doc_response(request, contexto_oficio(baja), f"Conformidad_{baja.ficha}.docx")
 
 
-def reorder_nombre(nombre_str: str) -> str:
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated, EsSupervisorOAdmin])
+def generar_oficios_lote(request):
     """
-    La BD PEMEX almacena el nombre como 'PATERNO MATERNO NOMBRE(S)'.
-    Esta función lo reordena a 'NOMBRE(S) PATERNO MATERNO'.
-    Se asume que los primeros 2 tokens son apellidos y el resto es el nombre.
+    Genera los oficios de conformidad de varias bajas en un solo ZIP.
+    Body: {"ids": [1, 2, ...]} o filtros {"status", "region", "tramite"}.
     """
-    if not nombre_str:
-        return "__________"
-    partes = nombre_str.strip().split()
-    if len(partes) <= 2:
-        return nombre_str.upper()  # No se puede reordenar con seguridad
-    apellido_paterno = partes[0]
-    apellido_materno = partes[1]
-    nombres_propios  = ' '.join(partes[2:])
-    return f"{nombres_propios} {apellido_paterno} {apellido_materno}".upper()
+    try:
+        bajas, _ = seleccionar_bajas_lote(request.data)
+    except LoteError as e:
+        return Response({'error': e.mensaje}, status=e.status)
+
+    response = StreamingHttpResponse(zip_oficios(bajas.iterator(chunk_size=100)), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{nombre_zip_oficios()}"'
+    return response
+
 
 @api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated, EsSupervisorOAdmin])
+@renderer_classes(OFICIO_RENDERERS)
 def previsualizar_oficio(request):
     """
     Genera el oficio usando datos recibidos por POST sin necesidad de guardar en BD.
@@ -115,7 +206,7 @@ def previsualizar_oficio(request):
         if not date_str: return "__________"
         try:
             dt = datetime.datetime.strptime(date_str, '%Y-%m-%d')
-            return dt.strftime('%d de %B del %Y')
+            return formatear_fecha(dt)
         except:
              return date_str # Fallback
 
@@ -124,7 +215,7 @@ def previsualizar_oficio(request):
         try:
             dt = datetime.datetime.strptime(date_str, '%Y-%m-%d')
             dt = dt + timedelta(days=1)
-            return dt.strftime('%d de %B del %Y')
+            return formatear_fecha(dt)
         except:
              return "__________"
 
@@ -140,22 +231,25 @@ def previsualizar_oficio(request):
     }
     
     filename = f"Previsualizacion_Conformidad_{data.get('ficha','sin_ficha')}.docx"
-    return generar_doc_response(context, filename)
+    return generar_doc_response(request, context, filename)
 
-def generar_doc_response(context, filename):
-    template_path = "./bajas/Plantilla/plantilla.docx"
-    doc = DocxTemplate(template_path)
-    
-    doc.render(context)
-    
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    
-    response = HttpResponse(
-        buffer.getvalue(),
-        content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+def generar_doc_response(request, context, filename):
+    if request.query_params.get('format') == 'pdf':
+        try:
+            path = obtener_pdf(context)
+        except ConversionError as e:
+            return Response({'error': str(e)}, status=503)
+        return servir_archivo_protegido(
+            request, path, content_type='application/pdf',
+            filename=filename.rsplit('.', 1)[0] + '.pdf', as_attachment=True, offload=False
+        )
+
+    buffer = renderizar_plantilla(context)
+
+    # FileResponse transmite directo desde el buffer, sin copiarlo con getvalue()
+    return FileResponse(
+        buffer,
+        as_attachment=True,
+        filename=filename,
+        content_type=DOCX_CONTENT_TYPE
     )
-    response['Content-Disposition'] = f'attachment; filename={filename}'
-    
-    return response
\ No newline at end of file
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from investigaciones.services.catalogos_rh import actualizar_catalogos_rh
+from investigaciones.services.pemex import PemexNoDisponible
+
+
+class Command(BaseCommand):
+    help = 'Copia de RH (BD pemex) a la tabla CatalogoRH los centros de trabajo, centros CODUNI y áreas.'
+
+    def handle(self, *args, **options):
+        try:
+            conteo = actualizar_catalogos_rh()
+        except PemexNoDisponible as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f"{tipo}: {total}" for tipo, total in conteo.items())
+        ))
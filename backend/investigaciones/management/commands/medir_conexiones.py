@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def _ms(inicio):
+    return (time.perf_counter() - inicio) * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara, por alias de BD, una consulta trivial con conexión nueva (como sin CONN_MAX_AGE) '
+        'contra la misma consulta sobre una conexión reutilizada (CONN_MAX_AGE + CONN_HEALTH_CHECKS).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alias', nargs='*', default=['default', 'pemex'])
+        parser.add_argument('--repeticiones', type=int, default=20)
+
+    def _consulta(self, conexion):
+        with conexion.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
+    def handle(self, *args, **options):
+        repeticiones = max(1, options['repeticiones'])
+        for alias in options['alias']:
+            if alias not in connections:
+                raise CommandError(f'Alias desconocido: {alias}')
+            conexion = connections[alias]
+
+            nuevas = []
+            for _ in range(repeticiones):
+                conexion.close()
+                inicio = time.perf_counter()
+                self._consulta(conexion)
+                nuevas.append(_ms(inicio))
+
+            reutilizadas = []
+            for _ in range(repeticiones):
+                # Lo que hace Django al inicio/fin de cada petición con conexiones persistentes
+                conexion.close_if_unusable_or_obsolete()
+                inicio = time.perf_counter()
+                self._consulta(conexion)
+                reutilizadas.append(_ms(inicio))
+            conexion.close()
+
+            nueva = sorted(nuevas)[len(nuevas) // 2]
+            reutilizada = sorted(reutilizadas)[len(reutilizadas) // 2]
+            self.stdout.write(
+                f"{alias}: conexión nueva {nueva:.1f} ms, reutilizada {reutilizada:.1f} ms "
+                f"(mediana de {repeticiones}; CONN_MAX_AGE={conexion.settings_dict['CONN_MAX_AGE']}, "
+                f"ahorro por petición ~{nueva - reutilizada:.1f} ms)"
+            )
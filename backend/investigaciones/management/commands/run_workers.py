@@ -0,0 +1,104 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from investigaciones.services.almacenamiento import limpiar_blobs_huerfanos
+from investigaciones.services.catalogos_rh import actualizar_catalogos_rh, catalogos_rh_vencidos
+from investigaciones.services.pemex import PemexNoDisponible
+from investigaciones.services.trabajos import (
+    ejecutar, limpiar_expirados, nombre_worker, reencolar_abandonados, tomar_siguiente
+)
+
+# Cada cuántos ciclos de sondeo se revisan abandonados, expirados y catálogos de RH
+CICLOS_MANTENIMIENTO = 30
+# Recorrer blobs/ completo es caro: los huérfanos se buscan como máximo cada hora
+LIMPIEZA_BLOBS_SEGUNDOS = 3600
+
+
+def _procesar(trabajo):
+    try:
+        ejecutar(trabajo)
+    finally:
+        # Cada hilo abre su propia conexión; se cierra al terminar el trabajo
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Procesa la cola de ExportJob (exportaciones y lotes de oficios) sin broker externo: '
+        'sondea la BD y reserva trabajos con select_for_update(skip_locked=True).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrencia', type=int, default=settings.EXPORTACIONES_CONCURRENTES,
+            help='Trabajos simultáneos en este proceso (el tope global es EXPORTACIONES_CONCURRENTES)'
+        )
+        parser.add_argument('--intervalo', type=float, default=2, help='Segundos entre sondeos de la cola')
+        parser.add_argument('--una-vez', action='store_true', help='Procesa lo pendiente y termina')
+
+    def _actualizar_catalogos(self):
+        """Copia periódica de los catálogos de RH (CATALOGOS_RH_ACTUALIZAR_HORAS)."""
+        if not catalogos_rh_vencidos():
+            return
+        try:
+            conteo = actualizar_catalogos_rh()
+        except PemexNoDisponible as e:
+            self.stderr.write(f"No se actualizaron los catálogos de RH: {e}")
+            return
+        self.stdout.write(f"Catálogos de RH actualizados ({sum(conteo.values())} registros)")
+
+    def _limpiar_blobs(self):
+        if time.monotonic() - self._ultima_limpieza < LIMPIEZA_BLOBS_SEGUNDOS:
+            return
+        self._ultima_limpieza = time.monotonic()
+        borrados = limpiar_blobs_huerfanos()
+        if borrados:
+            self.stdout.write(f"{borrados} archivos huérfanos borrados de blobs/")
+
+    def handle(self, *args, **options):
+        concurrencia = max(1, options['concurrencia'])
+        worker = nombre_worker()
+        en_curso = set()
+        ciclo = 0
+        self._ultima_limpieza = float('-inf')
+        self.stdout.write(f"Worker {worker} ({concurrencia} en paralelo)")
+        # Recién desplegado CatalogoRH está vacío: se copia antes de tomar trabajos
+        self._actualizar_catalogos()
+
+        with ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix='run_workers') as executor:
+            try:
+                while True:
+                    close_old_connections()
+                    if ciclo % CICLOS_MANTENIMIENTO == 0:
+                        reencolados, fallidos = reencolar_abandonados()
+                        borrados = limpiar_expirados()
+                        if reencolados or fallidos or borrados:
+                            self.stdout.write(
+                                f"{reencolados} reencolados, {fallidos} fallidos, {borrados} expirados borrados"
+                            )
+                        if ciclo:
+                            self._actualizar_catalogos()
+                        self._limpiar_blobs()
+                    ciclo += 1
+
+                    en_curso = {f for f in en_curso if not f.done()}
+                    tomado = False
+                    while len(en_curso) < concurrencia:
+                        trabajo = tomar_siguiente(worker)
+                        if trabajo is None:
+                            break
+                        tomado = True
+                        self.stdout.write(f"Trabajo {trabajo.pk} ({trabajo.tipo}) iniciado")
+                        en_curso.add(executor.submit(_procesar, trabajo))
+
+                    if options['una_vez'] and not tomado and not en_curso:
+                        break
+                    time.sleep(options['intervalo'])
+            except KeyboardInterrupt:
+                self.stdout.write('Deteniendo: se esperan los trabajos en curso...')
+
+        self.stdout.write(self.style.SUCCESS('Worker detenido'))
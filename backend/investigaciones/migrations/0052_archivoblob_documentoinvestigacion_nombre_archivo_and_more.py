@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investigaciones', '0051_alter_documentoinvestigacion_tipo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('ruta', models.CharField(max_length=255)),
+                ('tamano', models.BigIntegerField()),
+                ('referencias', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='documentoinvestigacion',
+            name='nombre_archivo',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='documentoinvestigacion',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='documentos_investigacion', to='investigaciones.archivoblob'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investigaciones', '0054_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogoRH',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('centro_trabajo', 'Centro de trabajo (tablero)'), ('centro_coduni', 'Centro (CODUNI)'), ('area', 'Área / departamento (CODUNI)')], max_length=20)),
+                ('centro', models.CharField(blank=True, default='', max_length=150)),
+                ('valor', models.CharField(max_length=150)),
+                ('actualizado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tipo', 'centro'], name='catalogorh_tipo_centro_idx')],
+            },
+        ),
+    ]
@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
 from datetime import datetime
 import os
+import uuid
 
 class UppercaseMixin:
     def save(self, *args, **kwargs):
@@ -377,27 +379,143 @@ class CatalogoInvestigador(UppercaseMixin, models.Model):
     def __str__(self):
         return f"{self.ficha} - {self.nombre}"
 
-def generar_ruta_archivo(instance, filename):
-    ext = filename.split('.')[-1]
-
+def _reporte_safe(instance):
     if instance.investigacion and instance.investigacion.numero_reporte:
-        reporte_safe = instance.investigacion.numero_reporte.replace('/', '-')
-    else:
-        reporte_safe = "SIN_REPORTE"
+        return instance.investigacion.numero_reporte.replace('/', '-')
+    return "SIN_REPORTE"
+
+def generar_nombre_legible(instance, filename):
+    """Nombre que ve el usuario; el archivo físico se guarda por contenido (ArchivoBlob)."""
+    ext = filename.split('.')[-1]
+    reporte_safe = _reporte_safe(instance)
 
     # Lógica especial para NotificacionConclusion: Nombre exacto sin consecutivo
     if instance.tipo == 'NotificacionConclusion':
-        nuevo_nombre = f"{reporte_safe}_NotificacionConclusion.{ext}"
-    else:
-        cantidad = DocumentoInvestigacion.objects.filter(
-            investigacion=instance.investigacion,
-            tipo=instance.tipo
-        ).count() + 1
-        
-        tipo_safe = instance.tipo.replace(' ', '_')
-        nuevo_nombre = f"{reporte_safe}_{tipo_safe}_{cantidad}.{ext}"
-    
-    return f"investigaciones/documentos/{reporte_safe}/{nuevo_nombre}"
+        return f"{reporte_safe}_NotificacionConclusion.{ext}"
+
+    # Sello de tiempo en lugar del consecutivo: evita el COUNT por subida
+    tipo_safe = instance.tipo.replace(' ', '_')
+    sello = timezone.now().strftime('%Y%m%d%H%M%S')
+    return f"{reporte_safe}_{tipo_safe}_{sello}.{ext}"
+
+def generar_ruta_archivo(instance, filename):
+    # Referenciada por migraciones anteriores; los archivos nuevos van a blobs/
+    return f"investigaciones/documentos/{_reporte_safe(instance)}/{generar_nombre_legible(instance, filename)}"
+
+
+class ArchivoBlob(models.Model):
+    """
+    Contenido único de un archivo subido, identificado por su SHA-256.
+    Varios documentos (de investigaciones o de bajas) pueden apuntar al mismo blob;
+    `referencias` lleva la cuenta para borrar el archivo cuando ya nadie lo usa.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    ruta = models.CharField(max_length=255)
+    tamano = models.BigIntegerField()
+    referencias = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256} ({self.referencias})"
+
+
+class CargaParcial(models.Model):
+    """
+    Sesión de carga por fragmentos (init / append / commit) para evidencias grandes.
+    Los bytes recibidos se van escribiendo en un temporal en disco; `offset` indica
+    cuántos llevan guardados para que el cliente pueda reanudar tras un corte.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='cargas_parciales')
+    nombre = models.CharField(max_length=255)
+    tamano_total = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.nombre} ({self.offset}/{self.tamano_total})"
+
+
+class CatalogoRH(models.Model):
+    """
+    Copia local de los catálogos del directorio de RH (BD 'pemex') que usan los
+    formularios, para no consultar RH al abrirlos. Se reemplaza completa con
+    `manage.py actualizar_catalogos_rh` (y periódicamente desde run_workers).
+    """
+    TIPO_CHOICES = [
+        ('centro_trabajo', 'Centro de trabajo (tablero)'),
+        ('centro_coduni', 'Centro (CODUNI)'),
+        ('area', 'Área / departamento (CODUNI)'),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    centro = models.CharField(max_length=150, blank=True, default='')  # solo para áreas
+    valor = models.CharField(max_length=150)
+    actualizado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['tipo', 'centro'], name='catalogorh_tipo_centro_idx')]
+
+    def __str__(self):
+        return f"{self.tipo}: {self.valor}"
+
+
+class ExportJob(models.Model):
+    """
+    Exportación o lote de documentos que se procesa fuera de la petición con
+    `manage.py run_workers`. `updated_at` funciona como latido: se actualiza con
+    cada avance y un trabajo en proceso que deja de avanzar se reencola.
+    El archivo resultante se conserva hasta `expira_en`.
+    """
+    TIPO_CHOICES = [
+        ('investigaciones', 'Exportación de investigaciones'),
+        ('oficios', 'Lote de oficios de conformidad'),
+    ]
+    ESTADO_CHOICES = [
+        ('PENDIENTE', 'Pendiente'),
+        ('EN_PROCESO', 'En proceso'),
+        ('TERMINADO', 'Terminado'),
+        ('ERROR', 'Error'),
+        ('CANCELADO', 'Cancelado'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='export_jobs')
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    parametros = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=12, choices=ESTADO_CHOICES, default='PENDIENTE')
+    procesados = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    archivo = models.CharField(max_length=255, blank=True)
+    nombre_archivo = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    iniciado_en = models.DateTimeField(null=True, blank=True)
+    terminado_en = models.DateTimeField(null=True, blank=True)
+    expira_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['estado', 'created_at'], name='exportjob_estado_idx'),
+            models.Index(fields=['user', 'estado'], name='exportjob_user_estado_idx'),
+        ]
+
+    @property
+    def progreso(self):
+        """Porcentaje de avance o None mientras no se conoce el total."""
+        if self.estado == 'TERMINADO':
+            return 100
+        if not self.total:
+            return None
+        return min(100, self.procesados * 100 // self.total)
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} ({self.estado})"
 
 
 class DocumentoInvestigacion(models.Model):
@@ -445,6 +563,8 @@ class DocumentoInvestigacion(models.Model):
     tipo = models.CharField(max_length=50, choices=TIPO_DOC_CHOICES)
     
     archivo = models.FileField(upload_to=generar_ruta_archivo, max_length=255)
+    blob = models.ForeignKey(ArchivoBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='documentos_investigacion')
+    nombre_archivo = models.CharField(max_length=255, blank=True)
     
     descripcion = models.CharField(max_length=255, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
@@ -452,8 +572,37 @@ class DocumentoInvestigacion(models.Model):
     def __str__(self):
         return f"{self.tipo} - {self.investigacion.numero_reporte}"
 
+    def get_nombre_archivo(self):
+        return self.nombre_archivo or (self.archivo.name.split('/')[-1] if self.archivo else '')
+
+    def save(self, *args, **kwargs):
+        # Archivo nuevo: se guarda por contenido (sin consultas de conteo y sin duplicados)
+        if self.archivo and not self.archivo._committed:
+            from .services.almacenamiento import descartar_huerfano, guardar_contenido, liberar_contenido
+            # Al reemplazar el archivo, el blob anterior pierde esta referencia
+            anterior = type(self).objects.filter(pk=self.pk).values_list('blob_id', flat=True).first() if self.pk else None
+            nuevo = None
+            try:
+                with transaction.atomic():
+                    self.nombre_archivo = generar_nombre_legible(self, self.archivo.name)
+                    nuevo = guardar_contenido(self.archivo, self.archivo.name)
+                    self.blob = nuevo
+                    self.archivo = nuevo.ruta
+                    super().save(*args, **kwargs)
+            except Exception:
+                if nuevo is not None:
+                    # Alta revertida: que el archivo recién movido a blobs/ no quede suelto
+                    descartar_huerfano(nuevo.ruta)
+                raise
+            # Aunque sea el mismo contenido, guardar_contenido sumó una referencia nueva
+            if anterior:
+                transaction.on_commit(lambda: liberar_contenido(anterior))
+            return
+        super().save(*args, **kwargs)
+
     def delete(self, *args, **kwargs):
-        if self.archivo:
+        # Los archivos en blobs/ se liberan por conteo de referencias (signals.py)
+        if self.archivo and not self.blob_id:
             if os.path.isfile(self.archivo.path):
                 os.remove(self.archivo.path)
         super().delete(*args, **kwargs)
\ No newline at end of file
@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from login_register.tokens import es_admin
+
 class IsAdminOrReadOnly(permissions.BasePermission):
     """
     Permiso personalizado para permitir a los Admin ver todos los registros
@@ -8,7 +10,7 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
-        if request.user.groups.filter(name='Admin').exists() or request.user.is_superuser:
+        if es_admin(request.user, 'Admin'):
             return True
         
         if view.action == 'list':
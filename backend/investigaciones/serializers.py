@@ -2,7 +2,7 @@ from rest_framework import serializers
 from django.utils import timezone
 from datetime import timedelta
 from django.contrib.auth.models import User
-from .models import Investigacion, Contacto, Investigador, Involucrado, Testigo, Reportante, DocumentoInvestigacion, InvestigacionHistorico, InvestigacionSirhn
+from .models import ExportJob, Investigacion, Contacto, Investigador, Involucrado, Testigo, Reportante, DocumentoInvestigacion, InvestigacionHistorico, InvestigacionSirhn
 from .services.completitud import calcular_completitud
 
 
@@ -22,7 +22,7 @@ class DocumentoInvestigacionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'uploaded_at']
 
     def get_nombre_archivo(self, obj):
-        return obj.archivo.name.split('/')[-1] if obj.archivo else ''
+        return obj.get_nombre_archivo()
 
 
 
@@ -550,3 +550,18 @@ class EstadisticasSerializer(serializers.Serializer):
     por_direccion = serializers.DictField(child=serializers.IntegerField())
     por_gerencia = serializers.DictField(child=serializers.IntegerField())
 
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    progreso = serializers.IntegerField(read_only=True)
+    descargable = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id', 'tipo', 'parametros', 'estado', 'procesados', 'total', 'progreso',
+            'nombre_archivo', 'error', 'created_at', 'iniciado_en', 'terminado_en',
+            'expira_en', 'descargable',
+        ]
+
+    def get_descargable(self, obj):
+        return obj.estado == 'TERMINADO'
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, ProtectedError
+
+# Los archivos se guardan una sola vez por contenido: MEDIA_ROOT/blobs/ab/<sha256>.<ext>
+BLOBS_DIR = 'blobs'
+CHUNK_SIZE = 64 * 1024
+
+
+def ruta_blob(digest, ext):
+    ext = f".{ext.lower()}" if ext else ''
+    return f"{BLOBS_DIR}/{digest[:2]}/{digest}{ext}"
+
+
+def _escribir_temporal(archivo):
+    """
+    Copia el archivo subido a un temporal dentro de MEDIA_ROOT/blobs calculando
+    el SHA-256 por bloques, sin cargarlo completo en memoria.
+    Regresa (ruta_temporal, digest, tamaño).
+    """
+    destino = os.path.join(settings.MEDIA_ROOT, BLOBS_DIR)
+    os.makedirs(destino, exist_ok=True)
+
+    hasher = hashlib.sha256()
+    tamano = 0
+    fd, tmp_path = tempfile.mkstemp(dir=destino, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            if hasattr(archivo, 'chunks'):
+                bloques = archivo.chunks(CHUNK_SIZE)
+            else:
+                bloques = iter(lambda: archivo.read(CHUNK_SIZE), b'')
+            for bloque in bloques:
+                hasher.update(bloque)
+                tmp.write(bloque)
+                tamano += len(bloque)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, hasher.hexdigest(), tamano
+
+
+def guardar_contenido(archivo, nombre):
+    """
+    Guarda el contenido de `archivo` en el almacén direccionado por contenido y
+    suma una referencia al blob. Si el mismo contenido ya existe no se vuelve a escribir.
+    """
+    from investigaciones.models import ArchivoBlob
+
+    ext = nombre.rsplit('.', 1)[-1] if '.' in nombre else ''
+    tmp_path, digest, tamano = _escribir_temporal(archivo)
+
+    try:
+        # El bloqueo de la fila serializa esta alta con liberar_contenido(),
+        # así el archivo no puede borrarse entre la comprobación y el incremento.
+        with transaction.atomic():
+            blob, creado = ArchivoBlob.objects.select_for_update().get_or_create(
+                sha256=digest,
+                defaults={'ruta': ruta_blob(digest, ext), 'tamano': tamano}
+            )
+            final_path = os.path.join(settings.MEDIA_ROOT, blob.ruta)
+            # Con fila nueva, un archivo ya presente es de un alta revertida: se reemplaza
+            if creado or not os.path.exists(final_path):
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+            else:
+                os.remove(tmp_path)
+
+            ArchivoBlob.objects.filter(pk=blob.pk).update(referencias=F('referencias') + 1)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return blob
+
+
+def descartar_huerfano(ruta):
+    """
+    Tras un alta revertida: borra el archivo de `ruta` si ningún ArchivoBlob lo usa.
+    Dentro de una transacción externa todavía no se sabe si el alta se confirmará;
+    esos casos los recoge limpiar_blobs_huerfanos().
+    """
+    from investigaciones.models import ArchivoBlob
+
+    if transaction.get_connection().in_atomic_block:
+        return
+    with transaction.atomic():
+        if ArchivoBlob.objects.select_for_update().filter(ruta=ruta).exists():
+            return
+        path = os.path.join(settings.MEDIA_ROOT, ruta)
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+def limpiar_blobs_huerfanos(horas=None):
+    """
+    Borra de blobs/ los temporales y los archivos sin ArchivoBlob con más de `horas`
+    (ALMACEN_HUERFANOS_HORAS): restos de altas cuya transacción se revirtió.
+    Regresa cuántos archivos se borraron.
+    """
+    from investigaciones.models import ArchivoBlob
+
+    horas = settings.ALMACEN_HUERFANOS_HORAS if horas is None else horas
+    limite = time.time() - horas * 3600
+    raiz = os.path.join(settings.MEDIA_ROOT, BLOBS_DIR)
+    registradas = set(ArchivoBlob.objects.values_list('ruta', flat=True))
+
+    borrados = 0
+    for carpeta, _, archivos in os.walk(raiz):
+        for nombre in archivos:
+            path = os.path.join(carpeta, nombre)
+            try:
+                if os.path.getmtime(path) > limite:
+                    continue
+            except OSError:
+                continue
+            if nombre.endswith('.tmp'):
+                os.remove(path)
+                borrados += 1
+                continue
+            ruta = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+            if ruta not in registradas:
+                descartar_huerfano(ruta)
+                borrados += not os.path.exists(path)
+    return borrados
+
+
+def liberar_contenido(blob_id):
+    """Resta una referencia; al llegar a cero elimina el blob y su archivo."""
+    from investigaciones.models import ArchivoBlob
+
+    if not blob_id:
+        return
+
+    with transaction.atomic():
+        blob = ArchivoBlob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None:
+            return
+
+        if blob.referencias > 1:
+            ArchivoBlob.objects.filter(pk=blob.pk).update(referencias=F('referencias') - 1)
+            return
+
+        path = os.path.join(settings.MEDIA_ROOT, blob.ruta)
+        try:
+            blob.delete()
+        except ProtectedError:
+            # El conteo se desfasó y aún hay documentos apuntando al blob: se conserva
+            return
+        if os.path.isfile(path):
+            os.remove(path)
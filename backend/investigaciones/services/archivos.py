@@ -0,0 +1,216 @@
+import mimetypes
+import os
+import re
+import time
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from auditoria.models import ActivityLog
+
+# Tamaño de bloque al leer archivos para respuestas parciales (Range)
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def calcular_etag(stat):
+    """ETag fuerte a partir de tamaño y fecha de modificación (sin leer el archivo)."""
+    return quote_etag(f"{stat.st_size:x}-{stat.st_mtime_ns:x}")
+
+
+def _parse_range(header, size):
+    """
+    Interpreta un encabezado Range de un solo intervalo.
+    Regresa (inicio, fin) inclusivos, None si el encabezado no aplica
+    (se sirve el archivo completo) o 'invalido' si no es satisfacible.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # Rangos múltiples o formato desconocido: se ignoran y se manda completo
+        return None
+
+    inicio, fin = match.groups()
+    if inicio == '' and fin == '':
+        return None
+
+    if inicio == '':
+        # Sufijo: los últimos N bytes
+        largo = int(fin)
+        if largo == 0:
+            return 'invalido'
+        return max(size - largo, 0), size - 1
+
+    inicio = int(inicio)
+    fin = int(fin) if fin else size - 1
+    if inicio >= size or fin < inicio:
+        return 'invalido'
+    return inicio, min(fin, size - 1)
+
+
+def _if_range_vigente(request, etag, mtime):
+    """If-Range: solo se respeta el Range si el archivo no cambió."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    fecha = parse_http_date_safe(if_range)
+    return fecha is not None and int(mtime) <= fecha
+
+
+def _leer_intervalo(path, inicio, largo):
+    with open(path, 'rb') as f:
+        f.seek(inicio)
+        restante = largo
+        while restante > 0:
+            bloque = f.read(min(CHUNK_SIZE, restante))
+            if not bloque:
+                break
+            restante -= len(bloque)
+            yield bloque
+
+
+def marcar_uso(path):
+    """
+    Marca de uso reciente para recortar_directorio. Solo se cambia atime (se hace
+    explícito por si el disco usa noatime); mtime no se toca porque forma el ETag.
+    Lanza FileNotFoundError si el archivo no existe.
+    """
+    os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+
+
+def recortar_directorio(directorio, max_bytes, conservar=None):
+    """
+    Mantiene un directorio de caché por debajo de `max_bytes` borrando lo menos
+    usado (por atime, ver marcar_uso). Ignora temporales .tmp y `conservar`.
+    """
+    archivos = []
+    total = 0
+    for raiz, _, nombres in os.walk(directorio):
+        for nombre in nombres:
+            path = os.path.join(raiz, nombre)
+            if nombre.endswith('.tmp') or path == conservar:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            archivos.append((stat.st_atime, stat.st_size, path))
+            total += stat.st_size
+
+    if total <= max_bytes:
+        return
+
+    for _, tamano, path in sorted(archivos):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= tamano
+        if total <= max_bytes:
+            break
+
+
+def registrar_descarga(request, descripcion):
+    """Registra la descarga en la bitácora sin interrumpir la respuesta si falla."""
+    try:
+        ActivityLog.objects.create(
+            user=request.user,
+            action='DOWNLOAD',
+            endpoint=request.path,
+            method='GET',
+            description=descripcion,
+            ip_address=request.META.get('REMOTE_ADDR'),
+            user_agent=request.META.get('HTTP_USER_AGENT', '')
+        )
+    except Exception:
+        pass
+
+
+def servir_archivo_protegido(request, path, content_type=None, filename=None,
+                             as_attachment=False, descripcion_log=None, offload=True):
+    """
+    Sirve un archivo de MEDIA_ROOT a un usuario ya autorizado por la vista.
+
+    - GET condicional: ETag / Last-Modified -> 304 sin abrir el archivo.
+    - Range de un solo intervalo -> 206 (previsualización de PDFs grandes).
+    - Con settings.PROTECTED_FILES_OFFLOAD = 'x-accel-redirect' (nginx) o
+      'x-sendfile' (Apache) la transferencia la hace el servidor web
+      (offload=False para archivos fuera de MEDIA_ROOT).
+
+    La bitácora se registra solo cuando realmente se envían bytes desde el inicio
+    del archivo, para que los 304 y los siguientes fragmentos no escriban en BD.
+    """
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("Archivo no encontrado")
+
+    etag = calcular_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if not_modified is not None:
+        return not_modified
+
+    content_type = content_type or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    filename = filename or os.path.basename(path)
+
+    modo = getattr(settings, 'PROTECTED_FILES_OFFLOAD', None) if offload else None
+    if modo:
+        response = HttpResponse(content_type=content_type)
+        if modo == 'x-accel-redirect':
+            relativo = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+            response['X-Accel-Redirect'] = settings.PROTECTED_FILES_ACCEL_PREFIX + relativo
+        else:
+            response['X-Sendfile'] = path
+        disposition = 'attachment' if as_attachment else 'inline'
+        response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+        response['ETag'] = etag
+        response['Last-Modified'] = last_modified
+        if descripcion_log and 'HTTP_RANGE' not in request.META:
+            registrar_descarga(request, descripcion_log)
+        return response
+
+    intervalo = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header and _if_range_vigente(request, etag, stat.st_mtime):
+        intervalo = _parse_range(range_header, stat.st_size)
+
+    if intervalo == 'invalido':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    if intervalo is not None:
+        inicio, fin = intervalo
+        largo = fin - inicio + 1
+        response = StreamingHttpResponse(
+            _leer_intervalo(path, inicio, largo), status=206, content_type=content_type
+        )
+        response['Content-Length'] = str(largo)
+        response['Content-Range'] = f'bytes {inicio}-{fin}/{stat.st_size}'
+        disposition = 'attachment' if as_attachment else 'inline'
+        response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+    else:
+        inicio = 0
+        response = FileResponse(
+            open(path, 'rb'), content_type=content_type,
+            as_attachment=as_attachment, filename=filename
+        )
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    # El contenido requiere autenticación: solo caché privada del navegador
+    response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+
+    if descripcion_log and inicio == 0:
+        registrar_descarga(request, descripcion_log)
+
+    return response
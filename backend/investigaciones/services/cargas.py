@@ -0,0 +1,134 @@
+import os
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+CHUNK_SIZE = 64 * 1024
+
+
+class CargaError(Exception):
+    """Error del protocolo de carga; `status` es el código HTTP a devolver."""
+
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.status = status
+
+
+def ruta_temporal(carga):
+    return os.path.join(settings.CARGAS_PARCIALES_DIR, f"{carga.id}.part")
+
+
+def limpiar_cargas_expiradas():
+    """Elimina sesiones abandonadas (y su archivo temporal) pasado el tiempo de expiración."""
+    from investigaciones.models import CargaParcial
+
+    limite = timezone.now() - timedelta(hours=settings.CARGAS_PARCIALES_EXPIRACION_HORAS)
+    for carga in CargaParcial.objects.filter(updated_at__lt=limite):
+        descartar_carga(carga)
+
+
+def crear_carga(user, nombre, tamano_total):
+    from investigaciones.models import CargaParcial
+
+    if not nombre:
+        raise CargaError('Se requiere el nombre del archivo')
+    try:
+        tamano_total = int(tamano_total)
+    except (TypeError, ValueError):
+        raise CargaError('Tamaño inválido')
+    if tamano_total <= 0 or tamano_total > settings.CARGAS_PARCIALES_TAMANO_MAXIMO:
+        raise CargaError('Tamaño fuera del límite permitido', status=413)
+
+    limpiar_cargas_expiradas()
+
+    carga = CargaParcial.objects.create(
+        user=user, nombre=os.path.basename(nombre), tamano_total=tamano_total
+    )
+    os.makedirs(settings.CARGAS_PARCIALES_DIR, exist_ok=True)
+    open(ruta_temporal(carga), 'wb').close()
+    return carga
+
+
+def agregar_fragmento(carga_id, user, offset, stream, largo):
+    """
+    Agrega un fragmento al archivo temporal a partir de `offset`.
+    El fragmento se copia por bloques desde el stream de la petición (no se carga
+    completo en memoria). Si el offset no coincide con lo ya recibido se responde
+    409 para que el cliente consulte el offset y reanude desde ahí.
+    """
+    from investigaciones.models import CargaParcial
+
+    try:
+        offset = int(offset)
+        largo = int(largo)
+    except (TypeError, ValueError):
+        raise CargaError('Se requieren los encabezados Upload-Offset y Content-Length')
+    if largo <= 0 or largo > settings.CARGAS_PARCIALES_FRAGMENTO_MAXIMO:
+        raise CargaError('Tamaño de fragmento inválido', status=413)
+
+    with transaction.atomic():
+        # El bloqueo evita que dos reintentos simultáneos escriban el mismo tramo
+        carga = CargaParcial.objects.select_for_update().filter(pk=carga_id, user=user).first()
+        if carga is None:
+            raise CargaError('Carga no encontrada', status=404)
+        if offset != carga.offset:
+            raise CargaError(f'Offset esperado: {carga.offset}', status=409)
+        if carga.offset + largo > carga.tamano_total:
+            raise CargaError('El fragmento excede el tamaño declarado', status=413)
+
+        recibido = 0
+        with open(ruta_temporal(carga), 'r+b') as destino:
+            destino.seek(carga.offset)
+            while recibido < largo:
+                bloque = stream.read(min(CHUNK_SIZE, largo - recibido))
+                if not bloque:
+                    break
+                destino.write(bloque)
+                recibido += len(bloque)
+            # Si la conexión se cortó a medias se descarta lo escrito después del offset
+            destino.truncate(carga.offset + recibido)
+
+        carga.offset += recibido
+        carga.save(update_fields=['offset', 'updated_at'])
+
+    return carga
+
+
+def obtener_carga(carga_id, user):
+    from investigaciones.models import CargaParcial
+
+    try:
+        carga_id = uuid.UUID(str(carga_id))
+    except ValueError:
+        raise CargaError('carga_id inválido', status=400)
+    carga = CargaParcial.objects.filter(pk=carga_id, user=user).first()
+    if carga is None:
+        raise CargaError('Carga no encontrada', status=404)
+    return carga
+
+
+@contextmanager
+def archivo_de_carga(carga):
+    """
+    Entrega el archivo ensamblado como `File` listo para asignarse a un FileField;
+    al guardarse pasa por el almacén direccionado por contenido (se hashea ahí).
+    """
+    if carga.offset != carga.tamano_total:
+        raise CargaError(
+            f'Carga incompleta: {carga.offset} de {carga.tamano_total} bytes', status=409
+        )
+    with open(ruta_temporal(carga), 'rb') as f:
+        yield File(f, name=carga.nombre)
+
+
+def descartar_carga(carga):
+    path = ruta_temporal(carga)
+    if os.path.exists(path):
+        os.remove(path)
+    carga.delete()
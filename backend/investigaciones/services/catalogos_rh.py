@@ -0,0 +1,131 @@
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .pemex import pemex_gateway
+
+# (tipo, consulta): cada fila es (centro, valor); centro solo aplica a las áreas
+CONSULTAS = (
+    ('centro_trabajo', "SELECT DISTINCT '', cve_desc_centro FROM [00_tablero_dg] WHERE cve_desc_centro IS NOT NULL"),
+    ('centro_coduni', "SELECT DISTINCT '', DESC_CDET FROM CODUNI_l WHERE DESC_CDET IS NOT NULL"),
+    ('area', "SELECT DISTINCT DESC_CDET, Desc_Depto FROM CODUNI_l WHERE DESC_CDET IS NOT NULL AND Desc_Depto IS NOT NULL"),
+)
+
+# Copiar los catálogos completos tarda más que una consulta de formulario
+TIMEOUT_ACTUALIZACION_SEGUNDOS = 120
+
+
+def _ordenar(valores):
+    """Orden alfabético sin distinguir mayúsculas, como el ORDER BY de SQL Server."""
+    return sorted(set(valores), key=lambda v: (v.upper(), v))
+
+
+def _filas_rh(tipo, sql, **kwargs):
+    """(tipo, centro, valor) de una consulta de CONSULTAS, sin valores vacíos."""
+    return [
+        (tipo, (centro or '').strip(), valor.strip())
+        for centro, valor in pemex_gateway.consultar(sql, **kwargs) if valor and valor.strip()
+    ]
+
+
+def actualizar_catalogos_rh():
+    """Copia los catálogos de RH a CatalogoRH (reemplazo completo). Regresa {tipo: registros}."""
+    from investigaciones.models import CatalogoRH
+
+    nuevos = []
+    conteo = {}
+    for tipo, sql in CONSULTAS:
+        registros = [
+            CatalogoRH(tipo=tipo, centro=centro, valor=valor)
+            for tipo, centro, valor in _filas_rh(tipo, sql, timeout=TIMEOUT_ACTUALIZACION_SEGUNDOS)
+        ]
+        conteo[tipo] = len(registros)
+        nuevos.extend(registros)
+
+    with transaction.atomic():
+        CatalogoRH.objects.all().delete()
+        CatalogoRH.objects.bulk_create(nuevos, batch_size=1000)
+    catalogos_rh.recargar()
+    return conteo
+
+
+def catalogos_rh_vencidos():
+    from investigaciones.models import CatalogoRH
+
+    ultima = CatalogoRH.objects.aggregate(ultima=Max('actualizado_en'))['ultima']
+    return ultima is None or ultima < timezone.now() - timedelta(hours=settings.CATALOGOS_RH_ACTUALIZAR_HORAS)
+
+
+class CatalogosRH:
+    """
+    Catálogos de CatalogoRH en memoria del proceso. La versión es la huella del
+    contenido: igual en todos los procesos y solo cambia si cambian los datos,
+    así sirve como ETag y como clave para que el navegador los guarde.
+    Mientras la tabla esté vacía (recién desplegado, antes de la primera copia de
+    run_workers) se consulta RH con la caché y el respaldo del gateway; si RH
+    tampoco responde se lanza PemexNoDisponible.
+    """
+
+    def __init__(self):
+        self._datos = None
+        self._version = None
+        self._cargado_en = 0
+        self._lock = threading.Lock()
+
+    def _cargar(self):
+        from investigaciones.models import CatalogoRH
+
+        filas = list(CatalogoRH.objects.values_list('tipo', 'centro', 'valor'))
+        if not filas:
+            filas = [
+                fila for tipo, sql in CONSULTAS
+                for fila in _filas_rh(tipo, sql, cache_segundos=settings.PEMEX_CATALOGOS_CACHE_SEGUNDOS)
+            ]
+
+        por_tipo = defaultdict(list)
+        areas = defaultdict(list)
+        for tipo, centro, valor in filas:
+            if tipo == 'area':
+                areas[centro.upper()].append(valor)
+            else:
+                por_tipo[tipo].append(valor)
+
+        datos = {
+            'centros_trabajo': _ordenar(por_tipo['centro_trabajo']),
+            'centros_coduni': _ordenar(por_tipo['centro_coduni']),
+            'areas': {centro: _ordenar(valores) for centro, valores in sorted(areas.items())},
+        }
+        huella = hashlib.sha1(repr(sorted(datos.items())).encode('utf-8')).hexdigest()[:16]
+        self._datos = datos
+        self._version = huella
+        self._cargado_en = time.monotonic()
+
+    def _asegurar(self):
+        vencido = time.monotonic() - self._cargado_en > settings.CATALOGOS_RH_CACHE_SEGUNDOS
+        if self._datos is None or vencido:
+            with self._lock:
+                vencido = time.monotonic() - self._cargado_en > settings.CATALOGOS_RH_CACHE_SEGUNDOS
+                if self._datos is None or vencido:
+                    self._cargar()
+
+    def recargar(self):
+        """Fuerza a releer la tabla en la siguiente consulta."""
+        self._cargado_en = float('-inf')
+
+    def todo(self):
+        """
+        (version, {'centros_trabajo': [...], 'centros_coduni': [...], 'areas': {CENTRO: [...]}});
+        las claves de áreas van en mayúsculas (la comparación en SQL Server no distingue).
+        """
+        self._asegurar()
+        return self._version, self._datos
+
+
+catalogos_rh = CatalogosRH()
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+# En estos niveles el costo depende también del grado
+NIVELES_CON_GRADO = ('44', '45', '46')
+
+
+def normalizar(valor):
+    """'07' y 7 son el mismo nivel/jornada; textos en mayúsculas y sin espacios."""
+    texto = '' if valor is None else str(valor).strip()
+    return str(int(texto)) if texto.isdigit() else texto.upper()
+
+
+def clave_costo(nivel, jornada, grado=''):
+    """Clave del catálogo: 'nivel|jornada' o 'nivel|jornada|grado' para NIVELES_CON_GRADO."""
+    nivel = normalizar(nivel)
+    jornada = normalizar(jornada)
+    if nivel in NIVELES_CON_GRADO:
+        return f'{nivel}|{jornada}|{normalizar(grado)}'
+    return f'{nivel}|{jornada}'
+
+
+class CostoPlazaCatalog:
+    """
+    Copia en memoria de la tabla costo_plaza_anual (BD 'gai'). Son pocos cientos de
+    filas que casi no cambian: se cargan completas la primera vez que se usan y se
+    recargan al expirar COSTO_PLAZA_CACHE_SEGUNDOS o con recargar().
+    """
+
+    def __init__(self):
+        self._costos = None
+        self._version = None
+        self._cargado_en = 0
+        self._lock = threading.Lock()
+
+    def _cargar(self):
+        with connections['default'].cursor() as cursor:
+            cursor.execute("SELECT Nivel, Jornada, grado, costo_anual FROM costo_plaza_anual")
+            filas = cursor.fetchall()
+
+        costos = {}
+        for nivel, jornada, grado, costo in filas:
+            # Igual que el SELECT original con fetchone(): gana la primera fila de cada clave
+            costos.setdefault(clave_costo(nivel, jornada, grado), costo)
+
+        huella = hashlib.sha1(repr(sorted(costos.items())).encode('utf-8')).hexdigest()[:16]
+        self._costos = costos
+        self._version = huella
+        self._cargado_en = time.monotonic()
+
+    def _asegurar(self):
+        vencido = time.monotonic() - self._cargado_en > settings.COSTO_PLAZA_CACHE_SEGUNDOS
+        if self._costos is None or vencido:
+            with self._lock:
+                vencido = time.monotonic() - self._cargado_en > settings.COSTO_PLAZA_CACHE_SEGUNDOS
+                if self._costos is None or vencido:
+                    self._cargar()
+
+    def recargar(self):
+        with self._lock:
+            self._cargar()
+
+    def obtener(self, nivel, jornada, grado=''):
+        """Costo anual o None si la combinación no existe."""
+        self._asegurar()
+        return self._costos.get(clave_costo(nivel, jornada, grado))
+
+    def todo(self):
+        """(version, {clave: costo}); la versión cambia solo si cambia el contenido."""
+        self._asegurar()
+        return self._version, self._costos
+
+
+catalogo_costo_plaza = CostoPlazaCatalog()
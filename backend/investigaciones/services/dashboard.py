@@ -0,0 +1,134 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from login_register.tokens import roles_usuario, version_roles
+
+from .directorio import empleado_tablero
+
+VERSION_KEY = 'investigaciones:version'
+CLAVE_DASHBOARD = 'dashboard:usuario:{}:{}:{}'
+
+
+def version_investigaciones():
+    """
+    Sello que cambia con cada alta, edición o borrado de una Investigacion (o de sus
+    investigadores). Los dashboards en caché lo llevan en la clave, así que al
+    cambiar un caso dejan de usarse sin borrarlos uno por uno.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidar_investigaciones():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def _clave_dashboard(user_id):
+    # version_roles cambia con los grupos, la ficha o el username del usuario
+    return CLAVE_DASHBOARD.format(user_id, version_investigaciones(), version_roles(user_id))
+
+
+def invalidar_dashboard_usuario(user_id):
+    """Para cambios de perfil (nombre, email, foto) que no mueven ningún sello."""
+    cache.delete(_clave_dashboard(user_id))
+
+
+def estadisticas_investigaciones(queryset):
+    """total, en_proceso, concluidas y coadyuvadas de `queryset` en una sola consulta."""
+    conteo = queryset.aggregate(
+        total=Count('pk', distinct=True),
+        concluidas=Count('pk', distinct=True, filter=Q(estatus='CONCLUIDA')),
+        coadyuvadas=Count('pk', distinct=True, filter=Q(es_coadyuvancia=True)),
+    )
+    return {
+        'total': conteo['total'],
+        # En proceso: todas las que NO están concluidas
+        'en_proceso': conteo['total'] - conteo['concluidas'],
+        'concluidas': conteo['concluidas'],
+        'coadyuvadas': conteo['coadyuvadas'],
+    }
+
+
+def _investigador(ficha):
+    from investigaciones.models import CatalogoInvestigador
+
+    inv = CatalogoInvestigador.objects.filter(ficha=ficha, activo=True).first() if ficha else None
+    if inv is None:
+        return {'es_investigador': False, 'no_constancia': None}
+
+    responsiva_name = None
+    if inv.archivo_responsiva and inv.archivo_responsiva.name:
+        # 'responsiva/archivo.pdf' -> 'archivo' (el frontend agrega el .pdf)
+        responsiva_name = os.path.splitext(os.path.basename(inv.archivo_responsiva.name))[0]
+    return {
+        'es_investigador': True,
+        'no_constancia': inv.no_constancia,
+        'responsiva': responsiva_name,
+    }
+
+
+def _construir_dashboard(target_user):
+    """Regresa (datos, completo); completo es False si RH no respondió."""
+    from investigaciones.views import get_investigaciones_for_user
+
+    profile = getattr(target_user, 'profile', None)
+    ficha = profile.ficha if profile else None
+    user_data = {
+        'id': target_user.id,
+        'username': target_user.username,
+        'email': target_user.email,
+        'first_name': target_user.first_name,
+        'last_name': target_user.last_name,
+        'groups': roles_usuario(target_user),
+        'ficha': ficha,
+        # Ruta relativa: la vista la vuelve absoluta con el host de la petición
+        'profile_picture': profile.profile_picture.url if profile and profile.profile_picture else None,
+    }
+
+    completo = True
+    empleado_data = None
+    if ficha:
+        try:
+            empleado_data = empleado_tablero(ficha)
+        except Exception as e:
+            print(f"Error fetching empleado info: {e}")
+            completo = False
+
+    inv_queryset = get_investigaciones_for_user(target_user, query_params={'personal': 'true'})
+    return {
+        'user': user_data,
+        'empleado': empleado_data,
+        'investigador': _investigador(ficha),
+        'stats': estadisticas_investigaciones(inv_queryset),
+    }, completo
+
+
+def dashboard_usuario(user_id):
+    """
+    Dashboard de UserInfoPage para `user_id`, en caché por usuario hasta que cambie
+    un caso, sus grupos o su perfil. Regresa None si el usuario no existe.
+    """
+    from django.contrib.auth.models import User
+
+    clave = _clave_dashboard(user_id)
+    datos = cache.get(clave)
+    if datos is not None:
+        return datos
+
+    target_user = User.objects.select_related('profile').filter(pk=user_id).first()
+    if target_user is None:
+        return None
+    datos, completo = _construir_dashboard(target_user)
+    if completo:
+        cache.set(clave, datos, settings.DASHBOARD_USUARIO_CACHE_SEGUNDOS)
+    return datos
@@ -0,0 +1,98 @@
+from django.conf import settings
+
+from .pemex import pemex_gateway
+
+# SQL Server admite ~2100 parámetros por consulta
+MAX_FICHAS_POR_CONSULTA = 1000
+
+
+def _en_bloques(valores, tamano):
+    for i in range(0, len(valores), tamano):
+        yield valores[i:i + tamano]
+
+
+def empleado_tablero(ficha):
+    """
+    Datos laborales de una ficha en el tablero de RH (dashboard de usuario), con la
+    respuesta en caché del gateway. None si la ficha no está en activos.
+    """
+    row = pemex_gateway.consultar_uno(
+        # Solo las columnas del dashboard: la respuesta queda en caché y en el respaldo (sin RFC/CURP)
+        "SELECT ficha, nombres, nivel_plaza, catego, mc_stext, edad, antig, direccion_coduni, grupo, sec_sin FROM [00_tablero_dg] WHERE ficha = %s",
+        [ficha],
+        cache_segundos=settings.DIRECTORIO_EMPLEADO_CACHE_SEGUNDOS,
+    )
+    if not row:
+        return None
+    return {
+        'nombre': row[1],
+        'nivel': row[2],
+        'categoria': row[3],
+        'puesto': row[4],
+        'edad': row[5],
+        'antiguedad': row[6],
+        'direccion': row[7],
+        'regimen': row[8],
+        'sindicato': "STPRM" if row[9] else ""
+    }
+
+
+def buscar_empleados(fichas):
+    """
+    Datos básicos de varias fichas del directorio de RH (BD 'pemex') con un
+    `ficha IN (...)` por tabla en lugar de una consulta por ficha.
+    Primero busca en activos y, para las que falten, en el último contrato.
+    Regresa {ficha: datos}; las fichas no encontradas no aparecen.
+    """
+    pendientes = list(dict.fromkeys(str(f).strip() for f in fichas if f))
+    encontrados = {}
+    if not pendientes:
+        return encontrados
+
+    for bloque in _en_bloques(pendientes, MAX_FICHAS_POR_CONSULTA):
+        marcadores = ', '.join(['%s'] * len(bloque))
+        filas = pemex_gateway.consultar(f"""
+            SELECT ficha, nombres, nivel_plaza, mc_stext, antig, direccion_coduni,
+                   grupo, jorna, subdireccion_coduni, regional
+            FROM [00_tablero_dg]
+            WHERE ficha IN ({marcadores})
+        """, bloque)
+        for row in filas:
+            encontrados.setdefault(str(row[0]).strip(), {
+                'ficha': row[0],
+                'nombre': row[1],
+                'nivel': row[2],
+                'puesto': row[3],
+                'antiguedad': row[4],
+                'direccion': row[5],
+                'grupo': row[6],
+                'jornada': row[7],
+                'subdireccion': row[8],
+                'regional': row[9],
+                'fuente': 'Activos',
+            })
+
+    faltantes = [f for f in pendientes if f not in encontrados]
+    for bloque in _en_bloques(faltantes, MAX_FICHAS_POR_CONSULTA):
+        marcadores = ', '.join(['%s'] * len(bloque))
+        filas = pemex_gateway.consultar(f"""
+            SELECT ficha, nombres, nivel_plaza, grupo, jorna, regional
+            FROM [ultimo_contrato_activo]
+            WHERE ficha IN ({marcadores})
+        """, bloque)
+        for row in filas:
+            encontrados.setdefault(str(row[0]).strip(), {
+                'ficha': row[0],
+                'nombre': row[1],
+                'nivel': row[2],
+                'puesto': None,
+                'antiguedad': None,
+                'direccion': None,
+                'grupo': row[3],
+                'jornada': row[4],
+                'subdireccion': None,
+                'regional': row[5],
+                'fuente': 'Ultimo contrato',
+            })
+
+    return encontrados
@@ -0,0 +1,126 @@
+import csv
+import tempfile
+from collections import defaultdict
+from datetime import date
+from itertools import islice
+
+try:
+    import openpyxl
+except ImportError:  # Sin openpyxl solo se exporta CSV
+    openpyxl = None
+
+# Registros por bloque: uno por iterator() y uno por consulta de nombres relacionados
+BLOQUE = 1000
+
+ENCABEZADOS = [
+    'Tipo', 'No. Reporte', 'Documento de Origen', 'Investigadores', 'Personal Reportado',
+    'Procedencia', 'Conducta', 'Gravedad', 'Región', 'Estatus', 'Fecha de Registro',
+    'Prescripción', 'Días Restantes', 'Sanción', 'Creado Por',
+]
+
+_CAMPOS = (
+    'id', 'es_coadyuvancia', 'es_atracción', 'numero_reporte', 'nombre_corto', 'procedencia',
+    'conductas', 'gravedad', 'gerencia_responsable', 'estatus', 'fecha_reporte',
+    'fecha_prescripcion', 'sancion', 'created_by__first_name', 'created_by__last_name',
+    'created_by__username',
+)
+
+
+def _nombres_por_investigacion(modelo, ids):
+    nombres = defaultdict(list)
+    for investigacion_id, nombre in (
+        modelo.objects.filter(investigacion_id__in=ids)
+        .order_by('investigacion_id', 'id')
+        .values_list('investigacion_id', 'nombre')
+    ):
+        nombres[investigacion_id].append(nombre)
+    return nombres
+
+
+def filas_investigaciones(queryset):
+    """
+    Genera una lista de valores por investigación (mismo orden que ENCABEZADOS).
+    Lee con values_list + iterator() por bloques y trae investigadores e
+    involucrados con una consulta por bloque, así la memoria no crece con el total.
+    """
+    from investigaciones.models import Involucrado, Investigador
+
+    hoy = date.today()
+    filas = queryset.values_list(*_CAMPOS).iterator(chunk_size=BLOQUE)
+    while True:
+        bloque = list(islice(filas, BLOQUE))
+        if not bloque:
+            break
+        ids = [fila[0] for fila in bloque]
+        investigadores = _nombres_por_investigacion(Investigador, ids)
+        involucrados = _nombres_por_investigacion(Involucrado, ids)
+
+        for (pk, coadyuvancia, atraccion, numero_reporte, nombre_corto, procedencia, conductas,
+             gravedad, gerencia, estatus, fecha_reporte, fecha_prescripcion, sancion,
+             nombre, apellido, username) in bloque:
+            yield [
+                'C' if coadyuvancia else 'A' if atraccion else 'N',
+                numero_reporte,
+                nombre_corto,
+                ', '.join(investigadores.get(pk, [])),
+                ', '.join(involucrados.get(pk, [])),
+                procedencia,
+                conductas,
+                gravedad,
+                gerencia,
+                estatus,
+                fecha_reporte,
+                fecha_prescripcion,
+                (fecha_prescripcion - hoy).days if fecha_prescripcion else None,
+                sancion,
+                f"{nombre or ''} {apellido or ''}".strip() or username,
+            ]
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: regresa la línea en lugar de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def _celda_csv(valor):
+    if isinstance(valor, date):
+        return valor.strftime('%d/%m/%Y')
+    return '' if valor is None else valor
+
+
+def generar_csv(filas):
+    """Líneas CSV (con BOM para que Excel respete los acentos) listas para StreamingHttpResponse."""
+    writer = csv.writer(_Eco())
+    yield '\ufeff' + writer.writerow(ENCABEZADOS)
+    for fila in filas:
+        yield writer.writerow([_celda_csv(v) for v in fila])
+
+
+def escribir_xlsx(filas, destino):
+    """
+    Escribe el XLSX en `destino` (archivo binario). openpyxl en modo write_only
+    manda las filas a disco conforme llegan, así que la memoria se mantiene constante;
+    el .xlsx es un ZIP que solo se puede cerrar al final, por eso no se transmite fila a fila.
+    """
+    if openpyxl is None:
+        raise ValueError('openpyxl no está instalado: use formato csv')
+    libro = openpyxl.Workbook(write_only=True)
+    hoja = libro.create_sheet('Investigaciones')
+    hoja.append(ENCABEZADOS)
+    for fila in filas:
+        hoja.append(fila)
+    libro.save(destino)
+
+
+def xlsx_temporal(filas):
+    """XLSX en un archivo temporal (se borra al cerrarse), posicionado al inicio."""
+    temporal = tempfile.TemporaryFile(suffix='.xlsx')
+    try:
+        escribir_xlsx(filas, temporal)
+    except Exception:
+        temporal.close()
+        raise
+    temporal.seek(0)
+    return temporal
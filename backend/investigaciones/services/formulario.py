@@ -0,0 +1,69 @@
+import hashlib
+import json
+from functools import lru_cache
+
+from .catalogos_rh import catalogos_rh
+from .padron import investigadores_por_grupos
+from .pemex import PemexNoDisponible
+from login_register.tokens import roles_usuario
+
+
+def opciones_formulario():
+    """Opciones fijas de las listas desplegables (salen de los choices del modelo)."""
+    from investigaciones.models import Investigacion
+
+    return {
+        'direcciones': [],
+        'procedencias': [choice[0] for choice in Investigacion.PROCEDENCIA_CHOICES],
+        'regimenes': [],
+        'sindicatos': [choice[0] for choice in Investigacion.SINDICATO_CHOICES],
+        'gravedades': [choice[0] for choice in Investigacion.GRAVEDAD_CHOICES],
+        'gerencias': [choice[0] for choice in Investigacion.GERENCIA_CHOICES],
+        'conductas': [choice[0] for choice in Investigacion.CONDUCTAS_CHOICES],
+        'sancion': [choice[0] for choice in Investigacion.SANCION_CHOICES],
+    }
+
+
+def investigadores_permitidos(user):
+    """
+    Investigadores activos [{ficha, nombre}] que el usuario puede asignar
+    (filtrados por región si es Supervisor). Sale del padrón en caché.
+    """
+    return investigadores_por_grupos(roles_usuario(user), user.is_superuser)
+
+
+def _huella(valor):
+    return hashlib.sha1(json.dumps(valor, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+@lru_cache(maxsize=1)
+def _version_opciones():
+    # Las opciones solo cambian con un despliegue: su huella se calcula una vez
+    return _huella(opciones_formulario())
+
+
+def bootstrap_formulario(user):
+    """
+    Todo lo que InvestigacionForm necesita al abrir, en una sola respuesta:
+    opciones, centros (copia local de RH) e investigadores asignables.
+    Regresa (version, datos); la versión combina la de cada parte. Si RH no está
+    disponible los centros van vacíos con centros_disponibles=False y la versión
+    es None (la respuesta incompleta no se guarda en el navegador).
+    """
+    investigadores = investigadores_permitidos(user)
+    try:
+        version_catalogos, catalogos = catalogos_rh.todo()
+    except PemexNoDisponible:
+        version_catalogos, catalogos = None, {'centros_trabajo': [], 'centros_coduni': []}
+
+    version = None
+    if version_catalogos is not None:
+        version = f"{_version_opciones()[:6]}-{version_catalogos[:6]}-{_huella(investigadores)[:8]}"
+    return version, {
+        'version': version,
+        'opciones': opciones_formulario(),
+        'centros_trabajo': catalogos['centros_trabajo'],
+        'centros_coduni': catalogos['centros_coduni'],
+        'centros_disponibles': version_catalogos is not None,
+        'investigadores': investigadores,
+    }
@@ -0,0 +1,161 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.http import Http404
+from rest_framework.response import Response
+
+from .archivos import marcar_uso, recortar_directorio, servir_archivo_protegido
+
+try:
+    import pymupdf
+except ImportError:  # Sin PyMuPDF solo se generan miniaturas de imágenes
+    pymupdf = None
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+ANCHOS_PERMITIDOS = (160, 320, 640)
+FORMATOS = {'webp': ('WEBP', 'image/webp'), 'png': ('PNG', 'image/png')}
+EXTENSIONES_IMAGEN = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tif', '.tiff')
+
+# Pocos hilos: renderizar PDFs es intensivo en CPU y no debe competir con las peticiones
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='miniaturas')
+_pendientes = {}
+_lock = threading.Lock()
+
+
+def _clave(path, ancho, formato):
+    """La clave cambia si el archivo cambia (tamaño/fecha), así no hay que invalidar a mano."""
+    stat = os.stat(path)
+    base = f"{path}:{stat.st_size}:{stat.st_mtime_ns}:{ancho}"
+    return hashlib.sha1(base.encode()).hexdigest() + '.' + formato
+
+
+def _ruta_cache(clave):
+    return os.path.join(settings.MINIATURAS_DIR, clave[:2], clave)
+
+
+def _renderizar(path, ancho, formato):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.pdf':
+        if pymupdf is None:
+            raise ValueError('PyMuPDF no está instalado')
+        with pymupdf.open(path) as pdf:
+            pagina = pdf[0]
+            zoom = ancho / pagina.rect.width
+            pix = pagina.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+            imagen = Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
+    elif ext in EXTENSIONES_IMAGEN:
+        with Image.open(path) as original:
+            imagen = original.convert('RGB')
+            imagen.thumbnail((ancho, ancho * 4))
+    else:
+        raise ValueError('Tipo de archivo sin vista previa')
+
+    buffer = io.BytesIO()
+    imagen.save(buffer, FORMATOS[formato][0])
+    return buffer.getvalue()
+
+
+def _generar(path, ancho, formato, destino):
+    contenido = _renderizar(path, ancho, formato)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    tmp = f"{destino}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(contenido)
+    os.replace(tmp, destino)
+    recortar_directorio(settings.MINIATURAS_DIR, settings.MINIATURAS_MAX_BYTES, conservar=destino)
+    return destino
+
+
+def programar_miniatura(path, ancho=320, formato='webp'):
+    """
+    Encola la generación en segundo plano (p. ej. justo después de subir un archivo).
+    Regresa el Future; si ya hay una generación en curso para la misma clave se reutiliza.
+    Si la miniatura ya existe (la clave incluye tamaño y fecha del archivo) no se regenera.
+    """
+    clave = _clave(path, ancho, formato)
+    destino = _ruta_cache(clave)
+    if os.path.exists(destino):
+        futuro = Future()
+        futuro.set_result(destino)
+        return futuro
+    with _lock:
+        futuro = _pendientes.get(clave)
+        if futuro is None:
+            futuro = _executor.submit(_generar, path, ancho, formato, destino)
+            _pendientes[clave] = futuro
+            futuro.add_done_callback(lambda _f: _pendientes.pop(clave, None))
+    return futuro
+
+
+def programar_miniatura_al_subir(path):
+    """Pre-genera la miniatura por defecto de un archivo recién subido; nunca interrumpe la subida."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext != '.pdf' and ext not in EXTENSIONES_IMAGEN:
+        return
+    if ext == '.pdf' and pymupdf is None:
+        return
+    try:
+        programar_miniatura(path)
+    except Exception:
+        logger.exception("Error programando miniatura de %s", path)
+
+
+def obtener_miniatura(path, ancho=320, formato='webp', espera=None):
+    """
+    Ruta de la miniatura en caché. Si no existe la genera en segundo plano y espera
+    hasta `espera` segundos; si no termina a tiempo regresa None.
+    """
+    if espera is None:
+        espera = settings.MINIATURAS_ESPERA_SEGUNDOS
+    destino = _ruta_cache(_clave(path, ancho, formato))
+    try:
+        marcar_uso(destino)
+        return destino
+    except FileNotFoundError:
+        pass
+
+    try:
+        return programar_miniatura(path, ancho, formato).result(timeout=espera)
+    except TimeoutError:
+        return None
+
+
+def responder_miniatura(request, path):
+    """Respuesta HTTP para ?ancho=160|320|640&formato=webp|png con ETag/304 y caché privada."""
+    if not os.path.isfile(path):
+        raise Http404("Archivo no encontrado")
+
+    formato = request.query_params.get('formato', 'webp')
+    if formato not in FORMATOS:
+        return Response({'error': 'Formato no soportado'}, status=400)
+    try:
+        ancho = int(request.query_params.get('ancho', 320))
+    except ValueError:
+        ancho = 320
+    # Se ajusta al tamaño permitido más cercano para no multiplicar entradas en caché
+    ancho = min(ANCHOS_PERMITIDOS, key=lambda a: abs(a - ancho))
+
+    try:
+        miniatura = obtener_miniatura(path, ancho, formato)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=415)
+    except Exception:
+        logger.exception("Error generando miniatura de %s", path)
+        return Response({'error': 'No se pudo generar la vista previa'}, status=422)
+
+    if miniatura is None:
+        response = Response({'status': 'generando'}, status=202)
+        response['Retry-After'] = '2'
+        return response
+
+    return servir_archivo_protegido(
+        request, miniatura, content_type=FORMATOS[formato][1], offload=False
+    )
@@ -0,0 +1,72 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+CLAVE_PADRON = 'investigadores:padron'
+GRUPOS_ADMIN = ('Admin', 'AdminCentral')
+
+
+def _construir_padron():
+    """
+    {'todos': [{ficha, nombre}], 'regiones': {'NTE': [...], ...}} con tres consultas:
+    investigadores activos, usuarios en grupos Operador<REGION> y la ficha de cada uno.
+    """
+    from investigaciones.models import CatalogoInvestigador
+    from login_register.models import Profile
+
+    todos = list(CatalogoInvestigador.objects.filter(activo=True).values('ficha', 'nombre').order_by('nombre'))
+
+    operadores = list(
+        User.groups.through.objects.filter(group__name__startswith='Operador')
+        .values_list('user_id', 'group__name')
+    )
+    fichas = dict(
+        Profile.objects.filter(user_id__in={user_id for user_id, _ in operadores})
+        .exclude(ficha__isnull=True).exclude(ficha='')
+        .values_list('user_id', 'ficha')
+    )
+
+    fichas_por_region = defaultdict(set)
+    for user_id, grupo in operadores:
+        if user_id in fichas:
+            fichas_por_region[grupo[len('Operador'):]].add(fichas[user_id])
+
+    return {
+        'todos': todos,
+        'regiones': {
+            region: [inv for inv in todos if inv['ficha'] in fichas_region]
+            for region, fichas_region in fichas_por_region.items()
+        },
+    }
+
+
+def padron_investigadores():
+    padron = cache.get(CLAVE_PADRON)
+    if padron is None:
+        padron = _construir_padron()
+        cache.set(CLAVE_PADRON, padron, settings.INVESTIGADORES_PADRON_CACHE_SEGUNDOS)
+    return padron
+
+
+def invalidar_padron():
+    """Se llama (vía señales) al cambiar investigadores, fichas de perfil o grupos."""
+    cache.delete(CLAVE_PADRON)
+
+
+def investigadores_por_grupos(grupos, es_superusuario=False):
+    """
+    Investigadores activos [{ficha, nombre}] que puede asignar quien tiene `grupos`:
+    todos para Admin/AdminCentral (y usuarios sin rol de supervisor), solo los
+    operadores de su región para un Supervisor<REGION>.
+    """
+    padron = padron_investigadores()
+    if es_superusuario or any(g in GRUPOS_ADMIN for g in grupos):
+        return padron['todos']
+
+    supervisor_roles = [g for g in grupos if g.startswith('Supervisor')]
+    if supervisor_roles:
+        region = supervisor_roles[0][len('Supervisor'):]
+        return padron['regiones'].get(region, [])
+    return padron['todos']
@@ -0,0 +1,220 @@
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import InterfaceError, OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+CERRADO = 'cerrado'
+ABIERTO = 'abierto'
+SEMIABIERTO = 'semiabierto'
+
+
+class PemexNoDisponible(Exception):
+    """El directorio de RH no respondió y no hay datos de respaldo para la consulta."""
+
+
+class CircuitBreaker:
+    """
+    cerrado: pasan todas las consultas; tras `fallos` errores seguidos se abre.
+    abierto: se rechazan sin tocar la BD durante `espera` segundos.
+    semiabierto: pasa una sola consulta de prueba; si responde se cierra, si no se reabre.
+    """
+
+    def __init__(self, fallos, espera):
+        self.fallos_maximos = fallos
+        self.espera = espera
+        self.estado = CERRADO
+        self.fallos = 0
+        self.abierto_en = 0
+        self._prueba_en_curso = False
+        self._lock = threading.Lock()
+
+    def permite(self):
+        with self._lock:
+            if self.estado == CERRADO:
+                return True
+            if self.estado == ABIERTO and time.monotonic() - self.abierto_en >= self.espera:
+                self._cambiar(SEMIABIERTO)
+            if self.estado == SEMIABIERTO and not self._prueba_en_curso:
+                self._prueba_en_curso = True
+                return True
+            return False
+
+    def exito(self):
+        with self._lock:
+            self.fallos = 0
+            self._prueba_en_curso = False
+            if self.estado != CERRADO:
+                self._cambiar(CERRADO)
+
+    def fallo(self):
+        with self._lock:
+            self.fallos += 1
+            self._prueba_en_curso = False
+            if self.estado == SEMIABIERTO or self.fallos >= self.fallos_maximos:
+                self.abierto_en = time.monotonic()
+                if self.estado != ABIERTO:
+                    self._cambiar(ABIERTO)
+
+    def liberar(self):
+        """La consulta de prueba terminó sin resultado concluyente (p. ej. error de SQL)."""
+        with self._lock:
+            self._prueba_en_curso = False
+
+    def _cambiar(self, estado):
+        logger.warning("Circuito de la BD pemex: %s -> %s", self.estado, estado)
+        self.estado = estado
+
+
+class PemexGateway:
+    """
+    Único punto de acceso a la BD 'pemex' (directorio de RH, solo lectura).
+
+    - Timeout por consulta (además del de conexión en settings.DATABASES).
+    - Máximo PEMEX_CONSULTAS_SIMULTANEAS consultas a la vez por proceso: si RH está
+      lento, los demás hilos no se quedan formados indefinidamente.
+    - Circuit breaker: tras varios fallos seguidos deja de intentar por un tiempo.
+    - Respaldo: la última respuesta buena de las consultas de catálogo (las que usan
+      `cache_segundos`) se guarda en la caché 'respaldos' (PEMEX_RESPALDO_SEGUNDOS) y
+      se usa cuando RH no responde. Las búsquedas libres no se respaldan.
+    """
+
+    def __init__(self, alias='pemex'):
+        self.alias = alias
+        self.circuito = CircuitBreaker(settings.PEMEX_CIRCUITO_FALLOS, settings.PEMEX_CIRCUITO_ESPERA_SEGUNDOS)
+        self._turnos = threading.BoundedSemaphore(settings.PEMEX_CONSULTAS_SIMULTANEAS)
+        self._lock = threading.Lock()
+        self._metricas = {
+            'consultas': 0, 'exitos': 0, 'fallos': 0, 'rechazadas_circuito': 0,
+            'rechazadas_saturacion': 0, 'desde_cache': 0, 'desde_respaldo': 0,
+            'sin_respaldo': 0, 'tiempo_total_ms': 0.0, 'tiempo_maximo_ms': 0.0,
+        }
+
+    def _contar(self, metrica, valor=1):
+        with self._lock:
+            self._metricas[metrica] += valor
+
+    def metricas(self):
+        with self._lock:
+            datos = dict(self._metricas)
+        datos['circuito'] = self.circuito.estado
+        datos['fallos_seguidos'] = self.circuito.fallos
+        datos['tiempo_promedio_ms'] = round(datos['tiempo_total_ms'] / datos['exitos'], 1) if datos['exitos'] else None
+        return datos
+
+    def _clave(self, sql, params):
+        huella = hashlib.sha1(f"{sql}|{params!r}".encode('utf-8')).hexdigest()
+        return f"pemex:{huella}"
+
+    @contextmanager
+    def _timeout(self, segundos):
+        """Ajusta el timeout de consulta de pyodbc (Connection.timeout) solo para esta consulta."""
+        conexion = connections[self.alias]
+        conexion.ensure_connection()
+        crudo = conexion.connection
+        if segundos is None or not hasattr(crudo, 'timeout'):
+            yield
+            return
+        previo = crudo.timeout
+        crudo.timeout = segundos
+        try:
+            yield
+        finally:
+            crudo.timeout = previo
+
+    def _ejecutar(self, sql, params, timeout):
+        inicio = time.perf_counter()
+        with self._timeout(timeout):
+            with connections[self.alias].cursor() as cursor:
+                cursor.execute(sql, params or [])
+                filas = [tuple(fila) for fila in cursor.fetchall()]
+        transcurrido = (time.perf_counter() - inicio) * 1000
+        with self._lock:
+            self._metricas['tiempo_total_ms'] += transcurrido
+            self._metricas['tiempo_maximo_ms'] = max(self._metricas['tiempo_maximo_ms'], transcurrido)
+        return filas
+
+    def _respaldo(self, clave, motivo, con_respaldo):
+        filas = caches['respaldos'].get(clave) if con_respaldo else None
+        if filas is None:
+            self._contar('sin_respaldo')
+            raise PemexNoDisponible(f'El directorio de RH no está disponible ({motivo})')
+        self._contar('desde_respaldo')
+        return filas
+
+    def consultar(self, sql, params=None, timeout=None, cache_segundos=None):
+        """
+        Regresa todas las filas de `sql` (lista de tuplas). Con `cache_segundos` la
+        respuesta se reutiliza ese tiempo sin consultar (catálogos) y, si RH no responde,
+        se regresa la última respuesta buena. Sin respaldo se lanza PemexNoDisponible.
+        """
+        clave = self._clave(sql, params)
+        self._contar('consultas')
+
+        if cache_segundos:
+            filas = cache.get(clave)
+            if filas is not None:
+                self._contar('desde_cache')
+                return filas
+
+        if not self.circuito.permite():
+            self._contar('rechazadas_circuito')
+            return self._respaldo(clave, 'circuito abierto', bool(cache_segundos))
+
+        if not self._turnos.acquire(timeout=settings.PEMEX_ESPERA_TURNO_SEGUNDOS):
+            self.circuito.liberar()
+            self._contar('rechazadas_saturacion')
+            return self._respaldo(clave, 'demasiadas consultas en curso', bool(cache_segundos))
+
+        try:
+            filas = self._ejecutar(sql, params, timeout)
+        except (OperationalError, InterfaceError) as e:
+            # Timeout, servidor caído o conexión rota: cuenta para el circuito
+            logger.warning("Consulta a pemex falló: %s", e)
+            self.circuito.fallo()
+            self._contar('fallos')
+            connections[self.alias].close()
+            return self._respaldo(clave, 'sin respuesta', bool(cache_segundos))
+        except Exception:
+            # Error de la consulta en sí (SQL, parámetros): no indica que RH esté caído
+            self.circuito.liberar()
+            raise
+        finally:
+            self._turnos.release()
+
+        self.circuito.exito()
+        self._contar('exitos')
+        if cache_segundos:
+            cache.set(clave, filas, cache_segundos)
+            caches['respaldos'].set(clave, filas, settings.PEMEX_RESPALDO_SEGUNDOS)
+        return filas
+
+    def consultar_uno(self, sql, params=None, **kwargs):
+        filas = self.consultar(sql, params, **kwargs)
+        return filas[0] if filas else None
+
+    def verificar(self, timeout=None):
+        """
+        Sonda de conectividad (readyz): SELECT 1 sin respaldo ni caché. Con el circuito
+        abierto regresa False sin tocar la BD; el resultado alimenta al circuito.
+        """
+        if not self.circuito.permite():
+            return False
+        try:
+            self._ejecutar("SELECT 1", None, timeout)
+        except Exception as e:
+            logger.warning("Sonda de pemex falló: %s", e)
+            self.circuito.fallo()
+            connections[self.alias].close()
+            return False
+        self.circuito.exito()
+        return True
+
+
+pemex_gateway = PemexGateway()
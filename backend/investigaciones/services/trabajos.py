@@ -0,0 +1,303 @@
+import logging
+import os
+import socket
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .exportacion import escribir_xlsx, filas_investigaciones, generar_csv, openpyxl
+
+logger = logging.getLogger(__name__)
+
+# Cada cuánto se escribe el avance en la BD como máximo
+INTERVALO_PROGRESO_SEGUNDOS = 1
+
+
+class TrabajoError(Exception):
+    """Solicitud de trabajo inválida; `status` es el código HTTP a devolver."""
+
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.status = status
+
+
+class _Interrumpido(Exception):
+    """El trabajo se canceló o se reasignó mientras se procesaba."""
+
+
+def ruta_resultado(trabajo):
+    return os.path.join(settings.EXPORTACIONES_DIR, str(trabajo.id))
+
+
+# --- Tipos de trabajo -------------------------------------------------------
+# validar(user, parametros) se ejecuta al encolar (en la petición);
+# ejecutar(trabajo, destino, progreso) escribe el resultado y regresa el nombre del archivo.
+
+def _validar_investigaciones(user, parametros):
+    formato = parametros.get('formato', 'csv')
+    if formato not in ('csv', 'xlsx'):
+        raise TrabajoError('Formato no soportado (csv o xlsx)')
+    if formato == 'xlsx' and openpyxl is None:
+        raise TrabajoError('openpyxl no está instalado: use formato csv')
+
+
+def _exportar_investigaciones(trabajo, destino, progreso):
+    # Mismo alcance y filtros que el listado / la exportación directa
+    from investigaciones.views import get_investigaciones_for_user
+
+    parametros = trabajo.parametros
+    formato = parametros.get('formato', 'csv')
+    queryset = get_investigaciones_for_user(trabajo.user, parametros)
+    if parametros.get('estatus'):
+        queryset = queryset.filter(estatus=parametros['estatus'])
+
+    progreso.total(queryset.count())
+    filas = progreso.contar(filas_investigaciones(queryset))
+    if formato == 'xlsx':
+        escribir_xlsx(filas, destino)
+    else:
+        for linea in generar_csv(filas):
+            destino.write(linea.encode('utf-8'))
+    return f"Investigaciones_{date.today():%Y%m%d}.{formato}"
+
+
+def _validar_oficios(user, parametros):
+    from bajas.services.oficios import LoteError, seleccionar_bajas_lote
+
+    try:
+        seleccionar_bajas_lote(parametros, maximo=settings.EXPORTACIONES_OFICIOS_MAXIMO)
+    except LoteError as e:
+        raise TrabajoError(e.mensaje, status=e.status)
+
+
+def _generar_oficios(trabajo, destino, progreso):
+    from bajas.services.oficios import nombre_zip_oficios, seleccionar_bajas_lote, zip_oficios
+
+    bajas, total = seleccionar_bajas_lote(trabajo.parametros, maximo=settings.EXPORTACIONES_OFICIOS_MAXIMO)
+    progreso.total(total)
+    for parte in zip_oficios(progreso.contar(bajas.iterator(chunk_size=100))):
+        destino.write(parte)
+    return nombre_zip_oficios()
+
+
+TIPOS = {
+    'investigaciones': (_validar_investigaciones, _exportar_investigaciones),
+    'oficios': (_validar_oficios, _generar_oficios),
+}
+
+
+# --- Cola ----------------------------------------------------------------------
+
+def encolar(user, tipo, parametros):
+    from investigaciones.models import ExportJob
+
+    if tipo not in TIPOS:
+        raise TrabajoError(f"Tipo de trabajo no soportado ({', '.join(TIPOS)})")
+    if not isinstance(parametros, dict):
+        raise TrabajoError('parametros debe ser un objeto')
+
+    activos = ExportJob.objects.filter(user=user, estado__in=['PENDIENTE', 'EN_PROCESO']).count()
+    if activos >= settings.EXPORTACIONES_PENDIENTES_POR_USUARIO:
+        raise TrabajoError(
+            f'Ya tiene {activos} trabajos en cola; espere a que terminen', status=429
+        )
+
+    validar, _ = TIPOS[tipo]
+    validar(user, parametros)
+    return ExportJob.objects.create(user=user, tipo=tipo, parametros=parametros)
+
+
+def obtener_trabajo(trabajo_id, user):
+    from investigaciones.models import ExportJob
+
+    trabajo = ExportJob.objects.filter(pk=trabajo_id, user=user).first()
+    if trabajo is None:
+        raise TrabajoError('Trabajo no encontrado', status=404)
+    return trabajo
+
+
+def cancelar_trabajo(trabajo):
+    """
+    Los pendientes y terminados se borran de inmediato. Uno en proceso se marca
+    CANCELADO: el worker lo detecta en su siguiente avance y descarta lo escrito.
+    """
+    from investigaciones.models import ExportJob
+
+    if trabajo.estado == 'EN_PROCESO':
+        ExportJob.objects.filter(pk=trabajo.pk, estado='EN_PROCESO').update(
+            estado='CANCELADO', expira_en=timezone.now(), updated_at=timezone.now()
+        )
+        return
+    _borrar_resultado(trabajo)
+    trabajo.delete()
+
+
+def nombre_worker():
+    return f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+
+def _bloquear_cola():
+    """
+    Bloquea hasta el fin de la transacción una fila que siempre existe (el
+    ContentType de ExportJob): así el conteo de EN_PROCESO y la reserva de
+    tomar_siguiente no se intercalan entre workers.
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    list(
+        ContentType.objects.select_for_update()
+        .filter(app_label='investigaciones', model='exportjob')
+        .values_list('pk', flat=True)
+    )
+
+
+def tomar_siguiente(worker):
+    """
+    Reserva el pendiente más antiguo para `worker`, o None si no hay o si ya se
+    alcanzó EXPORTACIONES_CONCURRENTES. La cola se bloquea mientras se cuenta y
+    se reserva, para que dos workers no pasen el tope a la vez.
+    """
+    from investigaciones.models import ExportJob
+
+    with transaction.atomic():
+        _bloquear_cola()
+        if ExportJob.objects.filter(estado='EN_PROCESO').count() >= settings.EXPORTACIONES_CONCURRENTES:
+            return None
+        trabajo = (
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .filter(estado='PENDIENTE')
+            .order_by('created_at')
+            .first()
+        )
+        if trabajo is None:
+            return None
+        trabajo.estado = 'EN_PROCESO'
+        trabajo.worker = worker
+        trabajo.intentos += 1
+        trabajo.procesados = 0
+        trabajo.iniciado_en = timezone.now()
+        trabajo.save(update_fields=[
+            'estado', 'worker', 'intentos', 'procesados', 'iniciado_en', 'updated_at'
+        ])
+    return trabajo
+
+
+class _Progreso:
+    """Lleva la cuenta de registros y la guarda (a lo más una vez por segundo) como latido."""
+
+    def __init__(self, trabajo):
+        self.trabajo = trabajo
+        self.procesados = 0
+        self._guardado_en = 0
+
+    def _guardar(self, **campos):
+        from investigaciones.models import ExportJob
+
+        actualizados = ExportJob.objects.filter(
+            pk=self.trabajo.pk, estado='EN_PROCESO', worker=self.trabajo.worker
+        ).update(updated_at=timezone.now(), **campos)
+        if not actualizados:
+            raise _Interrumpido()
+        self._guardado_en = time.monotonic()
+
+    def total(self, total):
+        self._guardar(total=total)
+
+    def contar(self, registros):
+        for registro in registros:
+            yield registro
+            self.procesados += 1
+            if time.monotonic() - self._guardado_en >= INTERVALO_PROGRESO_SEGUNDOS:
+                self._guardar(procesados=self.procesados)
+
+
+def ejecutar(trabajo):
+    """Procesa un trabajo ya reservado con tomar_siguiente()."""
+    _, ejecutar_tipo = TIPOS[trabajo.tipo]
+    progreso = _Progreso(trabajo)
+    ruta = ruta_resultado(trabajo)
+    temporal = f"{ruta}.part"
+    os.makedirs(settings.EXPORTACIONES_DIR, exist_ok=True)
+
+    try:
+        with open(temporal, 'wb') as destino:
+            nombre = ejecutar_tipo(trabajo, destino, progreso)
+        os.replace(temporal, ruta)
+    except _Interrumpido:
+        _borrar(temporal)
+        return
+    except Exception as e:
+        logger.exception("Falló el trabajo %s (%s)", trabajo.pk, trabajo.tipo)
+        _borrar(temporal)
+        _terminar(trabajo, estado='ERROR', error=str(e)[:1000])
+        return
+
+    if not _terminar(trabajo, estado='TERMINADO', archivo=os.path.basename(ruta),
+                     nombre_archivo=nombre, procesados=progreso.procesados):
+        _borrar(ruta)
+
+
+def _terminar(trabajo, **campos):
+    from investigaciones.models import ExportJob
+
+    ahora = timezone.now()
+    return ExportJob.objects.filter(
+        pk=trabajo.pk, estado='EN_PROCESO', worker=trabajo.worker
+    ).update(
+        terminado_en=ahora, updated_at=ahora,
+        expira_en=ahora + timedelta(hours=settings.EXPORTACIONES_EXPIRACION_HORAS),
+        **campos
+    )
+
+
+# --- Mantenimiento ----------------------------------------------------------
+
+def reencolar_abandonados():
+    """
+    Trabajos EN_PROCESO sin latido (el worker murió o se reinició): vuelven a
+    PENDIENTE, o pasan a ERROR si ya agotaron EXPORTACIONES_INTENTOS.
+    """
+    from investigaciones.models import ExportJob
+
+    ahora = timezone.now()
+    abandonados = ExportJob.objects.filter(
+        estado='EN_PROCESO',
+        updated_at__lt=ahora - timedelta(minutes=settings.EXPORTACIONES_SIN_LATIDO_MINUTOS),
+    )
+    fallidos = abandonados.filter(intentos__gte=settings.EXPORTACIONES_INTENTOS).update(
+        estado='ERROR', error='El trabajo se interrumpió demasiadas veces', worker='',
+        terminado_en=ahora, updated_at=ahora,
+        expira_en=ahora + timedelta(hours=settings.EXPORTACIONES_EXPIRACION_HORAS),
+    )
+    reencolados = abandonados.update(estado='PENDIENTE', worker='', procesados=0, updated_at=ahora)
+    return reencolados, fallidos
+
+
+def limpiar_expirados():
+    """Borra los trabajos (y su archivo) cuya vigencia ya terminó."""
+    from investigaciones.models import ExportJob
+
+    expirados = ExportJob.objects.filter(expira_en__lt=timezone.now()).exclude(estado='EN_PROCESO')
+    total = 0
+    for trabajo in expirados.iterator():
+        _borrar_resultado(trabajo)
+        trabajo.delete()
+        total += 1
+    return total
+
+
+def _borrar_resultado(trabajo):
+    ruta = ruta_resultado(trabajo)
+    _borrar(ruta)
+    _borrar(f"{ruta}.part")
+
+
+def _borrar(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
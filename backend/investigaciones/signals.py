@@ -1,8 +1,15 @@
-from django.db.models.signals import pre_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete, post_init, m2m_changed
 from django.dispatch import receiver
 import os
 from django.conf import settings
-from .models import CatalogoInvestigador
+from django.db import transaction
+from .models import CatalogoInvestigador, DocumentoInvestigacion, Investigacion, Investigador
+from .services.almacenamiento import liberar_contenido
+from .services.miniaturas import programar_miniatura_al_subir
+from .services.padron import invalidar_padron
+from .services.dashboard import invalidar_dashboard_usuario, invalidar_investigaciones
+from django.contrib.auth.models import Group, User
+from login_register.models import Profile
 
 @receiver(post_delete, sender=CatalogoInvestigador)
 def delete_constancia_on_delete(sender, instance, **kwargs):
@@ -13,4 +20,75 @@ def delete_constancia_on_delete(sender, instance, **kwargs):
         if os.path.isfile(instance.archivo_constancia.path):
             os.remove(instance.archivo_constancia.path)
 
+@receiver(post_delete, sender=DocumentoInvestigacion)
+def liberar_blob_documento(sender, instance, **kwargs):
+    """
+    Resta la referencia al contenido del documento (también en borrados en cascada).
+    Se difiere al commit para no borrar archivos de una transacción revertida.
+    """
+    if instance.blob_id:
+        transaction.on_commit(lambda: liberar_contenido(instance.blob_id))
+
+@receiver(post_save, sender=DocumentoInvestigacion)
+def miniatura_documento(sender, instance, created, **kwargs):
+    """Pre-genera la vista previa en segundo plano para que el expediente cargue sin el PDF."""
+    if created and instance.archivo:
+        path = instance.archivo.path
+        transaction.on_commit(lambda: programar_miniatura_al_subir(path))
+
+@receiver(post_save, sender=CatalogoInvestigador)
+def miniaturas_investigador(sender, instance, **kwargs):
+    for archivo in (instance.archivo_constancia, instance.archivo_responsiva):
+        if archivo:
+            path = archivo.path
+            transaction.on_commit(lambda path=path: programar_miniatura_al_subir(path))
+
+
+# --- Padrón de investigadores por región (services/padron.py) ---
+
+def _invalidar_padron_al_confirmar():
+    transaction.on_commit(invalidar_padron)
+
+@receiver(post_save, sender=CatalogoInvestigador)
+@receiver(post_delete, sender=CatalogoInvestigador)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Profile)
+def invalidar_padron_investigadores(sender, **kwargs):
+    _invalidar_padron_al_confirmar()
+
+@receiver(post_init, sender=Profile)
+def recordar_ficha_perfil(sender, instance, **kwargs):
+    instance._ficha_padron = instance.ficha
+
+@receiver(post_save, sender=Profile)
+def invalidar_padron_por_ficha(sender, instance, created, **kwargs):
+    # El perfil se guarda con cada guardado del User (p. ej. last_login al iniciar sesión);
+    # solo importa si cambió la ficha
+    if created or instance.ficha != instance._ficha_padron:
+        instance._ficha_padron = instance.ficha
+        _invalidar_padron_al_confirmar()
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidar_padron_por_grupos(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _invalidar_padron_al_confirmar()
+
+
+# --- Dashboards de usuario en caché (services/dashboard.py) ---
+
+@receiver(post_save, sender=Investigacion)
+@receiver(post_delete, sender=Investigacion)
+@receiver(post_save, sender=Investigador)
+@receiver(post_delete, sender=Investigador)
+@receiver(post_save, sender=CatalogoInvestigador)
+@receiver(post_delete, sender=CatalogoInvestigador)
+def invalidar_dashboards(sender, **kwargs):
+    transaction.on_commit(invalidar_investigaciones)
 
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidar_dashboard_perfil(sender, instance, **kwargs):
+    # Se guarda con cada guardado del User: cubre nombre, email y foto
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidar_dashboard_usuario(user_id))
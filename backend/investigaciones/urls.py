@@ -9,8 +9,17 @@ router.register(r'documentos', views.DocumentoInvestigacionViewSet, basename='do
 urlpatterns = [
     path('', include(router.urls)),
     
+    path('cargas/', views.cargas_view, name='cargas'),
+    path('cargas/<uuid:carga_id>/', views.carga_detalle_view, name='carga-detalle'),
+    path('trabajos/', views.trabajos_view, name='trabajos'),
+    path('trabajos/<uuid:trabajo_id>/', views.trabajo_detalle_view, name='trabajo-detalle'),
+    path('trabajos/<uuid:trabajo_id>/descargar/', views.trabajo_descargar_view, name='trabajo-descargar'),
+    path('documentos-resumen/', views.documentos_resumen_view, name='documentos-resumen'),
+    path('form-bootstrap/', views.form_bootstrap_view, name='form-bootstrap'),
     path('opciones/', views.opciones_view, name='investigacion-opciones'),
     path('buscar-empleado/', views.buscar_empleado_view, name='buscar-empleado'),
+    path('pemex/estado/', views.estado_pemex_view, name='estado-pemex'),
+    path('catalogos-rh/', views.catalogos_rh_view, name='catalogos-rh'),
     path('centros-trabajo/', views.centros_trabajo_view, name='centros-trabajo'),
     path('centros-coduni/', views.centros_coduni_view, name='centros-coduni'),
     path('areas-por-centro/', views.areas_por_centro_view, name='areas-por-centro'),
@@ -22,4 +31,5 @@ urlpatterns = [
     path('user-dashboard/<int:user_id>/list/', views.user_dashboard_list_view, name='user-dashboard-list'),
     path('buscar-personal/', views.buscar_personal_view, name='buscar-personal'),
     path('obtener-costo-plaza/', views.obtener_costo_plaza_view, name='obtener-costo-plaza'),
+    path('costo-plaza/catalogo/', views.catalogo_costo_plaza_view, name='catalogo-costo-plaza'),
 ]
\ No newline at end of file
@@ -1,22 +1,43 @@
 from django.shortcuts import render
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from rest_framework import viewsets, status
-from rest_framework.decorators import action, permission_classes, api_view
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.decorators import action, authentication_classes, permission_classes, api_view
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.response import Response
-from django.db import connections
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.utils import timezone
 from datetime import date
+import mimetypes
 from .permissions import IsAdminOrReadOnly
-from .models import Investigacion, Involucrado, InvestigacionHistorico, DocumentoInvestigacion, CatalogoInvestigador, InvestigacionSirhn
+from .models import ExportJob, Investigacion, Involucrado, InvestigacionHistorico, DocumentoInvestigacion, CatalogoInvestigador, InvestigacionSirhn
 from login_register.models import Profile
+from login_register.tokens import JWTAuthenticationSinConsulta, es_admin, ficha_usuario, roles_usuario
 from .serializers import (
     InvestigacionSerializer, InvestigacionListSerializer, 
     EmpleadoBusquedaSerializer, OpcionesSerializer,
     EstadisticasSerializer,
-    DocumentoInvestigacionSerializer
+    DocumentoInvestigacionSerializer, ExportJobSerializer
 )
 from auditoria.models import ActivityLog
+from bajas.permissions import EsSupervisorOAdmin
+from .services.archivos import registrar_descarga, servir_archivo_protegido
+from .services.exportacion import filas_investigaciones, generar_csv, xlsx_temporal
+from .services.miniaturas import responder_miniatura
+from .services.pemex import PemexNoDisponible, pemex_gateway
+from .services.catalogos_rh import catalogos_rh
+from .services.dashboard import dashboard_usuario
+from .services.formulario import bootstrap_formulario, investigadores_permitidos, opciones_formulario
+from .services.costo_plaza import NIVELES_CON_GRADO, catalogo_costo_plaza
+from .services.trabajos import (
+    TrabajoError, cancelar_trabajo, encolar, obtener_trabajo, ruta_resultado
+)
+from .services.cargas import (
+    CargaError, crear_carga, agregar_fragmento, obtener_carga,
+    archivo_de_carga, descartar_carga
+)
 
 class DocumentoInvestigacionViewSet(viewsets.ModelViewSet):
     queryset = DocumentoInvestigacion.objects.all()
@@ -29,16 +50,194 @@ class DocumentoInvestigacionViewSet(viewsets.ModelViewSet):
         investigacion_id = self.request.query_params.get('investigacion_id')
         if investigacion_id:
             queryset = queryset.filter(investigacion_id=investigacion_id)
+
+        # Varias investigaciones en una sola petición: ?investigacion_id__in=1,2,3
+        investigacion_ids = self.request.query_params.get('investigacion_id__in')
+        if investigacion_ids is not None:
+            queryset = queryset.filter(investigacion_id__in=parse_id_list(investigacion_ids))
         return queryset
 
     def perform_create(self, serializer):
         # Asegurar que se guarde
         serializer.save()
 
+    @action(detail=True, methods=['get'])
+    def descargar(self, request, pk=None):
+        """Sirve el archivo con soporte de ETag/304 y Range (vista previa de PDFs)."""
+        documento = self.get_object()
+        if not documento.archivo:
+            return Response(status=404)
+        nombre = documento.get_nombre_archivo()
+        return servir_archivo_protegido(
+            request, documento.archivo.path, filename=nombre,
+            as_attachment=request.query_params.get('attachment') == 'true',
+            descripcion_log=f"Descarga de documento {documento.tipo}: {nombre}"
+        )
+
+    @action(detail=True, methods=['get'])
+    def miniatura(self, request, pk=None):
+        """Miniatura de la primera página (?ancho=160|320|640&formato=webp|png)."""
+        documento = self.get_object()
+        if not documento.archivo:
+            return Response(status=404)
+        return responder_miniatura(request, documento.archivo.path)
+
+    @action(detail=False, methods=['post'], url_path='desde-carga', parser_classes=[JSONParser, FormParser])
+    def desde_carga(self, request):
+        """
+        Paso final de una carga por fragmentos: crea el documento con el archivo ensamblado.
+        Body: carga_id, investigacion_id, tipo, descripcion (opcional)
+        """
+        try:
+            carga = obtener_carga(request.data.get('carga_id'), request.user)
+            with archivo_de_carga(carga) as archivo:
+                serializer = self.get_serializer(data={
+                    'investigacion_id': request.data.get('investigacion_id'),
+                    'tipo': request.data.get('tipo'),
+                    'descripcion': request.data.get('descripcion', ''),
+                    'archivo': archivo,
+                })
+                serializer.is_valid(raise_exception=True)
+                self.perform_create(serializer)
+        except CargaError as e:
+            return Response({'error': e.mensaje}, status=e.status)
+
+        descartar_carga(carga)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def cargas_view(request):
+    """
+    Inicia una carga por fragmentos.
+    Body: nombre, tamano (bytes totales). Respuesta: id y offset (0).
+    """
+    try:
+        carga = crear_carga(request.user, request.data.get('nombre'), request.data.get('tamano'))
+    except CargaError as e:
+        return Response({'error': e.mensaje}, status=e.status)
+    return Response(
+        {'id': str(carga.id), 'offset': carga.offset, 'tamano_total': carga.tamano_total},
+        status=status.HTTP_201_CREATED
+    )
+
+@api_view(['GET', 'PATCH', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def carga_detalle_view(request, carga_id):
+    """
+    GET: offset recibido hasta ahora (para reanudar).
+    PATCH: agrega un fragmento; cuerpo binario con encabezado Upload-Offset.
+    DELETE: cancela la carga y borra el temporal.
+    """
+    try:
+        if request.method == 'PATCH':
+            carga = agregar_fragmento(
+                carga_id, request.user,
+                request.META.get('HTTP_UPLOAD_OFFSET'),
+                request.stream,
+                request.META.get('CONTENT_LENGTH'),
+            )
+        else:
+            carga = obtener_carga(carga_id, request.user)
+            if request.method == 'DELETE':
+                descartar_carga(carga)
+                return Response(status=status.HTTP_204_NO_CONTENT)
+    except CargaError as e:
+        return Response({'error': e.mensaje}, status=e.status)
+
+    response = Response({
+        'id': str(carga.id),
+        'offset': carga.offset,
+        'tamano_total': carga.tamano_total,
+        'completa': carga.offset == carga.tamano_total,
+    })
+    response['Upload-Offset'] = str(carga.offset)
+    return response
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def trabajos_view(request):
+    """
+    GET: últimos trabajos en segundo plano del usuario.
+    POST: encola un trabajo. Body: tipo ('investigaciones' u 'oficios') y parametros
+    (los mismos filtros que la exportación / el lote de oficios). Responde 202;
+    el avance se consulta en trabajos/<id>/ y el resultado en trabajos/<id>/descargar/.
+    """
+    if request.method == 'GET':
+        trabajos = ExportJob.objects.filter(user=request.user)[:50]
+        return Response(ExportJobSerializer(trabajos, many=True).data)
+
+    # El lote de oficios en segundo plano exige el mismo rol que generar-oficios-lote/
+    permiso_oficios = EsSupervisorOAdmin()
+    if request.data.get('tipo') == 'oficios' and not permiso_oficios.has_permission(request, None):
+        return Response({'error': permiso_oficios.message}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        trabajo = encolar(request.user, request.data.get('tipo'), request.data.get('parametros') or {})
+    except TrabajoError as e:
+        return Response({'error': e.mensaje}, status=e.status)
+    return Response(ExportJobSerializer(trabajo).data, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def trabajo_detalle_view(request, trabajo_id):
+    """GET: estado y avance. DELETE: cancela o descarta el resultado."""
+    try:
+        trabajo = obtener_trabajo(trabajo_id, request.user)
+    except TrabajoError as e:
+        return Response({'error': e.mensaje}, status=e.status)
+    if request.method == 'DELETE':
+        cancelar_trabajo(trabajo)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(ExportJobSerializer(trabajo).data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def trabajo_descargar_view(request, trabajo_id):
+    try:
+        trabajo = obtener_trabajo(trabajo_id, request.user)
+    except TrabajoError as e:
+        return Response({'error': e.mensaje}, status=e.status)
+    if trabajo.estado != 'TERMINADO':
+        return Response({'error': 'El trabajo aún no termina', 'estado': trabajo.estado}, status=409)
+    return servir_archivo_protegido(
+        request, ruta_resultado(trabajo), filename=trabajo.nombre_archivo,
+        content_type=mimetypes.guess_type(trabajo.nombre_archivo)[0],
+        as_attachment=True, descripcion_log=f"Descarga de {trabajo.nombre_archivo}", offload=False,
+    )
+
+def parse_id_list(value):
+    """Convierte '1,2,3' en [1, 2, 3], ignorando valores no numéricos."""
+    return [int(v) for v in (value or '').split(',') if v.strip().isdigit()]
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def documentos_resumen_view(request):
+    """
+    Tipos de documento cargados por investigación, para varias investigaciones
+    en una sola consulta.
+    Params: investigacion_id__in=1,2,3
+    Respuesta: {"1": ["Reporte", "Dictamen"], "2": [], ...}
+    """
+    ids = parse_id_list(request.query_params.get('investigacion_id__in'))
+    if not ids:
+        return Response({'error': 'Se requiere el parámetro investigacion_id__in'}, status=400)
+
+    resumen = {str(i): [] for i in ids}
+    filas = DocumentoInvestigacion.objects.filter(
+        investigacion_id__in=ids
+    ).values_list('investigacion_id', 'tipo').distinct().order_by('investigacion_id', 'tipo')
+
+    for investigacion_id, tipo in filas:
+        resumen[str(investigacion_id)].append(tipo)
+
+    return Response(resumen)
+
 class InvestigacionViewSet(viewsets.ModelViewSet):
     serializer_class = InvestigacionSerializer
     queryset = Investigacion.objects.all()
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]  
+    authentication_classes = [JWTAuthenticationSinConsulta]
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -95,16 +294,49 @@ class InvestigacionViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return get_investigaciones_for_user(self.request.user, self.request.query_params)
 
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exporta las investigaciones visibles para el usuario (mismos filtros que el listado,
+        más ?estatus=) como ?formato=csv (por defecto, se transmite fila a fila) o xlsx.
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in ('csv', 'xlsx'):
+            return Response({'error': 'Formato no soportado (csv o xlsx)'}, status=400)
+
+        queryset = self.get_queryset()
+        estatus = request.query_params.get('estatus')
+        if estatus:
+            queryset = queryset.filter(estatus=estatus)
+
+        nombre = f"Investigaciones_{date.today():%Y%m%d}.{formato}"
+        filas = filas_investigaciones(queryset)
+        registrar_descarga(request, f"Exportación de investigaciones ({formato})")
+
+        if formato == 'csv':
+            response = StreamingHttpResponse(generar_csv(filas), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+            return response
+
+        try:
+            archivo = xlsx_temporal(filas)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return FileResponse(
+            archivo, as_attachment=True, filename=nombre,
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+
 def get_investigaciones_for_user(user, query_params=None):
     queryset = Investigacion.objects.all()
     
     if user.is_authenticated:
         # 1. Admin / Superuser
-        if user.is_superuser or user.groups.filter(name__in=['Admin', 'AdminCentral']).exists():
+        if es_admin(user):
             pass # Retornar todo
 
         else:
-            groups = list(user.groups.values_list('name', flat=True))
+            groups = roles_usuario(user)
             
             # Identificar roles
             is_supervisor = any(g.startswith('Supervisor') for g in groups)
@@ -129,8 +361,9 @@ def get_investigaciones_for_user(user, query_params=None):
             
             elif is_operador:
                 # Operador: Solo ve donde es investigador asignado (siempre es "personal" implicitamente)
-                if hasattr(user, 'profile') and user.profile.ficha:
-                    queryset = queryset.filter(investigadores__ficha=user.profile.ficha)
+                ficha = ficha_usuario(user)
+                if ficha:
+                    queryset = queryset.filter(investigadores__ficha=ficha)
                 else:
                     queryset = queryset.none()
             
@@ -151,10 +384,10 @@ def get_investigaciones_for_user(user, query_params=None):
         target_user_id = query_params.get('target_user_id')
         target_ficha = query_params.get('target_ficha')
 
-        if target_user_id and (user.is_superuser or user.groups.filter(name__in=['Admin', 'AdminCentral']).exists() or str(user.id) == str(target_user_id)):
+        if target_user_id and (es_admin(user) or str(user.id) == str(target_user_id)):
             queryset = queryset.filter(created_by_id=target_user_id)
         
-        if target_ficha and (user.is_superuser or user.groups.filter(name__in=['Admin', 'AdminCentral']).exists() or (hasattr(user, 'profile') and user.profile.ficha == target_ficha)):
+        if target_ficha and (es_admin(user) or ficha_usuario(user) == target_ficha):
             queryset = queryset.filter(investigadores__ficha=target_ficha)
 
         if gravedad:
@@ -179,6 +412,7 @@ from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User
 
 @api_view(['GET'])
+@authentication_classes([JWTAuthenticationSinConsulta])
 @permission_classes([IsAuthenticated])
 def user_dashboard_view(request, user_id):
     """
@@ -187,91 +421,15 @@ def user_dashboard_view(request, user_id):
     - Info laboral (tablero, antecedentes)
     - Status como investigador (constancia)
     - Estadísticas de sus investigaciones (según sus permisos)
+    La respuesta sale de caché por usuario (services/dashboard.py).
     """
-    target_user = get_object_or_404(User, pk=user_id)
-    
-    # 1. Info Básica
-    user_data = {
-        'id': target_user.id,
-        'username': target_user.username,
-        'email': target_user.email,
-        'first_name': target_user.first_name,
-        'last_name': target_user.last_name,
-        'groups': list(target_user.groups.values_list('name', flat=True)),
-        'ficha': getattr(target_user.profile, 'ficha', None),
-        'profile_picture': None
-    }
-    if hasattr(target_user, 'profile') and target_user.profile.profile_picture:
-         user_data['profile_picture'] = request.build_absolute_uri(target_user.profile.profile_picture.url)
-
-    # 2. Info Laboral (Si tiene ficha)
-    empleado_data = None
-    if user_data['ficha']:
-        try:
-             with connections['pemex'].cursor() as cursor:
-                cursor.execute(
-                    "SELECT ficha, nombres, nivel_plaza, catego, mc_stext, edad, antig, rfc + homoclave as rfc, curp, direccion_coduni, grupo, jorna, sec_sin FROM [00_tablero_dg] WHERE ficha = %s", 
-                    [user_data['ficha']]
-                )
-                row = cursor.fetchone()
-                if row:
-                    empleado_data = {
-                        'nombre': row[1],
-                        'nivel': row[2],
-                        'categoria': row[3],
-                        'puesto': row[4],
-                        'edad': row[5],
-                        'antiguedad': row[6],
-                        'direccion': row[9],
-                        'regimen': row[10],
-                        'sindicato': "STPRM" if row[12] else ""
-                    }
-        except Exception as e:
-            print(f"Error fetching empleado info: {e}")
-
-    # 3. Status Investigador
-    investigador_data = {'es_investigador': False, 'no_constancia': None}
-    if user_data['ficha']:
-        try:
-            inv = CatalogoInvestigador.objects.get(ficha=user_data['ficha'], activo=True)
-            
-            responsiva_name = None
-            if inv.archivo_responsiva and inv.archivo_responsiva.name:
-                import os
-                # Extract filename from path (e.g. 'responsiva/file.pdf' -> 'file.pdf')
-                basename = os.path.basename(inv.archivo_responsiva.name)
-                # Remove extension to match frontend logic (which appends .pdf)
-                responsiva_name = os.path.splitext(basename)[0]
-
-            investigador_data = {
-                'es_investigador': True,
-                'no_constancia': inv.no_constancia,
-                'responsiva': responsiva_name
-            }
-        except CatalogoInvestigador.DoesNotExist:
-            pass
+    datos = dashboard_usuario(user_id)
+    if datos is None:
+        raise Http404
 
-    inv_queryset = get_investigaciones_for_user(target_user, query_params={'personal': 'true'})
-    
-    total = inv_queryset.count()
-    concluidas = inv_queryset.filter(estatus='CONCLUIDA').count()
-    # En proceso: todas las que NO están concluidas
-    en_proceso = inv_queryset.exclude(estatus='CONCLUIDA').count()
-    coadyuvadas = inv_queryset.filter(es_coadyuvancia=True).count()
-
-    stats = {
-        'total': total,
-        'en_proceso': en_proceso,
-        'concluidas': concluidas,
-        'coadyuvadas': coadyuvadas
-    }
-
-    return Response({
-        'user': user_data,
-        'empleado': empleado_data,
-        'investigador': investigador_data,
-        'stats': stats
-    })
+    if datos['user']['profile_picture']:
+        datos['user']['profile_picture'] = request.build_absolute_uri(datos['user']['profile_picture'])
+    return Response(datos)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -308,52 +466,35 @@ def validar_investigador_view(request):
         }, status=404)
 
 @api_view(['GET'])
+@authentication_classes([JWTAuthenticationSinConsulta])
 @permission_classes([IsAuthenticated])
 def listar_investigadores_view(request):
     """
     Devuelve lista de investigadores activos {ficha, nombre}
     Filtrado por región si el usuario es Supervisor
     """
-    user = request.user
-    queryset = CatalogoInvestigador.objects.filter(activo=True)
+    return Response(investigadores_permitidos(request.user))
 
-    # Lógica de filtrado regional
-    if not (user.is_superuser or user.groups.filter(name__in=['Admin', 'AdminCentral']).exists()):
-        groups = list(user.groups.values_list('name', flat=True))
-        
-        supervisor_roles = [g for g in groups if g.startswith('Supervisor')]
-        if supervisor_roles:
-            role = supervisor_roles[0]
-            region = role.replace('Supervisor', '')
-          
-            try:
-                operador_group_name = f'Operador{region}'
-                users_operadores = User.objects.filter(groups__name=operador_group_name)
-                fichas_operadores = Profile.objects.filter(user__in=users_operadores).values_list('ficha', flat=True)
-                
-                queryset = queryset.filter(ficha__in=fichas_operadores)
-            except Exception as e:
-                # Si falla algo en la logica de grupos, retornamos vacio por seguridad
-                print(f"Error filtrando investigadores por region: {e}")
-                queryset = queryset.none()
-
-    data = queryset.values('ficha', 'nombre').order_by('nombre')
-    return Response(list(data))
+@api_view(['GET'])
+@authentication_classes([JWTAuthenticationSinConsulta])
+@permission_classes([IsAuthenticated])
+def form_bootstrap_view(request):
+    """
+    Datos iniciales de InvestigacionForm en una sola petición (opciones, centros de
+    trabajo, investigadores asignables), con ETag para revalidar desde el navegador.
+    Sin RH responde igual, con los centros vacíos y sin ETag.
+    """
+    version, datos = bootstrap_formulario(request.user)
+    if version is None:
+        return Response(datos)
+    return respuesta_catalogo(request, version, datos)
 
 @api_view(['GET'])
+@authentication_classes([JWTAuthenticationSinConsulta])
 @permission_classes([IsAuthenticated])
 def opciones_view(request):
     """Obtener todas las opciones para listas desplegables"""
-    opciones = {
-        'direcciones': [],
-        'procedencias': [choice[0] for choice in Investigacion.PROCEDENCIA_CHOICES],
-        'regimenes': [],
-        'sindicatos': [choice[0] for choice in Investigacion.SINDICATO_CHOICES],
-        'gravedades': [choice[0] for choice in Investigacion.GRAVEDAD_CHOICES],
-        'gerencias': [choice[0] for choice in Investigacion.GERENCIA_CHOICES],
-        'conductas': [choice[0] for choice in Investigacion.CONDUCTAS_CHOICES],
-        'sancion': [choice[0] for choice in Investigacion.SANCION_CHOICES],
-    }
+    opciones = opciones_formulario()
     serializer = OpcionesSerializer(opciones)
     return Response(serializer.data)
 
@@ -400,78 +541,72 @@ def buscar_empleado_view(request):
     try:
         empleado_data = None
 
-        with connections['pemex'].cursor() as cursor:
+        row = pemex_gateway.consultar_uno("""
+            SELECT ficha, nombres, nivel_plaza, catego, mc_stext, edad, antig,
+                   rfc + homoclave as rfc, curp, direccion_coduni,
+                   grupo, jorna, sec_sin, termino, cve_desc_centro, subdireccion_coduni, regional
+            FROM [00_tablero_dg]
+            WHERE ficha = %s
+        """, [ficha_buscada])
+
+        if row:
+            termino_raw = str(row[13])
+            empleado_data = {
+                'ficha': row[0],
+                'nombre': row[1],
+                'nivel': row[2],
+                'categoria': row[3],
+                'puesto': row[4],
+                'edad': row[5],
+                'antiguedad': row[6],
+                'rfc': row[7],
+                'curp': row[8],
+                'direccion': row[9],
+                'regimen': row[10],
+                'jornada': row[11],
+                'seccion_sindical': row[12],
+                'termino_raw': termino_raw,
+                'termino': f"{termino_raw[6:8]}/{termino_raw[4:6]}/{termino_raw[:4]}",  
+                'sindicato': "STPRM" if row[12] else "",
+                'centro_trabajo': row[14],
+                'subdireccion': row[15],
+                'regional': row[16],
+                'fuente': 'Activos'
+            }
 
-            cursor.execute("""
-                SELECT ficha, nombres, nivel_plaza, catego, mc_stext, edad, antig,
-                       rfc + homoclave as rfc, curp, direccion_coduni,
-                       grupo, jorna, sec_sin, termino, cve_desc_centro, subdireccion_coduni, regional
-                FROM [00_tablero_dg]
+        if not empleado_data:
+            row = pemex_gateway.consultar_uno("""
+                SELECT ficha, nombres, nivel_plaza, catego, edad, 
+                       rfc + homoclave as rfc, curp,
+                       grupo, jorna, fec_term, cve_desc_centro, regional
+                FROM [ultimo_contrato_activo]
                 WHERE ficha = %s
             """, [ficha_buscada])
 
-            row = cursor.fetchone()
-
             if row:
-                termino_raw = str(row[13])
+                termino_raw = str(row[9])
                 empleado_data = {
                     'ficha': row[0],
                     'nombre': row[1],
                     'nivel': row[2],
                     'categoria': row[3],
-                    'puesto': row[4],
-                    'edad': row[5],
-                    'antiguedad': row[6],
-                    'rfc': row[7],
-                    'curp': row[8],
-                    'direccion': row[9],
-                    'regimen': row[10],
-                    'jornada': row[11],
-                    'seccion_sindical': row[12],
+                    'puesto': "No disponible",
+                    'edad': row[4],
+                    'antiguedad': "0",
+                    'rfc': row[5],
+                    'curp': row[6],
+                    'direccion': "No disponible",
+                    'regimen': row[7],
+                    'jornada': row[8],
                     'termino_raw': termino_raw,
-                    'termino': f"{termino_raw[6:8]}/{termino_raw[4:6]}/{termino_raw[:4]}",  
-                    'sindicato': "STPRM" if row[12] else "",
-                    'centro_trabajo': row[14],
-                    'subdireccion': row[15],
-                    'regional': row[16],
-                    'fuente': 'Activos'
+                    'termino': f"{termino_raw[6:8]}/{termino_raw[4:6]}/{termino_raw[:4]}",
+                    'seccion_sindical': "No",
+                    'sindicato': "No",
+                    'centro_trabajo': row[10],
+                    'regional': row[11],
+                    'fuente': 'Ultimo contrato'
                 }
 
-            if not empleado_data:
-                cursor.execute("""
-                    SELECT ficha, nombres, nivel_plaza, catego, edad, 
-                           rfc + homoclave as rfc, curp,
-                           grupo, jorna, fec_term, cve_desc_centro, regional
-                    FROM [ultimo_contrato_activo]
-                    WHERE ficha = %s
-                """, [ficha_buscada])
-
-                row = cursor.fetchone()
-
-                if row:
-                    termino_raw = str(row[9])
-                    empleado_data = {
-                        'ficha': row[0],
-                        'nombre': row[1],
-                        'nivel': row[2],
-                        'categoria': row[3],
-                        'puesto': "No disponible",
-                        'edad': row[4],
-                        'antiguedad': "0",
-                        'rfc': row[5],
-                        'curp': row[6],
-                        'direccion': "No disponible",
-                        'regimen': row[7],
-                        'jornada': row[8],
-                        'termino_raw': termino_raw,
-                        'termino': f"{termino_raw[6:8]}/{termino_raw[4:6]}/{termino_raw[:4]}",
-                        'seccion_sindical': "No",
-                        'sindicato': "No",
-                        'centro_trabajo': row[10],
-                        'regional': row[11],
-                        'fuente': 'Ultimo contrato'
-                    }
-
         if not empleado_data:
             return Response({'error': 'Empleado no encontrado'}, status=404)
 
@@ -519,33 +654,73 @@ def buscar_empleado_view(request):
 
         return Response(empleado_data)
 
+    except PemexNoDisponible as e:
+        return Response({'error': str(e)}, status=503)
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
 
 @api_view(['GET'])
-@permission_classes([AllowAny])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def estado_pemex_view(request):
+    """Estado del circuito y métricas de las consultas al directorio de RH (este proceso)."""
+    return Response(pemex_gateway.metricas())
+
+
+def respuesta_catalogo(request, version, datos):
+    """Respuesta con ETag = versión del catálogo; 304 si el navegador ya la tiene."""
+    etag = quote_etag(version)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    response = Response(datos)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    return response
+
+def _catalogos_rh_o_error():
+    try:
+        return catalogos_rh.todo(), None
+    except PemexNoDisponible as e:
+        return None, Response({'error': str(e)}, status=503)
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthenticationSinConsulta])
+@permission_classes([IsAuthenticated])
+def catalogos_rh_view(request):
+    """
+    Centros de trabajo y centros CODUNI con su `version`, para guardarlos en el navegador
+    (las áreas se piden por centro en areas-por-centro/). Sale de la copia local, no de RH.
+    """
+    catalogo, error = _catalogos_rh_o_error()
+    if error:
+        return error
+    version, datos = catalogo
+    return respuesta_catalogo(request, version, {
+        'version': version,
+        'centros_trabajo': datos['centros_trabajo'],
+        'centros_coduni': datos['centros_coduni'],
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
 def centros_trabajo_view(request):
     """Obtener lista de centros de trabajo"""
-    try:
-        with connections['pemex'].cursor() as cursor:
-            cursor.execute("SELECT DISTINCT cve_desc_centro FROM [00_tablero_dg] WHERE cve_desc_centro IS NOT NULL ORDER BY cve_desc_centro")
-            centros = [row[0] for row in cursor.fetchall() if row[0]]
-            return Response(centros)
-    except Exception as e:
-        return Response({'error': str(e)}, status=500)
+    catalogo, error = _catalogos_rh_o_error()
+    if error:
+        return error
+    version, datos = catalogo
+    return respuesta_catalogo(request, version, datos['centros_trabajo'])
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def centros_coduni_view(request):
     """Obtener lista de centros desde CODUNI_l"""
-    try:
-        with connections['pemex'].cursor() as cursor:
-            cursor.execute("SELECT DISTINCT DESC_CDET FROM CODUNI_l WHERE DESC_CDET IS NOT NULL ORDER BY DESC_CDET")
-            centros = [row[0] for row in cursor.fetchall() if row[0]]
-            return Response(centros)
-    except Exception as e:
-        return Response({'error': str(e)}, status=500)
+    catalogo, error = _catalogos_rh_o_error()
+    if error:
+        return error
+    version, datos = catalogo
+    return respuesta_catalogo(request, version, datos['centros_coduni'])
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -556,16 +731,11 @@ def areas_por_centro_view(request):
     if not centro:
         return Response({'error': 'Se requiere el parámetro centro'}, status=400)
     
-    try:
-        with connections['pemex'].cursor() as cursor:
-            cursor.execute(
-                "SELECT DISTINCT Desc_Depto FROM CODUNI_l WHERE DESC_CDET = %s AND Desc_Depto IS NOT NULL ORDER BY Desc_Depto",
-                [centro]
-            )
-            areas = [row[0] for row in cursor.fetchall() if row[0]]
-            return Response(areas)
-    except Exception as e:
-        return Response({'error': str(e)}, status=500)
+    catalogo, error = _catalogos_rh_o_error()
+    if error:
+        return error
+    version, datos = catalogo
+    return respuesta_catalogo(request, version, datos['areas'].get(centro.strip().upper(), []))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -582,29 +752,29 @@ def buscar_gerente_responsable_view(request):
         else:
             query_gerencia = f'GERENCIA REGIONAL DE RELACIONES LABORALES {gerencia_nombre}'
         
-        with connections['pemex'].cursor() as cursor:
-            cursor.execute("""
-                SELECT FICHA, NOMBRES, CATEGO, MC_STEXT, GERENCIA_CODUNI, NIVEL_PLAZA 
-                FROM [00_tablero_dg]
-                WHERE nivel_plaza = 44  
-                AND gerencia_coduni LIKE %s
-            """, [f'%{query_gerencia}%'])
-            
-            row = cursor.fetchone()
-            
-            if row:
-                return Response({
-                    'ficha': row[0],
-                    'nombre': row[1],
-                    'categoria': row[2],
-                    'puesto': row[3],
-                })
-            return Response({'error': 'No se encontró gerente nivel 44'}, status=404)
+        row = pemex_gateway.consultar_uno("""
+            SELECT FICHA, NOMBRES, CATEGO, MC_STEXT, GERENCIA_CODUNI, NIVEL_PLAZA 
+            FROM [00_tablero_dg]
+            WHERE nivel_plaza = 44  
+            AND gerencia_coduni LIKE %s
+        """, [f'%{query_gerencia}%'], cache_segundos=settings.PEMEX_CATALOGOS_CACHE_SEGUNDOS)
+        
+        if row:
+            return Response({
+                'ficha': row[0],
+                'nombre': row[1],
+                'categoria': row[2],
+                'puesto': row[3],
+            })
+        return Response({'error': 'No se encontró gerente nivel 44'}, status=404)
             
+    except PemexNoDisponible as e:
+        return Response({'error': str(e)}, status=503)
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
 @api_view(['GET'])
+@authentication_classes([JWTAuthenticationSinConsulta])
 @permission_classes([IsAuthenticated])
 def estadisticas_view(request):
     """Obtener estadísticas de investigaciones"""
@@ -613,7 +783,7 @@ def estadisticas_view(request):
     
     # Filtrar por usuario si no es superusuario
     if user.is_authenticated:
-        if not (user.groups.filter(name='Admin').exists() or user.is_superuser):
+        if not es_admin(user, 'Admin'):
             queryset = queryset.filter(created_by=user)
     
     hoy = date.today()
@@ -681,7 +851,7 @@ def user_dashboard_list_view(request, user_id):
     target_user = get_object_or_404(User, pk=user_id)
     
     # Validar permisos: Solo el propio usuario o Admins pueden ver esto
-    is_admin = request.user.is_superuser or request.user.groups.filter(name__in=['Admin', 'AdminCentral']).exists()
+    is_admin = es_admin(request.user)
     if request.user.id != target_user.id and not is_admin:
          return Response({'error': 'No tiene permiso para ver detalles de este usuario'}, status=403)
 
@@ -709,74 +879,73 @@ def buscar_personal_view(request):
     es_busqueda_ficha = query.isdigit()
     
     try:
-        with connections['pemex'].cursor() as cursor:
-            # 1. Búsqueda en Tablero (Activos)
-            if es_busqueda_ficha:
-                sql_activos = """
-                    SELECT ficha, nombres, nivel_plaza, catego, mc_stext, 'Activo' as estado
-                    FROM [00_tablero_dg]
-                    WHERE ficha = %s
-                """
-                params_activos = [query]
-            else:
-                # Búsqueda por nombre (fuzzy)
-                sql_activos = """
-                    SELECT ficha, nombres, nivel_plaza, catego, mc_stext, 'Activo' as estado
-                    FROM [00_tablero_dg]
-                    WHERE nombres LIKE %s
-                """
-                params_activos = [f'%{query}%']
-            
-            cursor.execute(sql_activos, params_activos)
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                resultados.append({
+        # 1. Búsqueda en Tablero (Activos)
+        if es_busqueda_ficha:
+            sql_activos = """
+                SELECT ficha, nombres, nivel_plaza, catego, mc_stext, 'Activo' as estado
+                FROM [00_tablero_dg]
+                WHERE ficha = %s
+            """
+            params_activos = [query]
+        else:
+            # Búsqueda por nombre (fuzzy)
+            sql_activos = """
+                SELECT ficha, nombres, nivel_plaza, catego, mc_stext, 'Activo' as estado
+                FROM [00_tablero_dg]
+                WHERE nombres LIKE %s
+            """
+            params_activos = [f'%{query}%']
+        
+        rows = pemex_gateway.consultar(sql_activos, params_activos)
+        
+        for row in rows:
+            resultados.append({
+                'ficha': row[0],
+                'nombre': row[1],
+                'nivel': row[2],
+                'categoria': row[3],
+                'puesto': row[4],
+                'estado': row[5],
+                'origen': 'Activos'
+            })
+
+        # 2. Búsqueda en Último Contrato (Inactivos/Transitorios)
+        # Solo si buscamos por ficha o si queremos buscar también en históricos por nombre
+        
+        if es_busqueda_ficha:
+            sql_inactivos = """
+                SELECT ficha, nombres, nivel_plaza, catego, 'Inactivo/Baja' as estado
+                FROM [ultimo_contrato_activo]
+                WHERE ficha = %s
+            """
+            params_inactivos = [query]
+        else:
+             sql_inactivos = """
+                SELECT ficha, nombres, nivel_plaza, catego, 'Inactivo/Baja' as estado
+                FROM [ultimo_contrato_activo]
+                WHERE nombres LIKE %s
+            """
+             params_inactivos = [f'%{query}%']
+
+        rows = pemex_gateway.consultar(sql_inactivos, params_inactivos)
+        
+        for row in rows:
+            # Evitar duplicados si ya apareció en activos (aunque raro con misma ficha, posible validación)
+            if not any(r['ficha'] == row[0] for r in resultados):
+                 resultados.append({
                     'ficha': row[0],
                     'nombre': row[1],
                     'nivel': row[2],
                     'categoria': row[3],
-                    'puesto': row[4],
-                    'estado': row[5],
-                    'origen': 'Activos'
+                    'puesto': 'No disponible', 
+                    'estado': row[4],
+                    'origen': 'Último Contrato'
                 })
-
-            # 2. Búsqueda en Último Contrato (Inactivos/Transitorios)
-            # Solo si buscamos por ficha o si queremos buscar también en históricos por nombre
-            
-            if es_busqueda_ficha:
-                sql_inactivos = """
-                    SELECT ficha, nombres, nivel_plaza, catego, 'Inactivo/Baja' as estado
-                    FROM [ultimo_contrato_activo]
-                    WHERE ficha = %s
-                """
-                params_inactivos = [query]
-            else:
-                 sql_inactivos = """
-                    SELECT ficha, nombres, nivel_plaza, catego, 'Inactivo/Baja' as estado
-                    FROM [ultimo_contrato_activo]
-                    WHERE nombres LIKE %s
-                """
-                 params_inactivos = [f'%{query}%']
-
-            cursor.execute(sql_inactivos, params_inactivos)
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                # Evitar duplicados si ya apareció en activos (aunque raro con misma ficha, posible validación)
-                if not any(r['ficha'] == row[0] for r in resultados):
-                     resultados.append({
-                        'ficha': row[0],
-                        'nombre': row[1],
-                        'nivel': row[2],
-                        'categoria': row[3],
-                        'puesto': 'No disponible', 
-                        'estado': row[4],
-                        'origen': 'Último Contrato'
-                    })
-        
+    
         return Response(resultados)
 
+    except PemexNoDisponible as e:
+        return Response({'error': str(e)}, status=503)
     except Exception as e:
         print(f"Error en buscar_personal_view: {e}")
         return Response({'error': str(e)}, status=500)
@@ -797,26 +966,35 @@ def obtener_costo_plaza_view(request):
         return Response({'error': 'Nivel y Jornada son requeridos'}, status=400)
 
     try:
-        query = "SELECT costo_anual FROM costo_plaza_anual WHERE Nivel = %s AND Jornada = %s"
-        params = [nivel, jornada]
-
-        # Lógica especial para niveles 44, 45, 46
-        if nivel in ['44', '45', '46']:
-            query += " AND grado = %s"
-            # Asumimos que si no envían grado, se busca como espacio en blanco o lo que requiera tu logica
-            params.append(grado if grado else '') 
-        
-        # Conexión explícita a la base de datos 'GAI'
-        with connections['default'].cursor() as cursor:
-            cursor.execute(query, params)
-            row = cursor.fetchone()
-            
-            if row:
-                return Response({'costo_anual': row[0]})
-            else:
-                # Si no encuentra exacto, podrías retornar 0 o un error
-                return Response({'costo_anual': 0, 'warning': 'No se encontró costo para esta combinación'})
+        # Catálogo en memoria: cambiar nivel/jornada en el formulario no consulta la BD
+        costo = catalogo_costo_plaza.obtener(nivel, jornada, grado)
+        if costo is not None:
+            return Response({'costo_anual': costo})
+        # Si no encuentra exacto, podrías retornar 0 o un error
+        return Response({'costo_anual': 0, 'warning': 'No se encontró costo para esta combinación'})
 
     except Exception as e:
         print(f"Error en obtener_costo_plaza_view: {e}")
-        return Response({'error': str(e)}, status=500)
\ No newline at end of file
+        return Response({'error': str(e)}, status=500)
+
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthenticationSinConsulta])
+@permission_classes([IsAuthenticated])
+def catalogo_costo_plaza_view(request):
+    """
+    Catálogo completo de costo_plaza_anual para calcular el costo en el navegador.
+    costos: {'nivel|jornada': costo} o {'nivel|jornada|grado': costo} para niveles_con_grado
+    (valores numéricos sin ceros a la izquierda, textos en mayúsculas).
+    """
+    try:
+        version, costos = catalogo_costo_plaza.todo()
+    except Exception as e:
+        print(f"Error en catalogo_costo_plaza_view: {e}")
+        return Response({'error': str(e)}, status=500)
+
+    return respuesta_catalogo(request, version, {
+        'version': version,
+        'niveles_con_grado': NIVELES_CON_GRADO,
+        'costos': costos,
+    })
\ No newline at end of file
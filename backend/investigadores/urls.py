@@ -9,7 +9,9 @@ router.register(r'management', views.InvestigadorViewSet, basename='investigador
 urlpatterns = [
     path('', include(router.urls)),
     path('constancias/<str:filename>/', views.serve_constancia, name='serve_constancia'),
+    path('constancias/<str:filename>/miniatura/', views.miniatura_constancia, name='miniatura_constancia'),
     path('check-constancia/<str:filename>/', views.check_constancia, name='check_constancia'),
     path('responsiva/<str:filename>/', views.serve_responsiva, name='serve_responsiva'),
+    path('responsiva/<str:filename>/miniatura/', views.miniatura_responsiva, name='miniatura_responsiva'),
     path('check-responsiva/<str:filename>/', views.check_responsiva, name='check_responsiva'),
 ]
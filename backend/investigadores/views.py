@@ -1,12 +1,12 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.http import HttpResponse, Http404, FileResponse
 from django.conf import settings
 import os
-from auditoria.models import ActivityLog
 from rest_framework import viewsets
 from investigaciones.models import CatalogoInvestigador
+from investigaciones.services.archivos import servir_archivo_protegido
+from investigaciones.services.miniaturas import responder_miniatura
 from .serializers import InvestigadorSerializer
 
 class InvestigadorViewSet(viewsets.ModelViewSet):
@@ -24,23 +24,16 @@ class InvestigadorViewSet(viewsets.ModelViewSet):
 @permission_classes([IsAuthenticated])
 def serve_constancia(request, filename):
     file_path = os.path.join(settings.MEDIA_ROOT, 'constancias', filename)
-    if not os.path.exists(file_path):
-        raise Http404("Constancia no encontrada")
-    
-    try:
-        ActivityLog.objects.create(
-            user=request.user,
-            action='DOWNLOAD',
-            endpoint=request.path,
-            method='GET',
-            description=f"Visualización/Descarga de constancia: {filename}",
-            ip_address=request.META.get('REMOTE_ADDR'),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')
-        )
-    except Exception:
-        pass
-        
-    return FileResponse(open(file_path, 'rb'), content_type='application/pdf')
+    return servir_archivo_protegido(
+        request, file_path, content_type='application/pdf',
+        descripcion_log=f"Visualización/Descarga de constancia: {filename}"
+    )
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def miniatura_constancia(request, filename):
+    file_path = os.path.join(settings.MEDIA_ROOT, 'constancias', filename)
+    return responder_miniatura(request, file_path)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -53,23 +46,16 @@ def check_constancia(request, filename):
 @permission_classes([IsAuthenticated])
 def serve_responsiva(request, filename):
     file_path = os.path.join(settings.MEDIA_ROOT, 'responsiva', filename)
-    if not os.path.exists(file_path):
-        raise Http404("Documento no encontrado")
-    
-    try:
-        ActivityLog.objects.create(
-            user=request.user,
-            action='DOWNLOAD',
-            endpoint=request.path,
-            method='GET',
-            description=f"Descarga de Responsiva: {filename}",
-            ip_address=request.META.get('REMOTE_ADDR'),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')
-        )
-    except Exception:
-        pass
-        
-    return FileResponse(open(file_path, 'rb'), content_type='application/pdf')
+    return servir_archivo_protegido(
+        request, file_path, content_type='application/pdf',
+        descripcion_log=f"Descarga de Responsiva: {filename}"
+    )
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def miniatura_responsiva(request, filename):
+    file_path = os.path.join(settings.MEDIA_ROOT, 'responsiva', filename)
+    return responder_miniatura(request, file_path)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
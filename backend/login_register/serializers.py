@@ -1,60 +1,78 @@
 from django.contrib.auth.models import User, Group
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
-from django.contrib.auth import authenticate
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.contrib.auth.models import update_last_login
+from django.contrib.auth.signals import user_login_failed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import claims_usuario
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Login por email o usuario. Una consulta trae usuario y perfil, la contraseña se
+    verifica una sola vez y roles, región, ficha y responsiva viajan como claims del token.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim, valor in claims_usuario(user).items():
+            token[claim] = valor
+        return token
+
     def validate(self, attrs):
         identifier = attrs.get("username")
         password = attrs.get("password")
 
+        campo = "email" if "@" in identifier else "username"
         try:
-            if "@" in identifier:
-                user = User.objects.get(email=identifier)
-            else:
-                user = User.objects.get(username=identifier)
+            user = User.objects.select_related("profile").get(**{campo: identifier})
         except User.DoesNotExist:
+            # Mismo costo de hash que con un usuario real (como ModelBackend)
+            User().set_password(password)
             raise serializers.ValidationError("Usuario o contraseña incorrectos")
 
-        user = authenticate(
-            username=user.username,
-            password=password
-        )
-
-        if not user:
+        if not user.check_password(password):
+            user_login_failed.send(sender=__name__, credentials={"username": identifier}, request=self.context.get("request"))
             raise serializers.ValidationError("Usuario o contraseña incorrectos")
 
         if not user.is_active:
             raise serializers.ValidationError("Usuario inactivo")
 
-        data = super().validate({
-            "username": user.username,
-            "password": password
-        })
+        refresh = self.get_token(user)
+        data = {"refresh": str(refresh), "access": str(refresh.access_token)}
 
-        # Validate Responsiva Status
-        missing_responsiva = False
-        try:
-            if hasattr(user, 'profile') and user.profile.ficha:
-                from investigaciones.models import CatalogoInvestigador
-                investigador = CatalogoInvestigador.objects.filter(ficha=user.profile.ficha, activo=True).first()
-                if investigador:
-                    if not investigador.archivo_responsiva:
-                        missing_responsiva = True
-        except Exception as e:
-            print(f"Error checking responsiva on login: {e}")
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
 
         data["user"] = {
             "id": user.id,
             "username": user.username,
             "email": user.email,
             "is_staff": user.is_staff,
-            "missing_responsiva": missing_responsiva
+            "missing_responsiva": refresh["responsiva_pendiente"]
         }
 
         return data
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh que vuelve a calcular los claims de autorización del nuevo access token."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data["access"])
+        try:
+            user = User.objects.select_related("profile").get(pk=access[api_settings.USER_ID_CLAIM], is_active=True)
+        except User.DoesNotExist:
+            raise serializers.ValidationError("Usuario inactivo")
+
+        for claim, valor in claims_usuario(user).items():
+            access[claim] = valor
+        data["access"] = str(access)
+        return data
+
 class GroupSerializer(serializers.ModelSerializer):
     class Meta:
         model = Group
@@ -77,6 +95,19 @@ class UserSerializer(serializers.ModelSerializer):
 
     missing_responsiva = serializers.SerializerMethodField()
 
+    def _investigador(self, obj):
+        """
+        CatalogoInvestigador activo de la ficha del usuario. En listados la vista manda
+        'investigadores_por_ficha' en el contexto (una consulta para todos los usuarios).
+        """
+        ficha = obj.profile.ficha if hasattr(obj, 'profile') else None
+        if not ficha:
+            return None
+        if 'investigadores_por_ficha' in self.context:
+            return self.context['investigadores_por_ficha'].get(ficha)
+        from investigaciones.models import CatalogoInvestigador
+        return CatalogoInvestigador.objects.filter(ficha=ficha, activo=True).first()
+
     def get_investigador(self, obj):
         # Fallback/Legacy check (if related_name exists)
         if hasattr(obj, 'investigador_profile'):
@@ -88,32 +119,23 @@ class UserSerializer(serializers.ModelSerializer):
             }
         
         # Correct lookup via Ficha
-        if hasattr(obj, 'profile') and obj.profile.ficha:
-            from investigaciones.models import CatalogoInvestigador
-            try:
-                inv = CatalogoInvestigador.objects.get(ficha=obj.profile.ficha, activo=True)
-                return {
-                    'id': inv.id,
-                    'no_constancia': inv.no_constancia,
-                    'activo': inv.activo,
-                    # We can't easily get full URL here without request context sometimes, but let's try
-                    'archivo_constancia': inv.archivo_constancia.url if inv.archivo_constancia else None
-                }
-            except CatalogoInvestigador.DoesNotExist:
-                return None
-        return None
+        inv = self._investigador(obj)
+        if inv is None:
+            return None
+        return {
+            'id': inv.id,
+            'no_constancia': inv.no_constancia,
+            'activo': inv.activo,
+            # We can't easily get full URL here without request context sometimes, but let's try
+            'archivo_constancia': inv.archivo_constancia.url if inv.archivo_constancia else None
+        }
 
  #comentada temporalmente para pruebas 
  
     def get_missing_responsiva(self, obj):
-        if hasattr(obj, 'profile') and obj.profile.ficha:
-            from investigaciones.models import CatalogoInvestigador
-            try:
-                inv = CatalogoInvestigador.objects.get(ficha=obj.profile.ficha, activo=True)
-                if not inv.archivo_responsiva:
-                    return True #cambiar a false cuando se tenga el archivo
-            except CatalogoInvestigador.DoesNotExist:
-                return False
+        inv = self._investigador(obj)
+        if inv is not None and not inv.archivo_responsiva:
+            return True #cambiar a false cuando se tenga el archivo
         return False
 
     class Meta:
@@ -1,8 +1,12 @@
 from django.db.models.signals import post_migrate
 from django.dispatch import receiver
 from django.contrib.auth.models import User, Group
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, post_init, pre_save, pre_delete, m2m_changed
 from .models import Profile
+from .tokens import invalidar_roles
+
+# Campos del User que viajan como claims del JWT
+CAMPOS_CLAIMS = ('username', 'is_superuser', 'is_staff', 'is_active')
 
 
 @receiver(post_save, sender=User)
@@ -14,6 +18,61 @@ def create_user_profile(sender, instance, created, **kwargs):
 def save_user_profile(sender, instance, **kwargs):
     instance.profile.save()
 
+# --- Sello de claims del JWT (login_register/tokens.py) ---
+
+@receiver(pre_save, sender=User)
+def impedir_guardar_usuario_de_token(sender, instance, **kwargs):
+    # El User armado con los claims (JWTAuthenticationSinConsulta) está incompleto
+    if getattr(instance, '_desde_token', False):
+        raise ValueError("El usuario autenticado sin consulta es de solo lectura")
+
+@receiver(post_init, sender=User)
+def recordar_claims_usuario(sender, instance, **kwargs):
+    instance._claims_originales = tuple(getattr(instance, campo) for campo in CAMPOS_CLAIMS)
+
+@receiver(post_save, sender=User)
+def invalidar_roles_por_usuario(sender, instance, created, **kwargs):
+    actuales = tuple(getattr(instance, campo) for campo in CAMPOS_CLAIMS)
+    if not created and actuales != instance._claims_originales:
+        instance._claims_originales = actuales
+        invalidar_roles(instance.pk)
+
+@receiver(post_delete, sender=User)
+def invalidar_roles_usuario_borrado(sender, instance, **kwargs):
+    invalidar_roles(instance.pk)
+
+@receiver(post_init, sender=Profile)
+def recordar_ficha_claims(sender, instance, **kwargs):
+    instance._ficha_claims = instance.ficha
+
+@receiver(post_save, sender=Profile)
+def invalidar_roles_por_ficha(sender, instance, **kwargs):
+    if instance.ficha != instance._ficha_claims:
+        instance._ficha_claims = instance.ficha
+        invalidar_roles(instance.user_id)
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidar_roles_por_grupos(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidar_roles(instance.pk)
+        return
+    # Desde el grupo (group.user_set.add/remove/clear); en clear los miembros se leen antes
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if action == 'pre_clear':
+        pk_set = instance.user_set.values_list('pk', flat=True)
+    for user_id in pk_set:
+        invalidar_roles(user_id)
+
+@receiver(pre_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidar_roles_por_grupo(sender, instance, **kwargs):
+    # Renombrar o borrar un grupo cambia los roles de todos sus miembros
+    if instance.pk:
+        for user_id in instance.user_set.values_list('pk', flat=True):
+            invalidar_roles(user_id)
+
 @receiver(post_migrate)
 def create_default_admin_and_group(sender, **kwargs):
     
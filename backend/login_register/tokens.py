@@ -0,0 +1,153 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+GRUPOS_ADMIN = ('Admin', 'AdminCentral')
+CLAVE_VERSION_ROLES = 'auth:roles:{}'
+METODOS_LECTURA = ('GET', 'HEAD', 'OPTIONS')
+
+
+def version_roles(user_id):
+    """
+    Sello de los claims de autorización del usuario. Cambia (invalidar_roles) al
+    modificar sus grupos, su ficha o sus banderas; un token con otro sello ya no
+    se usa para autorizar sin consultar. None si no hay sello (la caché lo expulsó
+    o nunca se emitió): entonces ningún token del usuario es vigente.
+    """
+    return cache.get(CLAVE_VERSION_ROLES.format(user_id))
+
+
+def _sello_para_emitir(user_id):
+    """Sello actual del usuario; si no existe se crea uno nuevo (nunca se reutiliza uno anterior)."""
+    clave = CLAVE_VERSION_ROLES.format(user_id)
+    cache.add(clave, time.time_ns(), timeout=None)
+    return cache.get(clave)
+
+
+def invalidar_roles(user_id):
+    cache.set(CLAVE_VERSION_ROLES.format(user_id), time.time_ns(), timeout=None)
+
+
+def claims_vigentes(token):
+    """True si el token trae claims de roles y su sello coincide con el actual (que debe existir)."""
+    if not isinstance(token.get('roles'), list):
+        return False
+    actual = version_roles(token.get(api_settings.USER_ID_CLAIM))
+    return actual is not None and token.get('version_roles') == actual
+
+
+def _region(roles):
+    """Región del primer rol Supervisor<REGION> u Operador<REGION> (None si no tiene)."""
+    for prefijo in ('Supervisor', 'Operador'):
+        for rol in roles:
+            if rol.startswith(prefijo) and len(rol) > len(prefijo):
+                return rol[len(prefijo):]
+    return None
+
+
+def _responsiva_pendiente(ficha):
+    """True si la ficha es de un investigador activo que no ha subido su responsiva."""
+    if not ficha:
+        return False
+    from investigaciones.models import CatalogoInvestigador
+
+    archivos = list(
+        CatalogoInvestigador.objects.filter(ficha=ficha, activo=True)
+        .values_list('archivo_responsiva', flat=True)[:1]
+    )
+    return bool(archivos) and not archivos[0]
+
+
+def claims_usuario(user):
+    """
+    Datos de autorización que viajan en el JWT: roles (grupos), región, ficha y si
+    falta la responsiva. Se calculan una vez al emitir el token.
+    """
+    # El sello se lee antes que los grupos: un cambio entre ambas lecturas deja el token ya vencido
+    version = _sello_para_emitir(user.pk)
+    roles = roles_usuario(user)
+    ficha = ficha_usuario(user)
+    return {
+        'version_roles': version,
+        'username': user.username,
+        'superusuario': user.is_superuser,
+        'staff': user.is_staff,
+        'roles': roles,
+        'region': _region(roles),
+        'ficha': ficha,
+        'responsiva_pendiente': _responsiva_pendiente(ficha),
+    }
+
+
+def roles_usuario(user):
+    """
+    Nombres de los grupos del usuario. Si la petición llegó con JWT se toman de
+    los claims del token (sin consulta); si no, se consultan una vez por petición.
+    """
+    roles = getattr(user, '_roles', None)
+    if roles is None:
+        roles = list(user.groups.values_list('name', flat=True)) if user.is_authenticated else []
+        user._roles = roles
+    return roles
+
+
+def ficha_usuario(user):
+    """Ficha del perfil; con autenticación sin consulta viene del claim del token."""
+    if hasattr(user, '_ficha'):
+        return user._ficha
+    profile = getattr(user, 'profile', None)
+    return profile.ficha if profile else None
+
+
+def es_admin(user, grupos=GRUPOS_ADMIN):
+    """Superusuario o miembro de alguno de `grupos` (Admin/AdminCentral por omisión)."""
+    if not user.is_authenticated:
+        return False
+    if isinstance(grupos, str):
+        grupos = (grupos,)
+    return user.is_superuser or any(rol in grupos for rol in roles_usuario(user))
+
+
+class JWTAuthenticationConRoles(JWTAuthentication):
+    """JWTAuthentication que deja en el usuario los roles del claim para no consultar sus grupos."""
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if claims_vigentes(validated_token):
+            user._roles = validated_token['roles']
+        return user
+
+
+class JWTAuthenticationSinConsulta(JWTAuthenticationConRoles):
+    """
+    Para endpoints de lectura frecuentes: en GET/HEAD/OPTIONS con claims vigentes
+    no carga el User; arma uno en memoria (id, username, banderas, roles y ficha)
+    que no se puede guardar. Cualquier otro caso se autentica como siempre.
+    La vida corta del access token (SIMPLE_JWT) limita cuánto dura un claim.
+    """
+
+    def authenticate(self, request):
+        self._lectura = request.method in METODOS_LECTURA
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if not (settings.JWT_AUTORIZACION_SIN_CONSULTA and self._lectura and claims_vigentes(validated_token)):
+            return super().get_user(validated_token)
+
+        user = User(
+            id=validated_token[api_settings.USER_ID_CLAIM],
+            username=validated_token.get('username', ''),
+            is_superuser=validated_token.get('superusuario', False),
+            is_staff=validated_token.get('staff', False),
+            is_active=True,
+        )
+        user._state.adding = False
+        user._state.db = 'default'
+        user._roles = validated_token['roles']
+        user._ficha = validated_token.get('ficha')
+        user._desde_token = True
+        return user
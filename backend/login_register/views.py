@@ -8,20 +8,25 @@ from rest_framework import generics, permissions
 from rest_framework.permissions import AllowAny
 from .serializers import RegisterSerializer, UserSerializer, GroupSerializer, UserUpdateSerializer, ChangePasswordSerializer, AdminResetPasswordSerializer
 from django.contrib.auth.models import User, Group
-from rest_framework_simplejwt.views import TokenObtainPairView
-from .serializers import CustomTokenObtainPairSerializer
+from .models import Profile
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .serializers import CustomTokenObtainPairSerializer, CustomTokenRefreshSerializer
+from .tokens import roles_usuario
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = CustomTokenRefreshSerializer
+
 class IsAdminGroup(permissions.BasePermission):
     """
     Permiso personalizado que verifica si el usuario pertenece al grupo 'Admin'
     """
     def has_permission(self, request, view):
         # Verificar si el usuario está autenticado y pertenece al grupo Admin
-        return request.user and request.user.is_authenticated and request.user.groups.filter(name='Admin').exists()
+        return request.user and request.user.is_authenticated and 'Admin' in roles_usuario(request.user)
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -33,10 +38,22 @@ class UserListView(generics.ListAPIView):
     Vista de API para listar todos los usuarios.
     Solo los administradores (is_staff=True) pueden acceder.
     """
-    queryset = User.objects.all()
+    queryset = User.objects.select_related('profile').prefetch_related('groups')
     serializer_class = UserSerializer
     permission_classes = [IsAdminGroup]
 
+    def get_serializer_context(self):
+        # Investigadores de todas las fichas de una vez (en lugar de una consulta por usuario)
+        from investigaciones.models import CatalogoInvestigador
+
+        context = super().get_serializer_context()
+        fichas = Profile.objects.exclude(ficha__isnull=True).exclude(ficha='').values('ficha')
+        context['investigadores_por_ficha'] = {
+            inv.ficha: inv
+            for inv in CatalogoInvestigador.objects.filter(activo=True, ficha__in=fichas).order_by('-id')
+        }
+        return context
+
 class GroupListView(generics.ListAPIView):
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
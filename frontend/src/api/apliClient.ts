@@ -29,10 +29,42 @@ apiClient.interceptors.request.use(
   }
 );
 
+// El access token dura poco (lleva los roles del usuario): al recibir 401 se renueva
+// una vez con el refresh token y se repite la petición. Las peticiones que fallen
+// mientras tanto esperan la misma renovación.
+let renovando: Promise<string> | null = null;
+
+const renovarAccessToken = (): Promise<string> => {
+  if (!renovando) {
+    const refresh = localStorage.getItem('refresh_token');
+    renovando = (refresh
+      ? axios.post(`${API_BASE_URL}/api/token/refresh/`, { refresh }).then((response) => {
+          localStorage.setItem('access_token', response.data.access);
+          return response.data.access as string;
+        })
+      : Promise.reject(new Error('Sin refresh token'))
+    ).finally(() => {
+      renovando = null;
+    });
+  }
+  return renovando;
+};
+
 apiClient.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    const original = error.config;
     if (error.response?.status === 401) {
+      if (original && !original._reintento) {
+        original._reintento = true;
+        try {
+          const access = await renovarAccessToken();
+          original.headers['Authorization'] = `Bearer ${access}`;
+          return apiClient(original);
+        } catch {
+          // Refresh vencido o inválido: se cierra la sesión
+        }
+      }
       localStorage.removeItem('access_token');
       localStorage.removeItem('refresh_token');
       // Redirigir al login
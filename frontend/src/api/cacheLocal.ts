@@ -0,0 +1,57 @@
+import axios from 'axios';
+import apiClient from './apliClient';
+
+interface Entrada<T> {
+    etag: string;
+    data: T;
+}
+
+const PREFIJO = 'gai:cache:';
+
+const leer = <T,>(clave: string): Entrada<T> | null => {
+    try {
+        const guardado = localStorage.getItem(clave);
+        return guardado ? JSON.parse(guardado) : null;
+    } catch {
+        return null;
+    }
+};
+
+/**
+ * GET de catálogos con copia en localStorage validada por ETag (la versión del catálogo).
+ * Se envía If-None-Match con la versión guardada; si el servidor responde 304 se usan
+ * los datos locales sin volver a descargarlos. Si el servidor no responde (red o 5xx)
+ * también se usa la copia local, aunque esté desactualizada.
+ */
+export const getConCache = async <T,>(url: string): Promise<T> => {
+    const clave = PREFIJO + url;
+    const guardado = leer<T>(clave);
+
+    let response;
+    try {
+        response = await apiClient.get<T>(url, {
+            headers: guardado ? { 'If-None-Match': guardado.etag } : undefined,
+            validateStatus: status => (status >= 200 && status < 300) || status === 304,
+        });
+    } catch (err) {
+        const sinServidor = axios.isAxiosError(err) && (!err.response || err.response.status >= 500);
+        if (guardado && sinServidor) {
+            return guardado.data;
+        }
+        throw err;
+    }
+
+    if (response.status === 304 && guardado) {
+        return guardado.data;
+    }
+
+    const etag = response.headers['etag'];
+    if (etag) {
+        try {
+            localStorage.setItem(clave, JSON.stringify({ etag, data: response.data }));
+        } catch {
+            // Sin espacio en localStorage: se usa la respuesta sin guardarla
+        }
+    }
+    return response.data;
+};
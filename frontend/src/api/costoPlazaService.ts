@@ -0,0 +1,46 @@
+import apiClient from './apliClient';
+
+interface CatalogoCostoPlaza {
+    version: string;
+    niveles_con_grado: string[];
+    costos: Record<string, number | string>;
+}
+
+// Se descarga una sola vez por sesión de la página; todas las búsquedas son locales
+let catalogoPromise: Promise<CatalogoCostoPlaza> | null = null;
+
+// Misma normalización que investigaciones/services/costo_plaza.py
+const normalizar = (valor: string | number | null | undefined): string => {
+    const texto = valor === null || valor === undefined ? '' : String(valor).trim();
+    return /^\d+$/.test(texto) ? String(parseInt(texto, 10)) : texto.toUpperCase();
+};
+
+const cargarCatalogo = (): Promise<CatalogoCostoPlaza> => {
+    if (!catalogoPromise) {
+        catalogoPromise = apiClient
+            .get<CatalogoCostoPlaza>('/api/investigaciones/costo-plaza/catalogo/')
+            .then(response => response.data)
+            .catch(error => {
+                catalogoPromise = null; // Se reintenta en la siguiente consulta
+                throw error;
+            });
+    }
+    return catalogoPromise;
+};
+
+export const costoPlazaService = {
+    /**
+     * Costo anual de la plaza o null si la combinación no existe en el catálogo.
+     * El grado solo se toma en cuenta para los niveles que lo requieren (44, 45, 46).
+     */
+    obtenerCosto: async (nivel: string, jornada: string, grado: string): Promise<number | null> => {
+        const catalogo = await cargarCatalogo();
+        const nivelNorm = normalizar(nivel);
+        let clave = `${nivelNorm}|${normalizar(jornada)}`;
+        if (catalogo.niveles_con_grado.includes(nivelNorm)) {
+            clave += `|${normalizar(grado)}`;
+        }
+        const costo = catalogo.costos[clave];
+        return costo === undefined ? null : Number(costo);
+    }
+};
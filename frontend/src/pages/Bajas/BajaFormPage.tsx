@@ -8,6 +8,7 @@ import Swal from 'sweetalert2';
 import '../../styles/BajaDetails.css';
 import DocumentPreviewModal from '../../components/Modals/DocumentPreviewModal';
 import { auditoriaService } from '../../api/auditoriaService';
+import { costoPlazaService } from '../../api/costoPlazaService';
 import CompletionProgressBar from '../../components/DataDisplay/CompletionProgressBar';
 
 interface DocumentoBaja {
@@ -15,6 +16,7 @@ interface DocumentoBaja {
     baja: number;
     tipo: string;
     archivo: string;
+    nombre_archivo?: string;
     descripcion?: string;
     uploaded_at: string;
 }
@@ -91,18 +93,12 @@ function BajaFormPage() {
             // Ensure jornada has 2 digits
             const jornadaFmt = jornada.length === 1 ? `0${jornada}` : jornada;
 
-            // Fixed endpoint to match urls.py
-            const response = await apiClient.get(`/api/investigaciones/obtener-costo-plaza/`, {
-                params: {
-                    nivel,
-                    jornada: jornadaFmt,
-                    grado
-                }
-            });
+            // Catálogo completo en memoria: cambiar nivel/jornada/grado no consulta al servidor
+            const costoAnual = await costoPlazaService.obtenerCosto(nivel, jornadaFmt, grado);
 
-            if (response.data.costo_anual) {
+            if (costoAnual) {
                 // Assuming formatNumber is available or we use a simple formatter
-                return new Intl.NumberFormat('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 }).format(response.data.costo_anual);
+                return new Intl.NumberFormat('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 }).format(costoAnual);
             }
             return '0.00';
         } catch (error) {
@@ -515,7 +511,7 @@ function BajaFormPage() {
 
     const handleDownload = async (doc: DocumentoBaja) => {
         try {
-            const filename = doc.archivo.split('/').pop() || doc.tipo;
+            const filename = doc.nombre_archivo || doc.archivo.split('/').pop() || doc.tipo;
             auditoriaService.logAction('DOWNLOAD', `Descargó documento baja: ${doc.tipo} - ${filename}`, Number(id) || 0);
 
             const response = await apiClient.get(`/api/bajas/documentos-bajas/${doc.id}/download/`, {
@@ -535,7 +531,7 @@ function BajaFormPage() {
     };
 
     const handlePreview = (doc: DocumentoBaja) => {
-        const filename = doc.archivo.split('/').pop() || doc.tipo;
+        const filename = doc.nombre_archivo || doc.archivo.split('/').pop() || doc.tipo;
         auditoriaService.logAction('VIEW', `Visualizó documento baja: ${doc.tipo} - ${filename}`, Number(id) || 0);
 
         // Helper for DocumentPreviewModal interface
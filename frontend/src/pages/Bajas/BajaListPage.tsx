@@ -1,8 +1,8 @@
-import { useState, useEffect, useMemo } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import apiClient from '../../api/apliClient';
 import type { BajaListado } from '../../types/baja.types';
-import { FiPlus, FiEdit, FiTrash2, FiSearch, FiDownload, FiAlertCircle, FiFileText, FiChevronUp, FiChevronDown, FiCheckCircle } from 'react-icons/fi';
+import { FiPlus, FiEdit, FiTrash2, FiSearch, FiDownload, FiUpload, FiAlertCircle, FiFileText, FiChevronUp, FiChevronDown, FiCheckCircle } from 'react-icons/fi';
 import ButtonIcon from '../../components/Buttons/ButtonIcon';
 import Pagination from '../../components/Pagination';
 import * as XLSX from 'xlsx';
@@ -27,14 +27,18 @@ type SortConfig = {
 function BajaListPage() {
     const navigate = useNavigate();
     const [currentView, setCurrentView] = useState<'REGISTRO' | 'SEGUIMIENTO' | 'FINALIZACION' | 'CONCLUIDA'>('REGISTRO');
-    const [allBajas, setAllBajas] = useState<BajaListado[]>([]);
+    const [bajas, setBajas] = useState<BajaListado[]>([]);
+    const [totalItems, setTotalItems] = useState(0);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState('');
     const [searchTerm, setSearchTerm] = useState('');
+    const [debouncedSearch, setDebouncedSearch] = useState('');
     const [currentPage, setCurrentPage] = useState(1);
     const [itemsPerPage, setItemsPerPage] = useState(10);
     const [userRole, setUserRole] = useState<string>('');
     const [sortConfig, setSortConfig] = useState<SortConfig>({ key: null, direction: 'ascending' });
+    const lastRequest = useRef(0);
+    const importInputRef = useRef<HTMLInputElement>(null);
 
     // Document Modal State
     const [isDocModalOpen, setIsDocModalOpen] = useState(false);
@@ -44,19 +48,62 @@ function BajaListPage() {
     useEffect(() => {
         const role = localStorage.getItem('userRole') || '';
         setUserRole(role);
-        fetchBajas();
     }, []);
 
+    // Espera a que el usuario deje de escribir antes de consultar
+    useEffect(() => {
+        const timer = setTimeout(() => setDebouncedSearch(searchTerm.trim()), 300);
+        return () => clearTimeout(timer);
+    }, [searchTerm]);
+
+    // Filtros, orden y búsqueda se resuelven en el servidor
+    const buildParams = () => {
+        const params: Record<string, string | number> = { estatus_baja: currentView };
+        if (debouncedSearch) params.search = debouncedSearch;
+        if (sortConfig.key) {
+            params.ordering = `${sortConfig.direction === 'descending' ? '-' : ''}${sortConfig.key}`;
+        }
+        return params;
+    };
+
+    const filtrosPrevios = useRef('');
+
+    useEffect(() => {
+        // Con filtros nuevos se vuelve a la página 1 antes de consultar: la página
+        // actual puede no existir en el nuevo resultado (DRF responde 404)
+        const filtros = JSON.stringify([currentView, debouncedSearch, sortConfig, itemsPerPage]);
+        const cambiaronFiltros = filtros !== filtrosPrevios.current;
+        filtrosPrevios.current = filtros;
+        if (cambiaronFiltros && currentPage !== 1) {
+            setCurrentPage(1);
+            return;
+        }
+        fetchBajas();
+    }, [currentView, debouncedSearch, sortConfig, currentPage, itemsPerPage]);
+
     const fetchBajas = async () => {
+        const requestId = ++lastRequest.current;
         setLoading(true);
         try {
-            const response = await apiClient.get('/api/bajas/bajas/');
-            setAllBajas(response.data);
+            const response = await apiClient.get('/api/bajas/bajas/', {
+                params: { ...buildParams(), page: currentPage, page_size: itemsPerPage }
+            });
+            // Ignora respuestas de consultas que ya fueron reemplazadas por otra
+            if (requestId !== lastRequest.current) return;
+            setBajas(response.data.results);
+            setTotalItems(response.data.count);
+            setError('');
         } catch (err: any) {
+            if (requestId !== lastRequest.current) return;
+            // La página dejó de existir (p. ej. se borró el último registro de la última página)
+            if (err.response?.status === 404 && currentPage > 1) {
+                setCurrentPage(page => Math.max(1, page - 1));
+                return;
+            }
             console.error('Error fetching bajas:', err);
             setError('No se pudo cargar la lista de bajas.');
         } finally {
-            setLoading(false);
+            if (requestId === lastRequest.current) setLoading(false);
         }
     };
 
@@ -74,10 +121,8 @@ function BajaListPage() {
             try {
                 await apiClient.patch(`/api/bajas/bajas/${id}/`, { estatus_baja: nuevoStatus });
 
-                // Update local state
-                setAllBajas(prev => prev.map(item =>
-                    item.id === id ? { ...item, estatus_baja: nuevoStatus as any } : item
-                ));
+                // El registro sale de esta etapa: se recarga la página actual
+                fetchBajas();
 
                 Swal.fire('Actualizado', `El registro pasó a ${nuevoStatus}.`, 'success');
             } catch (err) {
@@ -102,7 +147,7 @@ function BajaListPage() {
         if (result.isConfirmed) {
             try {
                 await apiClient.delete(`/api/bajas/bajas/${id}/`);
-                setAllBajas(prev => prev.filter(item => item.id !== id));
+                fetchBajas();
                 Swal.fire('Eliminado', 'El registro ha sido eliminado.', 'success');
             } catch (err) {
                 console.error(err);
@@ -146,45 +191,6 @@ function BajaListPage() {
         setIsDocModalOpen(true);
     };
 
-    // Filter Logic
-    const filteredBajas = useMemo(() => {
-        return allBajas.filter(baja => {
-            const status = baja.estatus_baja || 'REGISTRO';
-            const matchesView = status === currentView;
-            const matchesSearch =
-                baja.ficha.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                baja.nombre.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                baja.tramite.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                baja.nivel.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                baja.nuevo_nivel.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                baja.region.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                baja.status.toLowerCase().includes(searchTerm.toLowerCase());
-
-            return matchesView && matchesSearch;
-        });
-    }, [allBajas, currentView, searchTerm]);
-
-    // Sorting Logic
-    const sortedBajas = useMemo(() => {
-        let sortableItems = [...filteredBajas];
-        if (sortConfig.key !== null) {
-            sortableItems.sort((a, b) => {
-                let valA: any = a[sortConfig.key as keyof BajaListado];
-                let valB: any = b[sortConfig.key as keyof BajaListado];
-
-                if (sortConfig.key === 'created_at' || sortConfig.key === 'fecha_ejecucion') {
-                    valA = new Date(valA).getTime();
-                    valB = new Date(valB).getTime();
-                }
-
-                if (valA < valB) return sortConfig.direction === 'ascending' ? -1 : 1;
-                if (valA > valB) return sortConfig.direction === 'ascending' ? 1 : -1;
-                return 0;
-            });
-        }
-        return sortableItems;
-    }, [filteredBajas, sortConfig]);
-
     const requestSort = (key: keyof BajaListado) => {
         let direction: 'ascending' | 'descending' = 'ascending';
         if (sortConfig.key === key && sortConfig.direction === 'ascending') {
@@ -198,19 +204,26 @@ function BajaListPage() {
         return sortConfig.direction === 'ascending' ? <FiChevronUp /> : <FiChevronDown />;
     };
 
-    // Pagination Logic
-    const indexOfLastItem = currentPage * itemsPerPage;
-    const indexOfFirstItem = indexOfLastItem - itemsPerPage;
-    const currentItems = sortedBajas.slice(indexOfFirstItem, indexOfLastItem);
-    const totalPages = Math.ceil(sortedBajas.length / itemsPerPage);
+    const totalPages = Math.ceil(totalItems / itemsPerPage);
+
+    const exportToExcel = async () => {
+        // Sin ?page el endpoint regresa todos los registros de la etapa
+        let registros: BajaListado[] = [];
+        try {
+            const response = await apiClient.get('/api/bajas/bajas/', { params: buildParams() });
+            registros = response.data;
+        } catch (err) {
+            console.error(err);
+            Swal.fire('Error', 'No se pudieron obtener los datos para exportar.', 'error');
+            return;
+        }
 
-    const exportToExcel = () => {
-        if (sortedBajas.length === 0) {
+        if (registros.length === 0) {
             Swal.fire('Info', 'No hay datos para exportar', 'info');
             return;
         }
 
-        const data = sortedBajas.map(baja => ({
+        const data = registros.map(baja => ({
             'Ficha': baja.ficha,
             'Tramite': baja.tramite,
             'Nombre': baja.nombre,
@@ -231,9 +244,33 @@ function BajaListPage() {
         saveAs(blob, `Bajas_${currentView}_${new Date().toISOString().split('T')[0]}.xlsx`);
     };
 
-    useEffect(() => {
-        setCurrentPage(1);
-    }, [currentView, searchTerm]);
+    const handleImport = async (e: React.ChangeEvent<HTMLInputElement>) => {
+        const file = e.target.files?.[0];
+        e.target.value = '';
+        if (!file) return;
+
+        const formData = new FormData();
+        formData.append('archivo', file);
+        Swal.fire({ title: 'Importando...', allowOutsideClick: false, didOpen: () => Swal.showLoading() });
+        try {
+            const response = await apiClient.post('/api/bajas/bajas/importar/', formData, {
+                headers: { 'Content-Type': 'multipart/form-data' }
+            });
+            const { total, creadas, errores } = response.data;
+            const detalle = errores.slice(0, 20).map((err: { fila: number; ficha: string; errores: Record<string, string[]> }) =>
+                `Fila ${err.fila} (${err.ficha || 'sin ficha'}): ${Object.entries(err.errores).map(([campo, msgs]) => `${campo}: ${msgs.join(' ')}`).join('; ')}`
+            ).join('<br/>');
+            Swal.fire({
+                title: 'Importación terminada',
+                html: `${creadas} de ${total} registros creados.${errores.length ? `<br/><br/><b>${errores.length} filas con error:</b><br/>${detalle}${errores.length > 20 ? '<br/>...' : ''}` : ''}`,
+                icon: errores.length ? 'warning' : 'success'
+            });
+            fetchBajas();
+        } catch (err: any) {
+            console.error(err);
+            Swal.fire('Error', err.response?.data?.error || 'No se pudo importar el archivo.', 'error');
+        }
+    };
 
 
     return (
@@ -252,7 +289,17 @@ function BajaListPage() {
                     </div>
                     <ButtonIcon variant="view" icon={<FiDownload />} text="Exportar" onClick={exportToExcel} size="medium" />
                     {currentView === 'REGISTRO' && (
-                        <ButtonIcon variant="add" to="/bajas/nuevo" icon={<FiPlus />} text="Nuevo" size="medium" />
+                        <>
+                            <input
+                                ref={importInputRef}
+                                type="file"
+                                accept=".csv,.xlsx"
+                                style={{ display: 'none' }}
+                                onChange={handleImport}
+                            />
+                            <ButtonIcon variant="view" icon={<FiUpload />} text="Importar" onClick={() => importInputRef.current?.click()} size="medium" />
+                            <ButtonIcon variant="add" to="/bajas/nuevo" icon={<FiPlus />} text="Nuevo" size="medium" />
+                        </>
                     )}
                 </div>
             </div>
@@ -319,7 +366,7 @@ function BajaListPage() {
                             </tr>
                         </thead>
                         <tbody>
-                            {currentItems.map((baja) => (
+                            {bajas.map((baja) => (
                                 <tr key={baja.id}>
                                     <td style={{ textAlign: 'center', borderLeft: '4px solid #17a2b8' }}>
                                         <button
@@ -421,21 +468,21 @@ function BajaListPage() {
                         </tbody>
                     </table>
 
-                    {filteredBajas.length === 0 && (
+                    {totalItems === 0 && (
                         <div className="no-results">
                             <FiCheckCircle style={{ fontSize: '2rem', marginBottom: '10px', display: 'block', margin: '0 auto', color: '#28a745' }} />
                             No hay bajas en esta etapa.
                         </div>
                     )}
 
-                    {filteredBajas.length > 0 && (
+                    {totalItems > 0 && (
                         <Pagination
                             currentPage={currentPage}
                             totalPages={totalPages}
                             onPageChange={setCurrentPage}
                             itemsPerPage={itemsPerPage}
                             onItemsPerPageChange={setItemsPerPage}
-                            totalItems={filteredBajas.length}
+                            totalItems={totalItems}
                         />
                     )}
                 </div>
@@ -3,6 +3,7 @@ import CompletionProgressBar from '../components/DataDisplay/CompletionProgressB
 
 import { useParams, useNavigate } from 'react-router-dom';
 import apiClient from '../api/apliClient';
+import { getConCache } from '../api/cacheLocal';
 import type {
   InvestigacionFormState,
   OpcionesDropdowns,
@@ -10,7 +11,8 @@ import type {
   Investigador,
   Involucrado,
   Testigo,
-  EmpleadoBuscado
+  EmpleadoBuscado,
+  FormBootstrap
 } from '../types/investigacion.types';
 import '../styles/InvestigacionaDetails.css';
 import ButtonIcon from '../components/Buttons/ButtonIcon';
@@ -363,17 +365,18 @@ function InvestigacionFormPage() {
 
     const fetchDatosIniciales = async () => {
       try {
-        const [opcionesRes, centrosTrabajoRes, investigadoresRes] = await Promise.all([
-          apiClient.get('/api/investigaciones/opciones/'),
-          apiClient.get('/api/investigaciones/centros-trabajo/'),
-          apiClient.get('/api/investigaciones/listar-investigadores/').catch(() => ({ data: [] }))
-        ]);
+        // Opciones, centros e investigadores en una sola petición (revalidada con ETag)
+        const datos = await getConCache<FormBootstrap>('/api/investigaciones/form-bootstrap/');
 
         if (!isMounted) return;
 
-        setOpciones(opcionesRes.data);
-        setCentrosTrabajo(centrosTrabajoRes.data);
-        setListaInvestigadores(investigadoresRes.data);
+        setOpciones(datos.opciones);
+        setCentrosTrabajo(datos.centros_trabajo);
+        setListaInvestigadores(datos.investigadores);
+        if (!datos.centros_disponibles) {
+          // RH no respondió: el formulario sigue funcionando sin la lista de centros
+          console.warn('Catálogo de centros de trabajo no disponible');
+        }
       } catch (err) {
         console.error('Error cargando datos iniciales:', err);
         setError('No se pudieron cargar los datos iniciales.');
@@ -123,6 +123,16 @@ export interface OpcionesDropdowns {
   sancion: string[];
 }
 
+// Respuesta de /api/investigaciones/form-bootstrap/
+export interface FormBootstrap {
+  version: string;
+  opciones: OpcionesDropdowns;
+  centros_trabajo: string[];
+  centros_coduni: string[];
+  centros_disponibles: boolean; // false si RH no respondió (centros vacíos)
+  investigadores: { ficha: string; nombre: string }[];
+}
+
 export interface InvestigacionListado {
   direccion: string;
   id: number;